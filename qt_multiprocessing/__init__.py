@@ -1,5 +1,24 @@
 from mp_event_loop import *
+from .shared_buffer import *
+from .payload_cache import *
+from .transport import *
+from .compact import *
+from .batch import *
+from .metrics import *
+from .tracing import *
+from .lanes import *
+from .backpressure import *
+from .prewarm import *
+from .widget_pool import *
+from .release import *
+from .worker_pool import *
+from .dispatcher import *
+from .options import *
+from .signal_forward import *
 from .qt_proxy import *
+from .frame_stream import *
+from .table_model import *
 from .close_app_helper import *
 from .qt_mp_event_loop import *
+from .qt_pool import *
 from .application import *
@@ -1,6 +1,8 @@
 from qtpy import QtWidgets
+from .options import LOOP_OPTIONS
 from .qt_proxy import WidgetProxy
 from .qt_mp_event_loop import AppEventLoop
+from .qt_pool import AppEventLoopPool
 
 
 __all__ = ['MpApplication']
@@ -18,8 +20,26 @@ class MpApplication(QtWidgets.QApplication):
             return super().__new__(cls, *args, **kwargs)
         return app
 
-    def __init__(self, *args, initialize_process=None, output_handlers=None, **kwargs):
-        """Instantiate the application."""
+    def __init__(self, *args, initialize_process=None, output_handlers=None, processes=1, placement='round_robin',
+                 prewarm=False, **kwargs):
+        """Instantiate the application.
+
+        Args:
+            *args (tuple): QApplication arguments.
+            initialize_process (function)[None]: Function to create and show widgets returning a dict of widgets and
+                variable names to save for use.
+            output_handlers (list/tuple/callable)[None]: Function or list of funcs that executed events with results.
+            processes (int)[1]: Number of separate Qt processes. More than 1 creates an AppEventLoopPool which places
+                each WidgetProxy in one of the processes.
+            placement (str/callable)['round_robin']: How the pool places proxies. 'round_robin', 'least_loaded' or a
+                function that takes the pool and the proxy class and returns a process index.
+            prewarm (bool)[False]: If True start the separate processes now. __enter__ adopts them, so the processes
+                start while the main window is being built.
+            **kwargs (dict): Event loop options (max_events, wakeup, lane_weights, max_queue_size, overflow, preload,
+                output_dispatch, trace, transport, ...) and QApplication keyword arguments. See
+                options.get_loop_options for every event loop option.
+        """
+        options = {name: kwargs.pop(name) for name in list(kwargs) if name in LOOP_OPTIONS}
         if len(args) == 0 and len(kwargs) == 0:
             args = ([],)
 
@@ -27,8 +47,16 @@ class MpApplication(QtWidgets.QApplication):
 
         # Set the base proxy multiprocessing event loop
         if not hasattr(self, '__loop__'):
-            self.__loop__ = AppEventLoop(initialize_process=initialize_process, output_handlers=output_handlers)
+            if processes > 1:
+                self.__loop__ = AppEventLoopPool(processes=processes, placement=placement,
+                                                 initialize_process=initialize_process,
+                                                 output_handlers=output_handlers, **options)
+            else:
+                self.__loop__ = AppEventLoop(initialize_process=initialize_process, output_handlers=output_handlers,
+                                             **options)
             WidgetProxy.__loop__ = self.__loop__
+            if prewarm:
+                self.__loop__.prewarm()
 
     def __enter__(self):
         """Enter the context manager (with statement)."""
@@ -64,7 +92,102 @@ class MpApplication(QtWidgets.QApplication):
         if not self.__loop__.is_running():
             self.__loop__.start()
 
-    def add_var_event(self, var_name, target, *args, has_output=None, event_key=None, **kwargs):
+    def batch(self):
+        """Return a context manager that collects events and sends them as one message when the with block exits.
+
+        The separate process runs all of the events in the same Qt tick with the updates of the affected windows
+        suspended.
+
+        .. code-block:: python
+
+            >>> with app.batch():
+            ...     app.add_var_event('label', 'move', 100, 100)
+            ...     app.add_var_event('label', 'setText', 'Hello')
+        """
+        return self.__loop__.batch()
+
+    def priority(self, priority):
+        """Return a context manager that sends the events in the with block with the given priority lane.
+
+        The separate process always serves higher lanes first, so interactive calls do not wait behind bulk updates.
+
+        .. code-block:: python
+
+            >>> with app.priority('interactive'):
+            ...     dialog_proxy.show()
+            ...     dialog_proxy.raise_()
+
+        Args:
+            priority (str/int): Lane name ('interactive', 'normal', 'bulk') or index.
+        """
+        return self.__loop__.priority(priority)
+
+    @property
+    def coalesced_count(self):
+        """Return the number of calls that were dropped, because a newer call replaced them."""
+        return self.__loop__.coalesced_count
+
+    def stats(self, refresh=False, reset=False, timeout=5):
+        """Return the metrics of the main process and the separate process.
+
+        .. code-block:: python
+
+            >>> stats = app.stats()
+            >>> stats['main']['queue_depth'], stats['process']['latency']['p99']
+
+        Args:
+            refresh (bool)[False]: If True ask the separate process for its current metrics and wait for the answer.
+            reset (bool)[False]: If refresh is True clear the metrics of the separate process after reading them.
+            timeout (float)[5]: Seconds to wait for a refresh.
+        """
+        return self.__loop__.stats(refresh=refresh, reset=reset, timeout=timeout)
+
+    def add_stats_handler(self, handler):
+        """Add a function that is called with the stats every time the separate process pushes its metrics."""
+        self.__loop__.add_stats_handler(handler)
+
+    def export_trace(self, path=None, timeout=5):
+        """Return the traced events as a Chrome trace / Perfetto dictionary and write it as JSON if a path is given.
+
+        Requires MpApplication(trace=True).
+        """
+        return self.__loop__.export_trace(path, timeout=timeout)
+
+    def add_key_handler(self, event_key, handler, once=False):
+        """Add a function that handles the output events with the event_key.
+
+        With output_dispatch='qt' the handler runs on the GUI thread, so it can update widgets directly.
+        """
+        self.__loop__.add_key_handler(event_key, handler, once=once)
+
+    def remove_key_handler(self, event_key, handler=None):
+        self.__loop__.remove_key_handler(event_key, handler)
+
+    def connect_signal(self, source, signal_name, callback, policy='all', interval=0.05):
+        """Call a function on the GUI thread when a signal of a variable or proxy in the separate process is emitted.
+
+        Args:
+            source (str/WidgetProxy): Variable name or proxy of the object with the signal.
+            signal_name (str): Name of the signal. Ex: 'clicked', 'valueChanged'.
+            callback (callable): Function that is called with the signal arguments.
+            policy (str)['all']: 'all', 'latest', 'throttle' or 'debounce'.
+            interval (float)[0.05]: Seconds for the 'throttle' and 'debounce' policies.
+
+        Returns:
+            conn_id (int): Connection id to disconnect the signal with.
+        """
+        return self.__loop__.connect_signal(source, signal_name, callback, policy=policy, interval=interval)
+
+    def disconnect_signal(self, conn_id):
+        self.__loop__.disconnect_signal(conn_id)
+
+    @property
+    def dropped_count(self):
+        """Return the number of events that the overflow policy dropped, because the event queue was full."""
+        return self.__loop__.dropped_count
+
+    def add_var_event(self, var_name, target, *args, has_output=None, event_key=None, coalesce=None, priority=None,
+                      **kwargs):
         """Add an event to be run in a separate process.
 
         Args:
@@ -73,16 +196,21 @@ class MpApplication(QtWidgets.QApplication):
             *args (tuple): Arguments to pass into the target function.
             has_output (bool) [False]: If True save the executed event and put it on the consumer/output queue.
             event_key (str)[None]: Key to identify the event or output result.
+            coalesce (bool)[None]: If True drop the pending call with the same var_name and method name.
+                None uses the coalesce value given to the application.
+            priority (str/int)[None]: Lane name ('interactive', 'normal', 'bulk') or index.
             **kwargs (dict): Keyword arguments to pass into the target function.
             args (tuple)[None]: Keyword args argument.
             kwargs (dict)[None]: Keyword kwargs argument.
         """
-        self.__loop__.add_var_event(var_name, target, *args, has_output=has_output, event_key=event_key, **kwargs)
+        self.__loop__.add_var_event(var_name, target, *args, has_output=has_output, event_key=event_key,
+                                    coalesce=coalesce, priority=priority, **kwargs)
 
         if not self.__loop__.is_running():
             self.__loop__.start()
 
-    def add_mp_event(self, target, *args, has_output=None, event_key=None, cache=False, re_register=False, **kwargs):
+    def add_mp_event(self, target, *args, has_output=None, event_key=None, cache=False, re_register=False,
+                     priority=None, gui_free=False, apply=None, **kwargs):
         """Add an event to be run in a separate process.
 
         Args:
@@ -92,17 +220,23 @@ class MpApplication(QtWidgets.QApplication):
             event_key (str)[None]: Key to identify the event or output result.
             cache (bool) [False]: If the target object should be cached.
             re_register (bool)[False]: Forcibly register this object in the other process.
+            priority (str/int)[None]: Lane name ('interactive', 'normal', 'bulk') or index.
+            gui_free (bool)[False]: If True the target does not touch widgets and runs on a worker thread of the
+                separate process.
+            apply (callable/tuple)[None]: Called with the results on the GUI thread of the separate process. A
+                callable or (proxy/variable name, method name).
             **kwargs (dict): Keyword arguments to pass into the target function.
             args (tuple)[None]: Keyword args argument.
             kwargs (dict)[None]: Keyword kwargs argument.
         """
-        self.__loop__.add_event(target, *args, has_output=has_output, event_key=event_key,
-                                cache=cache, re_register=re_register, **kwargs)
+        self.__loop__.add_event(target, *args, has_output=has_output, event_key=event_key, cache=cache,
+                                re_register=re_register, priority=priority, gui_free=gui_free, apply=apply, **kwargs)
 
         if not self.__loop__.is_running():
             self.__loop__.start()
 
-    def add_mp_cache_event(self, target, *args, has_output=None, event_key=None, re_register=False, **kwargs):
+    def add_mp_cache_event(self, target, *args, has_output=None, event_key=None, re_register=False, priority=None,
+                           **kwargs):
         """Add an event that uses cached objects.
 
         Args:
@@ -111,15 +245,45 @@ class MpApplication(QtWidgets.QApplication):
             has_output (bool) [False]: If True save the executed event and put it on the consumer/output queue.
             event_key (str)[None]: Key to identify the event or output result.
             re_register (bool)[False]: Forcibly register this object in the other process.
+            priority (str/int)[None]: Lane name ('interactive', 'normal', 'bulk') or index.
             **kwargs (dict): Keyword arguments to pass into the target function.
             args (tuple)[None]: Keyword args argument.
             kwargs (dict)[None]: Keyword kwargs argument.
         """
         self.__loop__.add_cache_event(target, *args, has_output=has_output, event_key=event_key,
-                                      re_register=re_register, **kwargs)
+                                      re_register=re_register, priority=priority, **kwargs)
+
+        if not self.__loop__.is_running():
+            self.__loop__.start()
+
+    def add_mp_event_future(self, target, *args, **kwargs):
+        """Run a callable in a separate process and return a concurrent.futures.Future for the results.
+
+        Args:
+            target (function/method/callable): Callable to run in a separate process.
+            *args (tuple): Arguments to pass into the target function.
+            **kwargs (dict): Keyword arguments to pass into the target function.
+        """
+        future = self.__loop__.add_event_future(target, *args, **kwargs)
+
+        if not self.__loop__.is_running():
+            self.__loop__.start()
+        return future
+
+    def add_var_event_future(self, var_name, target, *args, **kwargs):
+        """Call a method of a variable in a separate process and return a concurrent.futures.Future for the results.
+
+        Args:
+            var_name (str): Variable name.
+            target (str): Method name of the variable.
+            *args (tuple): Arguments to pass into the target function.
+            **kwargs (dict): Keyword arguments to pass into the target function.
+        """
+        future = self.__loop__.add_var_event_future(var_name, target, *args, **kwargs)
 
         if not self.__loop__.is_running():
             self.__loop__.start()
+        return future
 
     def mp_cache_object(self, obj, has_output=False, event_key=None, re_register=False):
         """Save an object in the separate processes, so the object can persist.
@@ -0,0 +1,141 @@
+"""
+Bounded event queue helpers.
+
+The depth of the event queue is the number of messages that were put on the queue and are not finished running in the
+separate process. A CountedQueue counts them itself and wakes the waiting producers with a condition when the separate
+process finishes a message. When an AppEventLoop has a max_queue_size and the depth reaches it, the overflow policy
+decides what happens to a new message:
+
+  * 'block' - Wait until the separate process finishes a message (queue.Full after block_timeout).
+  * 'raise' - Raise queue.Full.
+  * 'drop_newest' - Drop the new message.
+  * 'drop_oldest' - Hold the message in the main process. The oldest held message is dropped when max_queue_size
+    messages are held.
+  * 'coalesce' - Like 'drop_oldest', but a held call is replaced by a newer call of the same object and method.
+
+Held messages are sent in order by a background thread when the separate process catches up, so they do not wait for
+the producer or the Qt event loop of the main process.
+"""
+import time
+import multiprocessing as mp
+from multiprocessing.queues import JoinableQueue
+
+from mp_event_loop import Proxy
+
+from .compact import MSG_CALL
+
+
+__all__ = ['OVERFLOW_POLICIES', 'get_overflow_policy', 'CountedQueue', 'get_queue_depth', 'wait_for_room',
+           'get_coalesce_key']
+
+
+OVERFLOW_POLICIES = ('block', 'raise', 'drop_oldest', 'drop_newest', 'coalesce')
+
+
+def get_overflow_policy(policy):
+    """Return the overflow policy name. Dashes are allowed ('drop-oldest')."""
+    name = str(policy).replace('-', '_')
+    if name not in OVERFLOW_POLICIES:
+        raise ValueError('Invalid overflow policy {}! Use one of {}'.format(repr(policy), OVERFLOW_POLICIES))
+    return name
+
+
+class CountedQueue(JoinableQueue):
+    """JoinableQueue that counts the messages that are not done and wakes the waiting producers when one is done."""
+
+    def __init__(self, maxsize=0, *, ctx=None):
+        if ctx is None:
+            ctx = mp.get_context()
+        super().__init__(maxsize, ctx=ctx)
+        self._depth = ctx.RawValue('q', 0)
+        self._depth_cond = ctx.Condition()
+
+    def __getstate__(self):
+        return super().__getstate__() + (self._depth, self._depth_cond)
+
+    def __setstate__(self, state):
+        super().__setstate__(state[:-2])
+        self._depth, self._depth_cond = state[-2:]
+
+    def put(self, obj, block=True, timeout=None):
+        with self._depth_cond:
+            self._depth.value += 1
+        try:
+            super().put(obj, block, timeout)
+        except BaseException:
+            self._finish()
+            raise
+
+    def task_done(self):
+        self._finish()  # Before join returns, so the depth is correct after wait
+        super().task_done()
+
+    def _finish(self):
+        with self._depth_cond:
+            self._depth.value = max(self._depth.value - 1, 0)
+            self._depth_cond.notify_all()
+
+    def depth(self):
+        """Return the number of messages that were put on the queue and are not done."""
+        return self._depth.value
+
+    def wait_for_room(self, max_depth, timeout=None):
+        """Wait until fewer than max_depth messages are not done. Return False if the timeout ran out."""
+        with self._depth_cond:
+            return self._depth_cond.wait_for(lambda: self._depth.value < max_depth, timeout)
+
+
+def get_queue_depth(que):
+    """Return the number of unfinished messages of a queue or None if it cannot be measured (macOS).
+
+    Queues without a depth method (plain multiprocessing queues) return the number of waiting messages.
+    """
+    try:
+        return que.depth()
+    except (AttributeError, NotImplementedError, OSError):
+        pass
+    try:
+        return que.qsize()
+    except (AttributeError, NotImplementedError, OSError):
+        return None
+
+
+def wait_for_room(que, max_depth, timeout=None):
+    """Wait until a queue has fewer than max_depth unfinished messages. Return False if the timeout ran out.
+
+    Queues without a wait_for_room method are checked again after a short sleep.
+    """
+    wait = getattr(que, 'wait_for_room', None)
+    if wait is not None:
+        return wait(max_depth, timeout)
+
+    depth = get_queue_depth(que)
+    if depth is None or depth < max_depth:
+        return True
+    time.sleep(0.001 if timeout is None else min(timeout, 0.001))
+    depth = get_queue_depth(que)
+    return depth is None or depth < max_depth
+
+
+def get_coalesce_key(event):
+    """Return a key of the object and method that an event calls or None if the event should not be replaced.
+
+    Events with an event_key (outputs that are waited on) are never replaced.
+    """
+    if isinstance(event, tuple):
+        if event[0] == MSG_CALL:
+            return 'compact', event[1], event[2]
+        return None
+    elif getattr(event, 'event_key', None) is not None:
+        return None
+
+    method_name = getattr(event, 'method_name', None)
+    if method_name is None:
+        return None
+    obj = getattr(event, 'object', None)
+    if isinstance(obj, Proxy):
+        return obj.__proxy_id__, method_name
+    obj_id = getattr(event, 'object_id', None)
+    if obj_id is None:
+        return None
+    return obj_id, method_name
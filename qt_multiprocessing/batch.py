@@ -0,0 +1,90 @@
+"""
+Batches of events.
+
+AppEventLoop.batch collects the events of a thread and sends them as one BatchEvent. The separate process runs all of
+the events of the batch in the same Qt tick with the updates of the affected windows suspended, so the windows repaint
+once for the whole batch.
+"""
+from mp_event_loop import Event, CacheEvent
+
+from .compact import read_message
+
+
+__all__ = ['BatchEvent', 'bind_cached_event']
+
+
+def bind_cached_event(event):
+    """Look up the cached object and string arguments of a CacheEvent again right before the event runs.
+
+    The events of a BatchEvent are unpickled with the batch, so a variable that an earlier event of the batch saves is
+    not in the cache yet when a later event of the batch is unpickled.
+    """
+    if not isinstance(event, CacheEvent) or event.object_id is None:
+        return
+    cache = event.cache
+    try:
+        if event.object is None:
+            event.object = cache.get(event.object_id, None)
+            if event.method_name:
+                event.target = getattr(event.object, event.method_name, None)
+            else:
+                event.target = event.object
+        event.args = tuple(cache.get(arg, arg) if isinstance(arg, str) else arg for arg in event.args)
+        event.kwargs = {key: cache.get(val, val) if isinstance(val, str) else val
+                        for key, val in event.kwargs.items()}
+    except (AttributeError, TypeError):
+        pass
+
+
+class BatchEvent(Event):
+    """Event that runs many events in the separate process in the same Qt tick with widget updates suspended."""
+
+    def __init__(self, events=None, has_output=False, event_key=None):
+        """Create the batch.
+
+        Args:
+            events (list)[None]: Events to run in order.
+            has_output (bool)[False]: The sub events put their own output on the consumer queue.
+            event_key (str)[None]: Key to identify the event.
+        """
+        super().__init__(None, has_output=has_output, event_key=event_key)
+        self.events = []
+        self.keys = {}
+        self.lane = None  # Highest priority lane of the events. Only used in the main process.
+        for event in events or []:
+            self.add(event)
+
+    def add(self, event, coalesce_key=None):
+        """Add an event to the batch. Return the event that was replaced by the coalesce_key or None."""
+        replaced = None
+        if coalesce_key is not None:
+            index = self.keys.get(coalesce_key, None)
+            if index is not None:
+                replaced, self.events[index] = self.events[index], None
+            self.keys[coalesce_key] = len(self.events)
+        self.events.append(event)
+        return replaced
+
+    def get_events(self):
+        """Return the events that were not replaced."""
+        return [event for event in self.events if event is not None]
+
+    def exec_(self):
+        """Run all of the events."""
+        self.results = None
+        self.error = None
+        for event in self.get_events():
+            if isinstance(event, tuple):
+                event = read_message(event)
+            event.exec_()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['events'] = self.get_events()
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.events = state.get('events', [])
+        self.keys = {}
+        self.lane = None
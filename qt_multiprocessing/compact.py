@@ -0,0 +1,143 @@
+"""
+Compact wire protocol for proxy method calls.
+
+A WidgetProxy subclass lists the method names to precompile in METHODS. Every method gets an integer index (its
+position in METHODS) and every proxy gets an integer object number. A call is sent as the small tuple
+(MSG_CALL, object number, method index, args, kwargs) instead of a pickled ProxyEvent with the proxy state and method
+name. The separate process keeps a table of the bound methods of each object, so no attribute lookups are needed when
+the call runs.
+
+Every message that is put on the event queue is wrapped in an envelope (MSG_ENVELOPE, header, message). The header is a
+small dictionary with the send time, so the separate process can measure how long the message waited in the queue.
+The header also has the lane and the keys of the objects that the message touches (See lanes.py), so the separate
+process can schedule a message without unpickling it. Events are sent as a LazyMessage, which the feeder thread of the
+queue pickles to bytes. The separate process keeps the bytes in the priority lanes and unpickles the event right before
+it runs, so proxy objects and widgets are created in the order that the events run.
+
+The ids of garbage collected proxies are sent as (MSG_RELEASE, items). See release.py.
+"""
+import time
+import pickle
+import itertools
+
+from mp_event_loop import Event
+
+from .utils import print_exception
+
+
+__all__ = ['MSG_CALL', 'MSG_ENVELOPE', 'CompactCall', 'register_compact_object', 'unregister_compact_object',
+           'get_compact_object', 'read_message', 'get_message_args', 'make_envelope', 'open_envelope',
+           'MSG_RELEASE', 'is_release_message', 'LazyMessage', 'load_message']
+
+
+MSG_CALL = 1
+MSG_ENVELOPE = 2
+MSG_RELEASE = 3
+
+OBJECT_NUMBERS = itertools.count(1)  # Object numbers given to proxies in the main process
+COMPACT_OBJECTS = {}  # Object number: (object, [bound methods]) in the separate process
+
+
+def register_compact_object(num, obj, method_names):
+    """Save the object and its bound methods for the object number."""
+    if num not in COMPACT_OBJECTS:
+        COMPACT_OBJECTS[num] = (obj, [getattr(obj, name, None) for name in method_names])
+
+
+def unregister_compact_object(num):
+    """Remove the object number and return the object or None."""
+    return COMPACT_OBJECTS.pop(num, (None, None))[0]
+
+
+def get_compact_object(num):
+    """Return the object for the object number or None."""
+    return COMPACT_OBJECTS.get(num, (None, None))[0]
+
+
+class CompactCall(Event):
+    """Event created in the separate process from a compact call message. It never has output."""
+
+    def __init__(self, num, index, args=None, kwargs=None):
+        obj, methods = COMPACT_OBJECTS.get(num, (None, []))
+        try:
+            target = methods[index]
+        except IndexError:
+            target = None
+        super().__init__(target, args=args or tuple(), kwargs=kwargs or {}, has_output=False)
+        self.object = obj
+        self.object_num = num
+        self.method_index = index
+
+    def exec_(self):
+        """Run the method. Print the error, because there is no output to report it with."""
+        super().exec_()
+        if self.error is not None:
+            print_exception(self.error, 'Compact call failed for object {} method {}'.format(self.object_num,
+                                                                                            self.method_index))
+
+
+def read_message(message):
+    """Return the event for a compact message tuple."""
+    if message[0] == MSG_CALL:
+        return CompactCall(*message[1:])
+    raise ValueError('Invalid message {}'.format(repr(message)))
+
+
+def get_message_args(message):
+    """Return the args and kwargs of a compact message tuple."""
+    if message[0] == MSG_CALL:
+        return message[3], message[4]
+    return tuple(), {}
+
+
+def is_release_message(message):
+    """Return True if the message is a (MSG_RELEASE, items) tuple."""
+    return isinstance(message, tuple) and message[0] == MSG_RELEASE
+
+
+def make_envelope(message, **header):
+    """Return the envelope tuple that wraps an event or compact message with a header dictionary."""
+    return MSG_ENVELOPE, header, message
+
+
+def open_envelope(message):
+    """Return (header, message) of an envelope. Messages that are not in an envelope have an empty header."""
+    if isinstance(message, tuple) and message[0] == MSG_ENVELOPE:
+        return message[1], message[2]
+    return {}, message
+
+
+class LazyMessage(object):
+    """Message that is pickled to bytes when the queue pickles it and unpickled with load_message when it runs."""
+
+    __slots__ = ('message', 'data', 'on_pickled')
+
+    def __init__(self, message=None, data=None, on_pickled=None):
+        """Create the message.
+
+        Args:
+            message (object)[None]: Event or compact message in the main process.
+            data (bytes)[None]: Pickled message in the separate process.
+            on_pickled (callable)[None]: Function that is called with the perf_counter start and end time of the
+                pickling in the thread that pickles the message (The feeder thread of the queue).
+        """
+        self.message = message
+        self.data = data
+        self.on_pickled = on_pickled
+
+    def __reduce__(self):
+        if self.on_pickled is None:
+            return LazyMessage, (None, pickle.dumps(self.message, pickle.HIGHEST_PROTOCOL))
+        start = time.perf_counter()
+        data = pickle.dumps(self.message, pickle.HIGHEST_PROTOCOL)
+        self.on_pickled(start, time.perf_counter())
+        return LazyMessage, (None, data)
+
+
+def load_message(message):
+    """Return the event or compact message of a LazyMessage. Other messages are returned as they are."""
+    if isinstance(message, LazyMessage):
+        if message.data is None:
+            return message.message
+        return pickle.loads(message.data)
+    return message
@@ -0,0 +1,276 @@
+"""
+Qt integrated output dispatcher for the main process.
+
+By default a consumer thread reads the output events of the separate process and runs the output handlers in that
+thread. With output_dispatch='qt' the consumer queue is drained on the GUI thread of the main process instead. A
+QSocketNotifier wakes the Qt event loop when the queue's pipe has data and every wakeup delivers a batch of output
+events, so handlers can touch widgets directly and a burst of output does not wake the GUI once for every event.
+
+Output events with an event_key are delivered to the handlers registered for the key (AppEventLoop.add_key_handler)
+with one dictionary lookup. Only events without a key handler go through the output_handlers.
+
+Futures that are created with this dispatcher deliver the waiting output themselves when result() is called on the GUI
+thread, so blocking on a future does not dead lock the thread that dispatches its result.
+"""
+import time
+import itertools
+import threading
+from queue import Empty
+from concurrent.futures import Future
+
+from qtpy import QtCore
+
+from mp_event_loop import Event, mark_task_done
+
+from .utils import print_exception
+
+from .backpressure import get_queue_depth
+
+
+__all__ = ['OUTPUT_DISPATCH', 'OutputDispatcher', 'DispatchFuture', 'OutputRouter']
+
+
+OUTPUT_DISPATCH = ('thread', 'qt')
+
+
+class OutputDispatcher(object):
+    """Drain a consumer queue on the Qt thread that created the dispatcher."""
+
+    def __init__(self, consumer_queue, process_output, fileno=None, max_batch=1000, time_budget=0.008,
+                 poll_interval=0.1):
+        """Create the dispatcher.
+
+        Args:
+            consumer_queue (multiprocessing.JoinableQueue): Output queue of the separate process.
+            process_output (callable): Function that handles each output event.
+            fileno (int)[None]: File descriptor that is readable when the queue has data. None only polls.
+            max_batch (int)[1000]: Maximum number of events to deliver every wakeup.
+            time_budget (float)[0.008]: Seconds that a wakeup may deliver events for, so the GUI can repaint.
+            poll_interval (float)[0.1]: Seconds between checks of the queue. The notifier wakes the thread sooner.
+        """
+        self.consumer_queue = consumer_queue
+        self.process_output = process_output
+        self.max_batch = max_batch
+        self.time_budget = time_budget
+        self.thread = QtCore.QThread.currentThread()
+        self.dispatched = 0
+        self.batches = 0
+
+        self.timer = QtCore.QTimer()
+        self.timer.setInterval(int(poll_interval * 1000))
+        self.timer.timeout.connect(self.dispatch)
+
+        self.notifier = None
+        if fileno is not None:
+            self.notifier = QtCore.QSocketNotifier(fileno, QtCore.QSocketNotifier.Read)
+            self.notifier.setEnabled(False)
+            self.notifier.activated.connect(lambda *args: self.dispatch())
+
+    def is_dispatch_thread(self):
+        """Return True if this thread delivers the output events."""
+        return QtCore.QThread.currentThread() == self.thread
+
+    def start(self):
+        self.timer.start()
+        if self.notifier is not None:
+            self.notifier.setEnabled(True)
+
+    def stop(self):
+        try:
+            self.timer.stop()
+        except (AttributeError, RuntimeError):
+            pass
+        try:
+            self.notifier.setEnabled(False)
+        except (AttributeError, RuntimeError):
+            pass
+
+    def dispatch(self, timeout=None):
+        """Deliver a batch of output events.
+
+        Args:
+            timeout (float)[None]: Seconds to wait for the first event. None does not wait.
+
+        Returns:
+            count (int): Number of events that were delivered.
+        """
+        max_batch = self.max_batch
+        deadline = None
+        if self.time_budget is not None:
+            deadline = time.perf_counter() + self.time_budget
+
+        count = 0
+        while not max_batch or count < max_batch:
+            try:
+                if timeout and not count:
+                    event = self.consumer_queue.get(timeout=timeout)
+                else:
+                    event = self.consumer_queue.get_nowait()
+            except (Empty, OSError, ValueError):
+                break
+            try:
+                if isinstance(event, Event):
+                    self.process_output(event)
+            except Exception as err:
+                print_exception(err, 'Output dispatch failed!')
+            finally:
+                mark_task_done(self.consumer_queue)
+            count += 1
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+        if count:
+            self.dispatched += count
+            self.batches += 1
+        return count
+
+    def wait_for(self, future, timeout=None):
+        """Deliver output events on this thread until the future is done or the timeout runs out."""
+        deadline = None
+        if timeout is not None:
+            deadline = time.perf_counter() + timeout
+        while not future.done():
+            wait = 0.05
+            if deadline is not None:
+                wait = min(wait, deadline - time.perf_counter())
+                if wait <= 0:
+                    break
+            self.dispatch(timeout=wait)
+
+    def drain(self, is_alive=None):
+        """Deliver every output event that is queued or still being produced.
+
+        Args:
+            is_alive (callable)[None]: Returns False when no more output can arrive (The separate process stopped).
+        """
+        while True:
+            depth = get_queue_depth(self.consumer_queue)
+            if not depth or (is_alive is not None and not is_alive() and self.consumer_queue.empty()):
+                break
+            if self.is_dispatch_thread():
+                self.dispatch(timeout=0.05)
+            else:
+                time.sleep(0.001)  # The dispatch thread delivers the events
+
+
+class DispatchFuture(Future):
+    """Future that delivers the output events itself when it is waited on from the dispatch thread."""
+
+    def __init__(self, loop=None):
+        """Create the future.
+
+        Args:
+            loop (AppEventLoop)[None]: Event loop with the dispatcher that delivers the result.
+        """
+        super().__init__()
+        self.loop = loop
+
+    def _dispatch_until_done(self, timeout):
+        """Deliver output events if this is the dispatch thread. Return the timeout that is left."""
+        dispatcher = getattr(self.loop, 'dispatcher', None)
+        if dispatcher is None or self.done() or not dispatcher.is_dispatch_thread():
+            return timeout
+        dispatcher.wait_for(self, timeout)
+        return timeout if self.done() else 0
+
+    def result(self, timeout=None):
+        return super().result(self._dispatch_until_done(timeout))
+
+    def exception(self, timeout=None):
+        return super().exception(self._dispatch_until_done(timeout))
+
+
+class OutputRouter(object):
+    """Route the output events with an event_key to the future or the key handlers that wait for the key."""
+
+    def __init__(self):
+        self.futures = {}  # event_key: DispatchFuture
+        self.key_handlers = {}  # event_key: [(handler, once)]
+        self.lock = threading.Lock()
+        self.ids = itertools.count()
+
+    def add_future(self, loop=None):
+        """Return (event_key, future) for a future that is resolved by the output event with the event_key.
+
+        Args:
+            loop (AppEventLoop)[None]: Event loop with the dispatcher that delivers the result.
+        """
+        key = '__future_{}__'.format(next(self.ids))
+        future = DispatchFuture(loop)
+        with self.lock:
+            self.futures[key] = future
+        future.add_done_callback(lambda fut: self.pop_future(key))
+        return key, future
+
+    def pop_future(self, key):
+        """Remove and return the future of the event_key or None."""
+        with self.lock:
+            return self.futures.pop(key, None)
+
+    def cancel_futures(self):
+        """Cancel all futures that are waiting for results."""
+        with self.lock:
+            futures = list(self.futures.values())
+            self.futures.clear()
+        for future in futures:
+            future.cancel()
+
+    def add_key_handler(self, event_key, handler, once=False):
+        """Add a function that handles the output events with the event_key.
+
+        Args:
+            event_key (str): Key of the output events.
+            handler (callable): Function that takes the output event.
+            once (bool)[False]: If True remove the handler after the first event.
+        """
+        self.key_handlers.setdefault(event_key, []).append((handler, once))
+
+    def remove_key_handler(self, event_key, handler=None):
+        """Remove a key handler or every handler of the event_key if handler is None."""
+        if handler is None:
+            self.key_handlers.pop(event_key, None)
+            return
+        handlers = [item for item in self.key_handlers.get(event_key, []) if item[0] != handler]
+        if handlers:
+            self.key_handlers[event_key] = handlers
+        else:
+            self.key_handlers.pop(event_key, None)
+
+    def run_key_handlers(self, event, handlers):
+        """Run the key handlers of an output event and remove the handlers that only run once."""
+        for handler, once in list(handlers):
+            if once:
+                self.remove_key_handler(event.event_key, handler)
+            try:
+                handler(event)
+            except Exception as err:
+                print_exception(err, 'Key handler failed for {}!'.format(repr(event.event_key)))
+
+    def route(self, event):
+        """Resolve the future or run the key handlers of an output event.
+
+        Returns:
+            routed (bool): False if nothing waits for the event_key of the event.
+        """
+        key = event.event_key
+        if key is None:
+            return False
+
+        future = None
+        if self.futures:
+            future = self.pop_future(key)
+        if future is not None:
+            if not future.cancelled():
+                if event.error is not None:
+                    future.set_exception(event.error)
+                else:
+                    future.set_result(event.results)
+            return True
+
+        handlers = None
+        if self.key_handlers:
+            handlers = self.key_handlers.get(key, None)
+        if handlers:
+            self.run_key_handlers(event, handlers)
+            return True
+        return False
@@ -0,0 +1,319 @@
+"""
+Stream image frames to a widget in the separate process with a shared memory ring buffer.
+
+Calling a proxy method for every camera or render frame pickles the whole image and queues every frame, even the frames
+that are replaced before they are painted. A FrameStreamProxy creates a ring of frame slots in shared memory instead.
+The producer writes a frame into the next slot and no message is sent. The FrameView widget in the separate process
+checks the ring at max_fps and paints only the newest complete frame, so a fast source never grows the event queue.
+
+The display counters (shown, dropped and display latency) are written into the ring header by the separate process and
+are read by the main process with mp_frame_stats() without a message.
+
+.. code-block:: python
+
+    view = qt_multiprocessing.FrameStreamProxy(640, 480, channels=3)
+    view.mp_write_frame(rgb_array)  # numpy uint8 array (height, width[, channels]), QImage or bytes
+    print(view.mp_frame_stats()['dropped'])
+
+Note:
+    Each slot is guarded by its sequence number. A frame that is overwritten while it is copied is skipped. Only one
+    thread should write frames to a ring.
+"""
+import time
+import struct
+import weakref
+
+from qtpy import QtCore, QtGui, QtWidgets
+
+from .shared_buffer import shared_memory, numpy, attach_segment, detach_segment
+from .qt_proxy import WidgetProxy
+
+
+__all__ = ['FrameRing', 'FrameView', 'FrameStreamProxy']
+
+
+RING_HEADER = struct.Struct('<QII')  # Latest sequence number, number of slots, bytes of data in each slot
+DISPLAY_HEADER = struct.Struct('<QQQddd')  # Shown, dropped, torn, last latency, total latency, max latency
+DISPLAY_OFFSET = 64
+HEADER_SIZE = 128
+SLOT_HEADER = struct.Struct('<QdIIIIQ')  # Sequence number, timestamp, width, height, bytes per line, format, nbytes
+SLOT_HEADER_SIZE = 64
+SEQUENCE = struct.Struct('<Q')
+
+
+def get_format_value(fmt):
+    """Return the int value of a QImage.Format."""
+    return int(getattr(fmt, 'value', fmt))
+
+
+def get_image_format(channels):
+    """Return the QImage.Format for 8 bit frames with the given number of channels."""
+    if channels == 1:
+        return QtGui.QImage.Format_Grayscale8
+    elif channels == 3:
+        return QtGui.QImage.Format_RGB888
+    elif channels == 4:
+        return QtGui.QImage.Format_RGBA8888
+    raise ValueError('Invalid number of channels {}! Use 1, 3 or 4'.format(channels))
+
+
+class FrameRing(object):
+    """Ring of frame slots in a shared memory segment."""
+
+    def __init__(self, slot_size=None, slots=3, name=None):
+        """Create or attach to the ring.
+
+        Args:
+            slot_size (int)[None]: Maximum number of bytes of a frame. Required to create a ring.
+            slots (int)[3]: Number of frame slots. More slots make overwriting a frame that is being copied less
+                likely.
+            name (str)[None]: Name of an existing ring to attach to. None creates a ring that this object owns.
+        """
+        if shared_memory is None:
+            raise RuntimeError('Frame streaming requires multiprocessing.shared_memory (Python 3.8+)!')
+
+        self.owner = name is None
+        if self.owner:
+            if not slot_size:
+                raise ValueError('A slot_size is required to create a frame ring!')
+            self.slots = max(int(slots), 1)
+            self.slot_size = (int(slot_size) + 63) // 64 * 64  # Keep the data aligned
+            self.shm = shared_memory.SharedMemory(create=True, size=self.get_offset(self.slots))
+            RING_HEADER.pack_into(self.shm.buf, 0, 0, self.slots, self.slot_size)
+        else:
+            self.shm = attach_segment(name)
+            _, self.slots, self.slot_size = RING_HEADER.unpack_from(self.shm.buf, 0)
+        self.name = self.shm.name
+
+    def get_offset(self, slot):
+        """Return the offset of a slot header."""
+        return HEADER_SIZE + slot * (SLOT_HEADER_SIZE + self.slot_size)
+
+    @property
+    def latest(self):
+        """Sequence number of the newest complete frame. 0 if no frame was written."""
+        return SEQUENCE.unpack_from(self.shm.buf, 0)[0]
+
+    def write(self, data, width, height, bytes_per_line, fmt, timestamp=None):
+        """Write a frame into the next slot and make it the newest frame.
+
+        Args:
+            data (bytes/memoryview): Frame pixels.
+            width (int): Frame width.
+            height (int): Frame height.
+            bytes_per_line (int): Number of bytes of each row.
+            fmt (QImage.Format/int): Image format of the pixels.
+            timestamp (float)[None]: time.time() when the frame was captured. Default now.
+
+        Returns:
+            seq (int): Sequence number of the frame.
+        """
+        data = memoryview(data).cast('B')
+        if data.nbytes > self.slot_size:
+            raise ValueError('The frame has {} bytes, but the slots only hold {} bytes!'.format(data.nbytes,
+                                                                                               self.slot_size))
+        if timestamp is None:
+            timestamp = time.time()
+
+        buf = self.shm.buf
+        seq = self.latest + 1
+        offset = self.get_offset((seq - 1) % self.slots)
+        SEQUENCE.pack_into(buf, offset, 0)  # The slot is being written
+        start = offset + SLOT_HEADER_SIZE
+        buf[start: start + data.nbytes] = data
+        SLOT_HEADER.pack_into(buf, offset, 0, timestamp, width, height, bytes_per_line, get_format_value(fmt),
+                              data.nbytes)
+        SEQUENCE.pack_into(buf, offset, seq)
+        SEQUENCE.pack_into(buf, 0, seq)
+        return seq
+
+    def write_frame(self, frame, fmt=None, width=None, height=None, timestamp=None):
+        """Write a numpy array, QImage or bytes frame.
+
+        Args:
+            frame (numpy.ndarray/QImage/bytes): uint8 array with the shape (height, width[, channels]), QImage or
+                bytes with the width, height and fmt.
+            fmt (QImage.Format)[None]: Image format. Default from the array channels or the QImage.
+            width (int)[None]: Width of a bytes frame.
+            height (int)[None]: Height of a bytes frame.
+            timestamp (float)[None]: time.time() when the frame was captured. Default now.
+        """
+        if numpy is not None and isinstance(frame, numpy.ndarray):
+            frame = numpy.ascontiguousarray(frame, dtype=numpy.uint8)
+            height, width = frame.shape[:2]
+            channels = frame.shape[2] if frame.ndim > 2 else 1
+            if fmt is None:
+                fmt = get_image_format(channels)
+            return self.write(frame.data, width, height, width * channels, fmt, timestamp)
+
+        elif isinstance(frame, QtGui.QImage):
+            bits = frame.constBits()
+            try:
+                bits.setsize(frame.sizeInBytes())  # PyQt sip.voidptr
+            except AttributeError:
+                pass
+            return self.write(bits, frame.width(), frame.height(), frame.bytesPerLine(),
+                              frame.format() if fmt is None else fmt, timestamp)
+
+        if width is None or height is None or fmt is None:
+            raise ValueError('A bytes frame requires the width, height and fmt!')
+        data = memoryview(frame).cast('B')
+        return self.write(data, width, height, data.nbytes // max(height, 1), fmt, timestamp)
+
+    def read_latest(self, last_seq=0, retries=3):
+        """Copy the newest complete frame.
+
+        Args:
+            last_seq (int)[0]: Sequence number of the frame that is already shown.
+            retries (int)[3]: Number of times to retry when the frame is overwritten while it is copied.
+
+        Returns:
+            frame (tuple): (seq, timestamp, width, height, bytes_per_line, fmt, data) or None if there is no new frame.
+        """
+        buf = self.shm.buf
+        for _ in range(retries):
+            latest = self.latest
+            if not latest or latest == last_seq:
+                return None
+            offset = self.get_offset((latest - 1) % self.slots)
+            seq, timestamp, width, height, bytes_per_line, fmt, nbytes = SLOT_HEADER.unpack_from(buf, offset)
+            if seq == latest:
+                start = offset + SLOT_HEADER_SIZE
+                data = bytes(buf[start: start + nbytes])
+                if SEQUENCE.unpack_from(buf, offset)[0] == latest:
+                    return seq, timestamp, width, height, bytes_per_line, fmt, data
+            self.record_torn()
+        return None
+
+    def get_display_counters(self):
+        return list(DISPLAY_HEADER.unpack_from(self.shm.buf, DISPLAY_OFFSET))
+
+    def record_shown(self, seq, last_seq, latency):
+        """Count a shown frame, the frames that were skipped since the last shown frame and the display latency."""
+        shown, dropped, torn, _, total, max_latency = self.get_display_counters()
+        dropped += max(seq - last_seq - 1, 0)
+        DISPLAY_HEADER.pack_into(self.shm.buf, DISPLAY_OFFSET, shown + 1, dropped, torn, latency, total + latency,
+                                 max(max_latency, latency))
+
+    def record_torn(self):
+        counters = self.get_display_counters()
+        counters[2] += 1
+        DISPLAY_HEADER.pack_into(self.shm.buf, DISPLAY_OFFSET, *counters)
+
+    def stats(self):
+        """Return the written, shown and dropped frame counts and the display latency in seconds."""
+        shown, dropped, torn, latency, total, max_latency = self.get_display_counters()
+        return {'written': self.latest, 'shown': shown, 'dropped': dropped, 'torn': torn,
+                'latency': latency if shown else None, 'mean_latency': total / shown if shown else None,
+                'max_latency': max_latency if shown else None}
+
+    def close(self):
+        """Close the segment. The owner also removes the segment. A ring that was attached to by name is detached."""
+        if not self.owner:
+            detach_segment(self.name)
+            return
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except (OSError, BufferError):
+            pass
+
+
+class FrameView(QtWidgets.QWidget):
+    """Widget in the separate process that paints the newest frame of a FrameRing."""
+
+    def __init__(self, ring_name, max_fps=60, parent=None):
+        """Create the view.
+
+        Args:
+            ring_name (str): Shared memory name of the FrameRing.
+            max_fps (float)[60]: Number of times a second to check for a new frame.
+            parent (QWidget)[None]: Parent widget.
+        """
+        super().__init__(parent)
+        self.ring = FrameRing(name=ring_name)
+        self.image = None
+        self.image_data = None  # The image does not copy the pixels
+        self.shown_seq = 0
+
+        # Detach the ring when the widget is garbage collected (Ex: the proxy was released)
+        weakref.finalize(self, self.ring.close)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.timer.setInterval(max(int(1000 / max_fps), 1))
+        self.timer.timeout.connect(self.check_frame)
+        self.timer.start()
+
+    def check_frame(self):
+        """Schedule a paint if a new frame was written."""
+        if self.ring.latest != self.shown_seq and self.isVisible():
+            self.update()
+
+    def frame_stats(self):
+        return self.ring.stats()
+
+    def sizeHint(self):
+        if self.image is not None:
+            return self.image.size()
+        return super().sizeHint()
+
+    def paintEvent(self, event):
+        frame = self.ring.read_latest(self.shown_seq)
+        if frame is not None:
+            seq, timestamp, width, height, bytes_per_line, fmt, data = frame
+            self.image = QtGui.QImage(data, width, height, bytes_per_line, QtGui.QImage.Format(fmt))
+            self.image_data = data
+            self.ring.record_shown(seq, self.shown_seq, max(time.time() - timestamp, 0))
+            self.shown_seq = seq
+
+        painter = QtGui.QPainter(self)
+        painter.fillRect(self.rect(), QtCore.Qt.black)
+        if self.image is not None:
+            size = self.image.size().scaled(self.size(), QtCore.Qt.KeepAspectRatio)
+            rect = QtCore.QRect(QtCore.QPoint(0, 0), size)
+            rect.moveCenter(self.rect().center())
+            painter.drawImage(rect, self.image)
+        painter.end()
+
+
+class FrameStreamProxy(WidgetProxy):
+    """Proxy for a FrameView that is fed through a shared memory ring buffer instead of the event queue."""
+
+    SLOTS = WidgetProxy.SLOTS + ['__ring__']
+
+    PROXY_CLASS = FrameView
+    RELEASE_ON_DELETE = True  # The ring is closed with the proxy, so the view must release its mapping
+
+    def __init__(self, width, height, channels=3, slots=3, max_fps=60, loop=None, affinity=None):
+        """Create the ring and the view in the separate process.
+
+        Args:
+            width (int): Largest frame width.
+            height (int): Largest frame height.
+            channels (int)[3]: Bytes per pixel of the largest frame.
+            slots (int)[3]: Number of frame slots in the ring.
+            max_fps (float)[60]: Number of times a second the view checks for a new frame.
+            loop (AppEventLoop/AppEventLoopPool)[None]: Event loop to create the widget with. Default __loop__.
+            affinity (object)[None]: Affinity group used to place the widget when the loop is an AppEventLoopPool.
+        """
+        self.__ring__ = ring = FrameRing(width * height * channels, slots)
+        weakref.finalize(self, ring.close)
+        super().__init__(ring.name, max_fps, loop=loop, affinity=affinity)
+
+    def mp_write_frame(self, frame, fmt=None, width=None, height=None, timestamp=None):
+        """Write a frame for the view to paint. No message is sent. Return the frame's sequence number.
+
+        Args:
+            frame (numpy.ndarray/QImage/bytes): uint8 array with the shape (height, width[, channels]), QImage or
+                bytes with the width, height and fmt.
+            fmt (QImage.Format)[None]: Image format. Default from the array channels or the QImage.
+            width (int)[None]: Width of a bytes frame.
+            height (int)[None]: Height of a bytes frame.
+            timestamp (float)[None]: time.time() when the frame was captured. Default now.
+        """
+        return self.__ring__.write_frame(frame, fmt=fmt, width=width, height=height, timestamp=timestamp)
+
+    def mp_frame_stats(self):
+        """Return the written, shown and dropped frame counts and the display latency from the ring header."""
+        return self.__ring__.stats()
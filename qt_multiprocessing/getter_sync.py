@@ -0,0 +1,131 @@
+"""
+Push changed proxy GETTERS and PROPERTIES values from the separate process to the main process.
+
+Normally a proxy only syncs its values when a proxy event returns to the main process. When a WidgetProxy sets
+PUSH_GETTERS the separate process watches the object instead. Qt properties with a NOTIFY signal mark the object as
+changed. Other values are compared every sync tick. Only changed values are sent back in one GetterSyncEvent per tick,
+so reading a getter in the main process is a dictionary lookup.
+"""
+from mp_event_loop import Event, CacheEvent
+
+
+__all__ = ['GetterSyncEvent', 'WatchedObject', 'watch_object', 'unwatch_object', 'collect_changed_values']
+
+
+WATCHED = {}  # (cache_id, proxy_id): WatchedObject for the objects in this (separate) process
+
+
+def get_notify_signal(obj, name):
+    """Return the bound NOTIFY signal of a Qt property or None."""
+    try:
+        meta = obj.metaObject()
+        index = meta.indexOfProperty(name)
+        if index < 0:
+            return None
+        prop = meta.property(index)
+        if not prop.hasNotifySignal():
+            return None
+        return getattr(obj, bytes(prop.notifySignal().name()).decode())
+    except (AttributeError, RuntimeError, TypeError):
+        return None
+
+
+class WatchedObject(object):
+    """Object in the separate process whose values are pushed to the proxy in the main process."""
+
+    def __init__(self, obj, getters=None, properties=None):
+        """Watch the object.
+
+        Args:
+            obj (object): Object that lives in this process.
+            getters (list)[None]: Method names that are called to get a value.
+            properties (list)[None]: Attribute names.
+        """
+        self.obj = obj
+        self.getters = list(getters or [])
+        self.properties = list(properties or [])
+        self.values = {}
+        self.dirty = True  # Send the initial values
+        self.polled = False
+
+        for name in self.getters + self.properties:
+            signal = get_notify_signal(obj, name)
+            if signal is None:
+                self.polled = True
+            else:
+                signal.connect(self.mark_dirty)
+
+    def mark_dirty(self, *args):
+        self.dirty = True
+
+    def get_values(self):
+        """Return the current values. Raise RuntimeError if the Qt object was deleted."""
+        values = {}
+        for name in self.getters:
+            func = getattr(self.obj, name, None)
+            try:
+                values[name] = func()
+            except RuntimeError:
+                raise
+            except Exception:
+                values[name] = None
+        for name in self.properties:
+            values[name] = getattr(self.obj, name, None)
+        return values
+
+    def changed_values(self):
+        """Return a dictionary of the values that changed since the last call."""
+        if not (self.dirty or self.polled):
+            return {}
+        self.dirty = False
+
+        changed = {}
+        for name, value in self.get_values().items():
+            try:
+                is_same = name in self.values and bool(self.values[name] == value)
+            except Exception:
+                is_same = False
+            if not is_same:
+                self.values[name] = value
+                changed[name] = value
+        return changed
+
+
+def watch_object(cache_id, proxy_id, obj, getters=None, properties=None):
+    """Watch an object in the separate process for the proxy with the given cache_id and proxy_id."""
+    WATCHED[(cache_id, proxy_id)] = WatchedObject(obj, getters, properties)
+
+
+def unwatch_object(cache_id, proxy_id):
+    """Stop watching the object of a proxy."""
+    WATCHED.pop((cache_id, proxy_id), None)
+
+
+def collect_changed_values():
+    """Return {(cache_id, proxy_id): {name: value}} of every changed value of the watched objects."""
+    changed = {}
+    for key, watched in list(WATCHED.items()):
+        try:
+            values = watched.changed_values()
+        except RuntimeError:  # Wrapped C/C++ object has been deleted
+            WATCHED.pop(key, None)
+            continue
+        if values:
+            changed[key] = values
+    return changed
+
+
+class GetterSyncEvent(Event):
+    """Output event with the changed values of the watched objects. The results are applied to the proxies."""
+
+    def __init__(self, changed=None):
+        super().__init__(None, has_output=True)
+        self.results = changed or {}
+
+    def apply(self):
+        """Set the changed values in the proxy dictionaries of the main process."""
+        for (cache_id, proxy_id), values in self.results.items():
+            try:
+                CacheEvent.CACHE[cache_id][proxy_id].update(values)
+            except (KeyError, AttributeError, TypeError):
+                pass
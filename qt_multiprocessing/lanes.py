@@ -0,0 +1,210 @@
+"""
+Priority lanes for the events of the separate process.
+
+Every message is sent with a lane in its envelope header. The separate process reads the event queue into one deque per
+lane and runs the events with a weighted round robin. Higher lanes are served first and every lane gets a share of the
+events in each round, so user triggered calls (show, raise_) do not wait behind thousands of data updates and bulk
+updates are never starved.
+
+Items that touch the same object keep their order across lanes. When the next item of a lane has a key of an older item
+in another lane, the older item runs first, so a high priority call on a variable never runs before the low priority
+event that creates it. The main process sends the keys of each event in its envelope header (get_event_keys) and the
+separate process adds the ids of the existing objects without unpickling the event (resolve_event_keys).
+"""
+import itertools
+import threading
+import contextlib
+from collections import deque
+
+from mp_event_loop import CacheEvent, CacheObjectEvent, SaveVarEvent, Proxy, ProxyEvent
+
+from .compact import MSG_CALL, get_compact_object
+from .batch import BatchEvent
+
+
+__all__ = ['LANES', 'DEFAULT_LANE', 'get_lane', 'ThreadLane', 'CREATE_KEY', 'get_proxy_key', 'get_event_keys',
+           'resolve_event_keys', 'LaneScheduler']
+
+
+LANES = ('interactive', 'normal', 'bulk')  # Highest priority first
+DEFAULT_LANE = 1
+
+
+def get_lane(priority=None):
+    """Return the lane index for a lane name or index. None returns the DEFAULT_LANE."""
+    if priority is None:
+        return DEFAULT_LANE
+    elif isinstance(priority, str):
+        try:
+            return LANES.index(priority)
+        except ValueError:
+            raise ValueError('Invalid priority {}! Use one of {} or a lane index'.format(repr(priority), LANES))
+    return min(max(int(priority), 0), len(LANES) - 1)
+
+
+class ThreadLane(threading.local):
+    """Priority lane of the events that each thread sends."""
+
+    lane = DEFAULT_LANE
+
+    @contextlib.contextmanager
+    def use(self, priority):
+        """Use the given lane name or index for the events of this thread in the with block."""
+        old_lane = self.lane
+        self.lane = get_lane(priority)
+        try:
+            yield self.lane
+        finally:
+            self.lane = old_lane
+
+
+CREATE_KEY = '__create__'  # Key of the events that create variables and of the events whose variable does not exist yet
+
+
+def get_proxy_key(proxy):
+    """Return the key of the object of a proxy. WidgetProxy objects are keyed by the object number of compact calls."""
+    num = vars(proxy).get('__object_num__', None)
+    if num is not None:
+        return 'object', num
+    return 'proxy', proxy.__proxy_id__
+
+
+def get_event_keys(event):
+    """Return the keys of the objects that an event touches in the main process. They are sent in the envelope header.
+
+    Proxy method calls (ProxyEvent and compact calls) are keyed by the proxy and cache events by their variable name or
+    object id. save_variables and cache_object events create variables that are not known before they run, so they have
+    the CREATE_KEY. Events without keys (plain functions) may run in any order. See resolve_event_keys.
+    """
+    if isinstance(event, tuple):
+        if event[0] != MSG_CALL:
+            return ()
+        return ('object', event[1]),
+    elif isinstance(event, BatchEvent):
+        return tuple({key for item in event.get_events() for key in get_event_keys(item)})
+    elif isinstance(event, ProxyEvent):
+        return (get_proxy_key(event.object),) if isinstance(event.object, Proxy) else ()
+    elif not isinstance(event, CacheEvent):
+        return ()
+
+    keys = []
+    if isinstance(event, (SaveVarEvent, CacheObjectEvent)):
+        keys.append(CREATE_KEY)
+    if isinstance(event.object, Proxy):
+        keys.append(get_proxy_key(event.object))
+    if event.object_id is not None:
+        keys.append(('var', event.object_id))
+    return tuple(keys)
+
+
+def resolve_event_keys(keys):
+    """Add the ids of the existing objects to the keys of a message in the separate process without unpickling it.
+
+    A variable and a proxy may be the same object, so the object id orders their events. Variables that do not exist
+    yet add the CREATE_KEY, so the event runs after the events that may create them.
+    """
+    if not keys:
+        return ()
+    resolved = list(keys)
+    for key in keys:
+        if key == CREATE_KEY:
+            continue
+        kind, name = key
+        if kind == 'object':
+            obj = get_compact_object(name)
+        else:
+            obj = CacheEvent.CACHE.get(name, None)
+        if obj is not None:
+            resolved.append(id(obj))
+        elif kind == 'var':
+            resolved.append(CREATE_KEY)
+    return tuple(dict.fromkeys(resolved))
+
+
+class LaneScheduler(object):
+    """Queue of items in priority lanes that are served with a weighted round robin.
+
+    In each round a lane may run as many items as its weight. The highest lane with items and credit is always served
+    first. A new round starts when no lane with items has credit left.
+    """
+
+    def __init__(self, weights=(8, 4, 1)):
+        """Create the lanes.
+
+        Args:
+            weights (tuple)[(8, 4, 1)]: Number of items each lane may run in a round. Highest priority first.
+        """
+        self.weights = tuple(max(int(w), 1) for w in weights)
+        self.lanes = [deque() for _ in self.weights]
+        self.credits = list(self.weights)
+        self.served = [0 for _ in self.weights]  # Number of items that were taken from each lane
+        self.counter = itertools.count()
+        self.keys = {}  # Key: deque of (sequence number, lane) of the queued items with the key
+
+    def put(self, item, lane=DEFAULT_LANE, keys=()):
+        """Add an item to a lane.
+
+        Args:
+            item (object): Item to queue.
+            lane (int)[DEFAULT_LANE]: Lane index.
+            keys (tuple)[()]: Keys of the objects that the item touches. Items with a common key keep their order.
+        """
+        lane = min(max(lane, 0), len(self.lanes) - 1)
+        seq = next(self.counter)
+        for key in keys:
+            self.keys.setdefault(key, deque()).append((seq, lane))
+        self.lanes[lane].append((seq, item, keys))
+
+    def get_blocking_lane(self, index):
+        """Return the lane of the oldest item that must run before the next item of the given lane or None."""
+        seq, _, keys = self.lanes[index][0]
+        older = [self.keys[key][0] for key in keys if self.keys[key][0][0] < seq]
+        if older:
+            return min(older)[1]
+        return None
+
+    def pop(self, index):
+        """Remove and return the next item of a lane after the older items with a common key."""
+        blocking = self.get_blocking_lane(index)
+        while blocking is not None:
+            index = blocking
+            blocking = self.get_blocking_lane(index)
+
+        _, item, keys = self.lanes[index].popleft()
+        self.served[index] += 1
+        for key in keys:
+            que = self.keys[key]
+            que.popleft()
+            if not que:
+                del self.keys[key]
+        return item
+
+    def get(self):
+        """Return the next item. Raise IndexError if every lane is empty."""
+        for _ in range(2):
+            for index, que in enumerate(self.lanes):
+                if que and self.credits[index] > 0:
+                    self.credits[index] -= 1
+                    return self.pop(index)
+            self.credits = list(self.weights)  # New round
+        raise IndexError('get from empty LaneScheduler')
+
+    def mark(self):
+        """Return a mark that is reached when every item that is in the lanes now was taken."""
+        return [served + len(que) for served, que in zip(self.served, self.lanes)]
+
+    def reached(self, mark):
+        """Return True if every item that was in the lanes when the mark was made was taken."""
+        return all(served >= count for served, count in zip(self.served, mark))
+
+    def sizes(self):
+        """Return the number of items in each lane."""
+        return [len(que) for que in self.lanes]
+
+    def clear(self):
+        for que in self.lanes:
+            que.clear()
+        self.keys.clear()
+
+    def __len__(self):
+        return sum(len(que) for que in self.lanes)
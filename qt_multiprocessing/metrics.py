@@ -0,0 +1,242 @@
+"""
+Metrics of the separate Qt process.
+
+The QtEventQueueManager records how long events waited in the queue (enqueue to execute latency), how long each
+target/method took to run, the queue depth, how many events ran every Qt tick, the time between ticks (a busy GUI
+thread makes ticks late) and the output (consumer) queue backlog. Values are recorded into fixed bucket histograms, so
+recording only costs a few additions. A snapshot is periodically pushed to the main process with a StatsEvent.
+
+The main process counts what it sent, coalesced, held and dropped (get_loop_stats) and passes the combined stats to the
+stats handlers every time a snapshot arrives (run_stats_handlers).
+"""
+import os
+import time
+from bisect import bisect_left
+
+from mp_event_loop import Event, Proxy
+
+from .utils import print_exception
+
+from .widget_pool import WIDGET_POOLS
+from .backpressure import get_queue_depth
+
+
+__all__ = ['Histogram', 'ProcessMetrics', 'StatsEvent', 'get_event_name', 'get_process_stats', 'get_queue_size',
+           'get_loop_stats', 'run_stats_handlers']
+
+
+TIME_BOUNDS = tuple(1e-6 * 2 ** i for i in range(27))  # 1 us to ~67 s
+COUNT_BOUNDS = tuple(2 ** i for i in range(21))  # 1 to ~1 million
+MAX_TARGETS = 256  # Maximum number of target names that get their own histogram
+
+
+def get_queue_size(que):
+    """Return the approximate size of a queue or None if it is not supported (macOS)."""
+    try:
+        return que.qsize()
+    except (AttributeError, NotImplementedError, OSError):
+        return None
+
+
+def get_event_name(event):
+    """Return a 'Class.method' name for the target of an event."""
+    obj = getattr(event, 'object', None)
+    if isinstance(obj, Proxy):
+        try:
+            obj = obj.__object__
+        except AttributeError:
+            pass
+
+    method_name = getattr(event, 'method_name', None)
+    if method_name is None:
+        target = getattr(event, 'target', None)
+        if target is None:
+            method_name = type(event).__name__  # Ex: CacheObjectEvent creating the object
+        elif obj is None:
+            return getattr(target, '__qualname__', None) or type(target).__name__
+        else:
+            method_name = getattr(target, '__name__', None) or type(target).__name__
+
+    if obj is None:
+        return str(method_name)
+    return '{}.{}'.format(type(obj).__name__, method_name)
+
+
+class Histogram(object):
+    """Count values in fixed buckets. Each bucket counts the values that are <= its bound."""
+
+    def __init__(self, bounds=TIME_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """Return the bucket bound that contains the given percent of the values or None if nothing was recorded."""
+        if not self.count:
+            return None
+        needed = self.count * percent / 100
+        running = 0
+        for bound, count in zip(self.bounds, self.counts):
+            running += count
+            if running >= needed:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        """Return a summary dictionary of the histogram."""
+        return {'count': self.count, 'total': self.total, 'mean': self.total / self.count if self.count else None,
+                'min': self.min, 'max': self.max,
+                'p50': self.percentile(50), 'p90': self.percentile(90), 'p99': self.percentile(99)}
+
+
+class ProcessMetrics(object):
+    """Counters and histograms that the QtEventQueueManager records in the separate process."""
+
+    def __init__(self):
+        self.startup = {}  # Seconds of each startup phase. This is not cleared by reset.
+        self.reset()
+
+    def reset(self):
+        """Clear all of the recorded values."""
+        self.started = time.time()
+        self.events = 0
+        self.errors = 0
+        self.ticks = 0
+        self.frames = 0
+        self.released = 0
+        self.offloaded = 0
+        self.last_tick = None
+        self.latency = Histogram()
+        self.exec_time = Histogram()
+        self.targets = {}
+        self.events_per_tick = Histogram(COUNT_BOUNDS)
+        self.tick_time = Histogram()
+        self.tick_interval = Histogram()
+        self.queue_depth = Histogram(COUNT_BOUNDS)
+        self.output_backlog = Histogram(COUNT_BOUNDS)
+        self.last_queue_depth = None
+        self.last_output_backlog = None
+        self.lane_depth = {}
+
+    def record_latency(self, sent):
+        """Record the time an event waited in the queue from the send time in the message header."""
+        if sent is not None:
+            self.latency.record(max(time.time() - sent, 0))
+
+    def record_event(self, event, elapsed):
+        """Record the execution time of an event."""
+        self.events += 1
+        if getattr(event, 'error', None) is not None:
+            self.errors += 1
+        self.exec_time.record(elapsed)
+
+        name = get_event_name(event)
+        try:
+            hist = self.targets[name]
+        except KeyError:
+            if len(self.targets) >= MAX_TARGETS:
+                name = '<other>'
+            hist = self.targets.setdefault(name, Histogram())
+        hist.record(elapsed)
+
+    def record_tick(self, start, count, queue_depth=None, output_backlog=None):
+        """Record a Qt tick.
+
+        Args:
+            start (float): time.perf_counter() when the tick started.
+            count (int): Number of events that ran.
+            queue_depth (int)[None]: Size of the event queue when the tick started.
+            output_backlog (int)[None]: Size of the consumer queue when the tick ended.
+        """
+        now = time.perf_counter()
+        self.ticks += 1
+        if self.last_tick is not None:
+            self.tick_interval.record(start - self.last_tick)
+        self.last_tick = start
+        self.last_queue_depth = queue_depth
+        self.last_output_backlog = output_backlog
+        if count:
+            # Idle ticks are not recorded, so they do not hide the backlog
+            self.events_per_tick.record(count)
+            self.tick_time.record(now - start)
+            if queue_depth is not None:
+                self.queue_depth.record(queue_depth)
+            if output_backlog is not None:
+                self.output_backlog.record(output_backlog)
+
+    def snapshot(self, reset=False):
+        """Return a dictionary of the recorded values.
+
+        Args:
+            reset (bool)[False]: If True clear the values after taking the snapshot.
+        """
+        snap = {'pid': os.getpid(), 'time': time.time(), 'uptime': time.time() - self.started,
+                'events': self.events, 'errors': self.errors, 'ticks': self.ticks, 'frames': self.frames,
+                'released': self.released, 'offloaded': self.offloaded,
+                'latency': self.latency.to_dict(),
+                'exec_time': self.exec_time.to_dict(),
+                'targets': {name: hist.to_dict() for name, hist in self.targets.items()},
+                'events_per_tick': self.events_per_tick.to_dict(),
+                'tick_time': self.tick_time.to_dict(),
+                'tick_interval': self.tick_interval.to_dict(),
+                'queue_depth': dict(self.queue_depth.to_dict(), last=self.last_queue_depth),
+                'output_backlog': dict(self.output_backlog.to_dict(), last=self.last_output_backlog),
+                'lane_depth': dict(self.lane_depth),
+                'startup': dict(self.startup),
+                'widget_pools': {cls.__name__: pool.stats() for cls, pool in list(WIDGET_POOLS.items())}}
+        if reset:
+            self.reset()
+        return snap
+
+
+PROCESS_METRICS = ProcessMetrics()  # Metrics of this (separate) process
+
+
+def get_process_stats(reset=False):
+    """Return a snapshot of the metrics of the separate process. Run this as an event to query the process."""
+    return PROCESS_METRICS.snapshot(reset=reset)
+
+
+class StatsEvent(Event):
+    """Output event with a metrics snapshot that the separate process pushes to the main process."""
+
+    def __init__(self, snapshot=None):
+        super().__init__(None, has_output=True)
+        self.results = snapshot
+
+
+def get_loop_stats(loop):
+    """Return the metrics of the main process of an AppEventLoop.
+
+    Returns:
+        stats (dict): {'sent', 'coalesced', 'pending', 'held', 'dropped', 'overflow', 'startup', 'released',
+            'dispatched', 'futures', 'queue_depth', 'output_backlog', 'payloads'}
+    """
+    return {'sent': loop.sent_count, 'coalesced': loop.coalesced_count, 'pending': len(loop._pending),
+            'held': len(loop._held), 'dropped': loop.dropped_count, 'overflow': loop.overflow_count,
+            'startup': dict(loop.startup), 'released': loop.released_count,
+            'dispatched': loop.dispatcher.dispatched if loop.dispatcher is not None else None,
+            'futures': len(loop.futures), 'queue_depth': get_queue_depth(loop.event_queue),
+            'output_backlog': get_queue_size(loop.consumer_queue) if loop.consumer_queue is not None else None,
+            'payloads': loop.payloads.stats() if loop.payloads is not None else None}
+
+
+def run_stats_handlers(handlers, stats):
+    """Call every stats handler with the stats. A failing handler does not stop the others."""
+    for handler in handlers:
+        try:
+            handler(stats)
+        except Exception as err:
+            print_exception(err, 'Stats handler failed!')
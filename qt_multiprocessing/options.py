@@ -0,0 +1,123 @@
+"""
+Options of the event loops.
+
+AppEventLoop, AppEventLoopPool and MpApplication take the same keyword options. LOOP_OPTIONS has every option with its
+default value. get_loop_options validates the given options and returns one dictionary with every option, so the event
+loops do not forward each option by hand.
+
+The PROCESS_OPTIONS configure the QtEventQueueManager in the separate process. A warm process is only adopted by an
+event loop with the same process options.
+"""
+from .lanes import LANES
+from .backpressure import get_overflow_policy
+from .dispatcher import OUTPUT_DISPATCH
+
+
+__all__ = ['LOOP_OPTIONS', 'PROCESS_OPTIONS', 'WAKEUPS', 'get_loop_options']
+
+
+LOOP_OPTIONS = {
+    # Separate process
+    'max_events': 1,
+    'time_budget': None,
+    'wakeup': 'timer',
+    'poll_interval': 0.1,
+    'lane_weights': (8, 4, 1),
+    'frame_rate': None,
+    'max_cached_vars': None,
+    'worker_threads': 2,
+    'stats_interval': None,
+    'trace': False,
+
+    # Startup
+    'preload': None,
+    'keep_warm': False,
+    'transport': None,
+
+    # Sending
+    'coalesce': False,
+    'shared_memory_threshold': None,
+    'payload_threshold': None,
+    'max_payloads': 256,
+    'max_queue_size': None,
+    'overflow': 'block',
+    'block_timeout': None,
+
+    # Output
+    'output_dispatch': 'thread',
+}
+
+PROCESS_OPTIONS = ('max_events', 'time_budget', 'wakeup', 'poll_interval', 'stats_interval', 'lane_weights',
+                   'frame_rate', 'preload', 'max_cached_vars', 'worker_threads', 'trace')
+
+WAKEUPS = ('timer', 'notifier')
+
+
+def get_loop_options(**options):
+    """Return a dictionary with every event loop option. Options that are not given have their default value.
+
+    Args:
+        max_events (int)[1]: Maximum number of events the separate process runs every Qt tick. None or 0 drains the
+            queue every tick.
+        time_budget (float)[None]: Seconds the separate process may spend running events every Qt tick (0.008 keeps
+            ~120 ticks a second). None for no time limit.
+        wakeup (str)['timer']: How the separate process finds new events. 'timer' checks the queue every time Qt is
+            idle. 'notifier' sleeps until the queue's pipe is readable with a QSocketNotifier.
+        poll_interval (float)[0.1]: Seconds between alive checks when using the 'notifier' wakeup.
+        lane_weights (tuple)[(8, 4, 1)]: Events the 'interactive', 'normal' and 'bulk' priority lanes may run in each
+            round of the separate process. Higher lanes run first. Lower lanes are never starved.
+        frame_rate (float)[None]: Frames per second of the separate process (60). Windows that events change are
+            repainted once on the next frame instead of after every event. None repaints after every event.
+        max_cached_vars (int)[None]: Maximum number of saved variables in the separate process. The least recently
+            used variables are released. None keeps every variable.
+        worker_threads (int)[2]: Number of threads in the separate process that run GUI free events (gui_free targets
+            and add_event(..., gui_free=True)). None or 0 runs them on the GUI thread.
+        stats_interval (float)[None]: Seconds between the metrics snapshots that the separate process pushes to
+            stats() and the stats handlers. None only updates the metrics with stats(refresh=True).
+        trace (bool)[False]: If True trace the lifecycle of every event across both processes. See export_trace.
+        preload (list)[None]: Module names to import in the separate process before it runs events (Modules with
+            PROXY_CLASS widgets). Warm processes are only adopted by event loops with the same preload list.
+        keep_warm (bool)[False]: After adopting a warm process start a new warm process for the next start.
+        transport (str/SocketTransport)[None]: Address of a remote runner ('tcp://host:port' or 'unix:///path') or a
+            transport object. The separate process runs in the runner instead of a local multiprocessing.Process.
+            None uses multiprocessing queues. See transport.
+        coalesce (bool)[False]: Default for add_var_event. If True only the latest call for a variable name and method
+            is sent when the same call is made again before the pending calls are flushed.
+        shared_memory_threshold (int)[None]: Bytes, numpy arrays and other buffer arguments with at least this many
+            bytes are sent with reusable shared memory segments instead of being pickled. None disables this.
+        payload_threshold (int)[None]: Registered objects, save_variables and cache_object arguments and proxy
+            creation arguments that measure at least this many bytes are sent once. Repeated registrations of the same
+            content send a reference to the content hash. None disables this.
+        max_payloads (int)[256]: Number of payloads that the separate process keeps for references.
+        max_queue_size (int)[None]: Maximum number of messages that are queued or running in the separate process.
+            None does not limit the queue.
+        overflow (str)['block']: What to do with a new message when the queue is full. 'block', 'raise',
+            'drop_oldest', 'drop_newest' or 'coalesce'. See backpressure.
+        block_timeout (float)[None]: Seconds the 'block' overflow waits before raising queue.Full. None waits until
+            there is room.
+        output_dispatch (str)['thread']: 'thread' handles the output events in a consumer thread. 'qt' drains the
+            output queue on the Qt thread that starts the event loop with a QSocketNotifier in batches. 'qt' falls
+            back to 'thread' if that thread does not have a QApplication.
+
+    Raises:
+        TypeError: If an option is not known.
+        ValueError: If the wakeup, overflow, output_dispatch or lane_weights value is not valid.
+    """
+    unknown = [name for name in options if name not in LOOP_OPTIONS]
+    if unknown:
+        raise TypeError('Invalid event loop option {}! Use one of {}'.format(repr(unknown[0]), tuple(LOOP_OPTIONS)))
+
+    opts = dict(LOOP_OPTIONS)
+    opts.update(options)
+    if opts['wakeup'] not in WAKEUPS:
+        raise ValueError('Invalid wakeup {}! Use one of {}'.format(repr(opts['wakeup']), WAKEUPS))
+    if opts['output_dispatch'] not in OUTPUT_DISPATCH:
+        raise ValueError('Invalid output_dispatch {}! Use one of {}'.format(repr(opts['output_dispatch']),
+                                                                             OUTPUT_DISPATCH))
+    if len(opts['lane_weights']) != len(LANES):
+        raise ValueError('Invalid lane_weights {}! Give a weight for each lane {}'.format(repr(opts['lane_weights']),
+                                                                                          LANES))
+    opts['overflow'] = get_overflow_policy(opts['overflow'])
+    opts['lane_weights'] = tuple(opts['lane_weights'])
+    opts['preload'] = tuple(opts['preload'] or ())
+    return opts
@@ -0,0 +1,199 @@
+"""
+Content hashed registration payloads.
+
+Registering objects (CacheEvent registrations, save_variables and mp_cache_object arguments, WidgetProxy creation
+arguments) pickles them into every event that registers them. Apps that rebuild panels send the same large payloads
+again and again. A PayloadCache measures each registration payload without pickling it (the length of bytes, strings
+and buffers and the item count of containers). Payloads with at least threshold bytes are pickled once when the event
+is sent and wrapped in a HashedPayload with the content hash of the pickled bytes. Small payloads are sent as they are.
+
+A HashedPayload pickles to load_payload(digest, data) the first time it is pickled for a queue and to
+load_payload(digest) afterwards. The separate process stores the bytes by digest and unpickles a new object from the
+stored bytes for a reference, so a repeated registration is the same as sending the payload again.
+
+The sent digests are kept for each pickling thread, which is the feeder thread of the event queue, and are cleared when
+a new separate process starts. Both sides keep the max_payloads most recently used digests in the same order, so the
+separate process evicts a payload exactly when the main process would send it again.
+"""
+import pickle
+import hashlib
+import weakref
+import threading
+from collections import OrderedDict
+
+from mp_event_loop import Proxy, CacheObjectEvent, SaveVarEvent
+
+from .shared_buffer import SharedBuffer
+
+
+__all__ = ['HashedPayload', 'PayloadCache', 'load_payload', 'get_buffer_size', 'get_payload_size']
+
+
+PAYLOAD_STORE = OrderedDict()  # Digest: pickled bytes of the payloads in this (separate) process
+
+ITEM_SIZE = 8  # Estimated pickled size of an object that is not a buffer
+MAX_ITEMS = 16  # Containers with at most this many items also count the buffers of their items
+BUFFER_TYPES = (bytes, bytearray, str)
+CONTAINER_TYPES = (tuple, list, set, frozenset, dict)
+
+
+def get_buffer_size(obj):
+    """Return the number of bytes of bytes, strings and buffers (memoryview, numpy arrays) or None."""
+    if isinstance(obj, BUFFER_TYPES):
+        return len(obj)
+    elif isinstance(obj, memoryview) or hasattr(type(obj), 'nbytes'):  # numpy arrays
+        return obj.nbytes
+    return None
+
+
+def get_payload_size(obj):
+    """Return a cheap estimate of the pickled size of an object without pickling it.
+
+    Bytes, strings and buffers count their length in bytes. Tuples, lists, sets and dicts count their items. Small
+    containers (MAX_ITEMS) also count the buffers of their items, so a settings dict holding an image is large.
+    """
+    size = get_buffer_size(obj)
+    if size is not None:
+        return size
+    elif not isinstance(obj, CONTAINER_TYPES):
+        return ITEM_SIZE
+
+    size = ITEM_SIZE * len(obj)
+    if len(obj) <= MAX_ITEMS:
+        for item in (obj.values() if isinstance(obj, dict) else obj):
+            if isinstance(item, CONTAINER_TYPES):
+                size += ITEM_SIZE * len(item)
+            else:
+                size += get_buffer_size(item) or 0
+    return size
+
+
+def load_payload(digest, data=None, max_payloads=None):
+    """Unpickle a payload in the separate process. Store the bytes if they were sent or use the stored bytes.
+
+    Args:
+        digest (bytes): Content hash of the pickled payload.
+        data (bytes)[None]: Pickled payload. None for a reference to a payload that was sent before.
+        max_payloads (int)[None]: Number of payloads to keep. The least recently used payloads are evicted.
+    """
+    if data is None:
+        try:
+            data = PAYLOAD_STORE[digest]
+        except KeyError:
+            raise KeyError('Payload {} was not sent to this process!'.format(digest.hex())) from None
+        PAYLOAD_STORE.move_to_end(digest)
+    else:
+        PAYLOAD_STORE[digest] = data
+        PAYLOAD_STORE.move_to_end(digest)
+        while max_payloads and len(PAYLOAD_STORE) > max_payloads:
+            PAYLOAD_STORE.popitem(last=False)
+    return pickle.loads(data)
+
+
+class HashedPayload(object):
+    """Pickled payload that is sent once and referenced by its content hash afterwards."""
+
+    __slots__ = ('data', 'digest', 'cache')
+
+    def __init__(self, data, cache):
+        """Create the payload.
+
+        Args:
+            data (bytes): Pickled object.
+            cache (PayloadCache): Cache that knows which payloads were sent.
+        """
+        self.data = data
+        self.digest = hashlib.blake2b(data, digest_size=16).digest()
+        self.cache = cache
+
+    def __reduce__(self):
+        if self.cache.is_sent(self):
+            return load_payload, (self.digest,)
+        return load_payload, (self.digest, self.data, self.cache.max_payloads)
+
+    def __repr__(self):
+        return '<{} {} nbytes={}>'.format(self.__class__.__name__, self.digest.hex(), len(self.data))
+
+
+class PayloadCache(object):
+    """Wrap the large registration payloads of events in HashedPayloads in the main process."""
+
+    def __init__(self, threshold=4096, max_payloads=256):
+        """Create the cache.
+
+        Args:
+            threshold (int)[4096]: Payloads that measure at least this many bytes are sent once and referenced.
+            max_payloads (int)[256]: Number of payloads that the separate process keeps.
+        """
+        self.threshold = threshold
+        self.max_payloads = max_payloads
+        self.sent = weakref.WeakKeyDictionary()  # Pickling thread: OrderedDict of the digests that were sent
+        self.lock = threading.Lock()
+        self.sent_count = 0
+        self.referenced_count = 0
+        self.saved_bytes = 0
+
+    def is_sent(self, payload):
+        """Return if the payload was sent by the current pickling thread. Mark it as sent otherwise."""
+        thread = threading.current_thread()
+        with self.lock:
+            try:
+                sent = self.sent[thread]
+            except KeyError:
+                sent = self.sent[thread] = OrderedDict()
+
+            if payload.digest in sent:
+                sent.move_to_end(payload.digest)
+                self.referenced_count += 1
+                self.saved_bytes += len(payload.data)
+                return True
+
+            sent[payload.digest] = None
+            while len(sent) > self.max_payloads:
+                sent.popitem(last=False)
+            self.sent_count += 1
+            return False
+
+    def clear(self):
+        """Forget the sent payloads. Call this when a new separate process is started."""
+        with self.lock:
+            self.sent.clear()
+
+    def stats(self):
+        return {'sent': self.sent_count, 'referenced': self.referenced_count, 'saved_bytes': self.saved_bytes}
+
+    def share(self, obj):
+        """Return a HashedPayload for a large object or the object. SharedBuffer handles are never stored.
+
+        Only objects that measure at least threshold bytes with get_payload_size are pickled here.
+        """
+        if obj is None or isinstance(obj, (HashedPayload, SharedBuffer)):
+            return obj
+        if get_payload_size(obj) < self.threshold:
+            return obj
+        try:
+            data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return obj  # The queue reports the error
+        if len(data) < self.threshold:
+            return obj
+        return HashedPayload(data, self)
+
+    def share_args(self, args, kwargs):
+        return tuple(self.share(arg) for arg in args), {key: self.share(val) for key, val in kwargs.items()}
+
+    def share_event(self, event):
+        """Wrap the registered objects, the creation arguments of registered proxies and the arguments of
+        save_variables and cache_object events.
+        """
+        for item in getattr(event, 'register', None) or ():
+            obj = item[1]
+            if isinstance(obj, Proxy):
+                if obj.is_mp_proxy() and (obj.__args__ or obj.__kwargs__):
+                    obj.__args__, obj.__kwargs__ = self.share_args(obj.__args__, obj.__kwargs__)
+            else:
+                item[1] = self.share(obj)
+
+        if isinstance(event, (SaveVarEvent, CacheObjectEvent)):
+            event.args, event.kwargs = self.share_args(event.args, event.kwargs)
+        return event
@@ -0,0 +1,138 @@
+"""
+Pre-warmed separate processes.
+
+Starting an event loop spawns a process that imports the Qt bindings and the PROXY_CLASS modules and creates a
+QApplication before the first event runs. A warm process does all of this ahead of time and waits. When an event loop
+with the same process options starts it adopts the warm process (queues, alive event and process) instead of spawning
+a new one, so the first remote widget is created almost immediately.
+
+.. code-block:: python
+
+    if __name__ == '__main__':
+        qt_multiprocessing.prewarm(preload=['my_widgets'])  # Warm up while the main window is built
+
+        with qt_multiprocessing.MpApplication(preload=['my_widgets']) as app:  # Adopts the warm process
+            ...
+"""
+import time
+import atexit
+import importlib
+import threading
+import multiprocessing as mp
+
+from .backpressure import CountedQueue
+
+
+__all__ = ['WarmProcess', 'preload_modules', 'take_warm_process', 'close_warm_processes', 'prewarm']
+
+
+WARM_PROCESSES = []  # Started WarmProcess objects that were not adopted yet
+WARM_LOCK = threading.Lock()
+
+
+def preload_modules(modules=None):
+    """Import the modules and return {module name: seconds to import}."""
+    timings = {}
+    for name in modules or []:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+class WarmProcess(object):
+    """Separate process that is started ahead of time and handed to the first event loop with the same options."""
+
+    alive_event_class = mp.Event
+    queue_class = CountedQueue
+    event_loop_class = mp.Process
+
+    def __init__(self, target, options=None):
+        """Create the process.
+
+        Args:
+            target (function): Function that runs the event loop (AppEventLoop.run_event_loop).
+            options (dict)[None]: Process options (AppEventLoop.get_process_options) including the preload list.
+        """
+        self.target = target
+        self.options = dict(options or {})
+        self.alive_event = self.alive_event_class()
+        self.event_queue = self.queue_class()
+        self.consumer_queue = self.queue_class()
+        self.event_process = None
+        self.started = None
+
+    def start(self):
+        self.alive_event.set()
+        self.started = time.time()
+        self.event_process = self.event_loop_class(name='WarmEventLoop', target=self.target,
+                                                   args=(self.alive_event, self.event_queue, self.consumer_queue),
+                                                   kwargs=self.options)
+        self.event_process.daemon = True
+        self.event_process.start()
+
+    def is_alive(self):
+        try:
+            return self.alive_event.is_set() and self.event_process.is_alive()
+        except AttributeError:
+            return False
+
+    def matches(self, target, options):
+        """Return True if an event loop with the run function and process options can adopt this process."""
+        return self.target == target and self.options == options and self.is_alive()
+
+    def close(self, timeout=2):
+        """Stop the process if it was never adopted."""
+        try:
+            self.alive_event.clear()
+            self.event_process.join(timeout)
+        except (AttributeError, AssertionError):
+            pass
+
+
+def take_warm_process(target, options):
+    """Remove and return a warm process that matches the run function and process options or None."""
+    with WARM_LOCK:
+        for warm in list(WARM_PROCESSES):
+            if warm.matches(target, options):
+                WARM_PROCESSES.remove(warm)
+                return warm
+            elif not warm.is_alive():
+                WARM_PROCESSES.remove(warm)
+    return None
+
+
+def add_warm_process(target, options):
+    """Start a warm process and save it to be adopted. Return the WarmProcess."""
+    warm = WarmProcess(target, options)
+    warm.start()
+    with WARM_LOCK:
+        WARM_PROCESSES.append(warm)
+    return warm
+
+
+@atexit.register
+def close_warm_processes():
+    """Stop all of the warm processes that were never adopted."""
+    with WARM_LOCK:
+        warm_processes = list(WARM_PROCESSES)
+        WARM_PROCESSES.clear()
+    for warm in warm_processes:
+        warm.close()
+
+
+def prewarm(preload=None, count=1, **options):
+    """Start warm processes for the event loops that are created later with the same options.
+
+    Args:
+        preload (list)[None]: Module names to import in the warm process (Modules with PROXY_CLASS widgets).
+        count (int)[1]: Number of warm processes. An AppEventLoopPool adopts one for each process.
+        **options (dict): AppEventLoop keyword arguments that the event loops will use (max_events, wakeup, ...).
+
+    Returns:
+        warm_processes (list): Started WarmProcess objects.
+    """
+    from .qt_mp_event_loop import AppEventLoop
+
+    loop = AppEventLoop(preload=preload, **options)
+    return loop.prewarm(count)
@@ -1,10 +1,73 @@
-from queue import Empty
+import os
+import time
+import itertools
+import functools
+import threading
+import contextlib
+from collections import OrderedDict
+from queue import Empty, Full
 from qtpy import QtWidgets, QtCore
 
-from mp_event_loop import Event, CacheEvent, mark_task_done, process_event, EventLoop
+from mp_event_loop import Event, CacheEvent, CacheObjectEvent, VarEvent, SaveVarEvent, Proxy, mark_task_done, \
+    EventLoop
 
+from .utils import print_exception
 
-__all__ = ['QtEventQueueManager', 'AppEventLoop']
+from .shared_buffer import SharedBufferPool, map_shared_buffers, release_shared_buffers
+from .getter_sync import GetterSyncEvent, collect_changed_values
+from .compact import read_message, get_message_args, get_compact_object, make_envelope, open_envelope, MSG_RELEASE, \
+    is_release_message, LazyMessage, load_message
+from .metrics import PROCESS_METRICS, StatsEvent, get_queue_size, get_process_stats, get_loop_stats, \
+    run_stats_handlers
+from .batch import BatchEvent, bind_cached_event
+from .lanes import LANES, DEFAULT_LANE, LaneScheduler, ThreadLane, get_lane, get_event_keys, resolve_event_keys
+from .options import PROCESS_OPTIONS, get_loop_options
+from .backpressure import CountedQueue, get_queue_depth, wait_for_room, get_coalesce_key
+from .prewarm import preload_modules, take_warm_process, add_warm_process
+from .widget_pool import refill_widget_pools
+from .worker_pool import WorkerEvent, WorkerPool, is_gui_free
+from .payload_cache import PayloadCache
+from .transport import get_transport
+from .tracing import PROCESS_TRACE, TraceEvent, EventTracer, get_trace_time, take_trace_records
+from .release import track_proxy, release_objects, VariableLRU
+from .dispatcher import OutputDispatcher, OutputRouter
+from .signal_forward import FORWARDED, CONNECTION_IDS, SignalBatchEvent, forward_signal, unforward_signal, \
+    collect_signal_emissions, get_signal_policy
+
+
+__all__ = ['get_queue_fileno', 'get_event_window', 'QtEventQueueManager', 'AppEventLoop']
+
+
+def get_queue_fileno(que):
+    """Return the file descriptor that becomes readable when the queue has data or None if it cannot be watched.
+
+    Note:
+        Windows multiprocessing pipes are not sockets, so they cannot be watched with a QSocketNotifier.
+    """
+    try:
+        return que.fileno()
+    except (AttributeError, OSError, ValueError):
+        pass
+    if os.name == 'nt':
+        return None
+    try:
+        return que._reader.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def get_event_window(event):
+    """Return the top level window of the widget that the event targets in the separate process or None."""
+    if isinstance(event, tuple):
+        obj = get_compact_object(event[1])
+    else:
+        obj = getattr(event, 'object', None)
+    if isinstance(obj, Proxy):
+        obj = obj.__object__
+    try:
+        return obj.window()
+    except (AttributeError, RuntimeError, TypeError):
+        return None
 
 
 class QtEventQueueManager(object):
@@ -13,36 +76,385 @@ class QtEventQueueManager(object):
     Note:
         A thread does not allow widgets to be created and causes possible thread safety issues.
     """
-    def __init__(self, alive_event, event_queue, consumer_queue=None, app=None):
+    def __init__(self, alive_event, event_queue, consumer_queue=None, app=None, max_events=1, time_budget=None,
+                 wakeup='timer', poll_interval=0.1, sync_interval=0.05, stats_interval=None, metrics=None,
+                 lane_weights=(8, 4, 1), max_buffered=64, frame_rate=None, max_cached_vars=None,
+                 worker_threads=2, trace=False, has_results=True):
+        """Create the event manager.
+
+        Args:
+            alive_event (multiprocessing.Event): Event to signal when to quit the application.
+            event_queue (multiprocessing.Queue/multiprocessing.JoinableQueue): Queue to get and run events with.
+            consumer_queue (multiprocessing.Queue/multiprocessing.JoinableQueue)[None]: Output queue of events.
+            app (QtWidgets.QApplication)[None]: Application to quit when the alive_event is cleared.
+            max_events (int)[1]: Maximum number of events to run every Qt tick. None or 0 drains the queue.
+            time_budget (float)[None]: Seconds allowed to run events every Qt tick. None for no time limit.
+            wakeup (str)['timer']: 'timer' checks the queue every time Qt is idle. 'notifier' sleeps until the queue's
+                pipe is readable. 'notifier' falls back to 'timer' if the queue cannot be watched.
+            poll_interval (float)[0.1]: Seconds between alive and queue checks when using the 'notifier' wakeup.
+            sync_interval (float)[0.05]: Seconds between checks of the PUSH_GETTERS values of proxy objects.
+            stats_interval (float)[None]: Seconds between metrics snapshots that are pushed to the main process.
+                None does not push snapshots.
+            metrics (ProcessMetrics)[None]: Object that records the metrics. Default is this process' metrics.
+            lane_weights (tuple)[(8, 4, 1)]: Events each priority lane may run in a round. Highest priority first.
+            max_buffered (int)[64]: Maximum number of messages that are read ahead off of the queue into the lanes.
+                The lanes keep the pickled events. An event is unpickled right before it runs.
+            frame_rate (float)[None]: Frames per second. If given the windows that events change are not repainted
+                until the next frame, so each window repaints at most once a frame. None repaints after every event.
+            max_cached_vars (int)[None]: Maximum number of saved variables. The least recently used variables are
+                released. None keeps every variable.
+            worker_threads (int)[2]: Number of threads that run the GUI free events. None or 0 runs them on the GUI
+                thread.
+            trace (bool)[False]: If True record when each event was read, run and finished for the trace of the main
+                process.
+            has_results (bool)[True]: If False the main process does not read the consumer queue, so nothing is put
+                on it.
+        """
+        if not has_results:
+            consumer_queue = None  # Nothing reads the queue. Messages would fill the pipe and block the close.
+
         self.alive_event = alive_event
         self.event_queue = event_queue
         self.consumer_queue = consumer_queue
         self.app = app
+        self.max_events = max_events
+        self.time_budget = time_budget
+        self.wakeup = wakeup
+        self.poll_interval = poll_interval
+        self.metrics = metrics or PROCESS_METRICS
+        self.lanes = LaneScheduler(lane_weights)
+        self.max_buffered = max_buffered
+
+        # Released proxies. A release runs after the events that were queued before it.
+        self.releases = []  # (lanes mark, items)
+        self.var_lru = None
+        if max_cached_vars:
+            self.var_lru = VariableLRU(max_cached_vars)
+
+        # Event lifecycle tracing. The records are pushed with the metrics.
+        self.tracer = PROCESS_TRACE if trace else None
+
+        # GUI free events run on worker threads. Their results are applied on this thread.
+        self.workers = None
+        if worker_threads:
+            self.workers = WorkerPool(worker_threads)
 
         self.event_mngr = QtCore.QTimer()
         self.event_mngr.setInterval(0)  # Run when Qt event loop is idle (This may consume too much processing
-        self.event_mngr.timeout.connect(self.process_single_event)
+        self.event_mngr.timeout.connect(self.process_events)
+
+        # Push changed proxy values to the main process. Values are also checked after events run.
+        self.sync_timer = QtCore.QTimer()
+        self.sync_timer.setInterval(int(sync_interval * 1000))
+        self.sync_timer.timeout.connect(self.sync_getters)
+        self.sync_timer.timeout.connect(self.forward_signals)
+
+        self.stats_timer = None
+        if stats_interval:
+            self.stats_timer = QtCore.QTimer()
+            self.stats_timer.setInterval(int(stats_interval * 1000))
+            self.stats_timer.timeout.connect(self.push_stats)
+
+        # Frame pacing. Windows that events change stay suspended until the next frame.
+        self.frame_timer = None
+        self.frame_windows = []
+        if frame_rate:
+            self.frame_timer = QtCore.QTimer()
+            self.frame_timer.setTimerType(QtCore.Qt.PreciseTimer)
+            self.frame_timer.setInterval(max(int(round(1000 / frame_rate)), 1))
+            self.frame_timer.timeout.connect(self.render_frame)
+
+        # Sleep until the queue has data. The timer only checks the alive_event and anything that was missed.
+        self.notifier = None
+        fileno = None
+        if wakeup == 'notifier':
+            fileno = get_queue_fileno(event_queue)
+        if fileno is not None:
+            self.notifier = QtCore.QSocketNotifier(fileno, QtCore.QSocketNotifier.Read)
+            self.notifier.setEnabled(False)
+            self.notifier.activated.connect(lambda *args: self.process_events())
+            self.event_mngr.setInterval(int(poll_interval * 1000))
+
+    def quit_app(self):
+        """Quit the application, because the alive_event was cleared."""
+        if self.app:
+            try:
+                self.app.quit()
+            except (AttributeError, RuntimeError):
+                pass
+
+    @staticmethod
+    def suspend_updates(window, suspended):
+        """Disable the updates of a window and add it to the suspended list if it is not suspended yet."""
+        try:
+            if window is not None and window not in suspended and window.updatesEnabled():
+                window.setUpdatesEnabled(False)
+                suspended.append(window)
+        except RuntimeError:
+            pass
+
+    @staticmethod
+    def resume_updates(suspended):
+        """Enable the updates of the suspended windows and repaint each window once.
+
+        Note:
+            The repaint is immediate. A window that was shown while its updates were disabled is never painted by the
+            update() that setUpdatesEnabled(True) schedules.
+        """
+        for window in suspended:
+            try:
+                window.setUpdatesEnabled(True)
+                if window.isVisible():
+                    window.repaint()
+            except RuntimeError:
+                pass
+
+    def render_frame(self):
+        """Repaint the windows that were changed since the last frame."""
+        if self.frame_windows:
+            suspended, self.frame_windows = self.frame_windows, []
+            self.resume_updates(suspended)
+            self.metrics.frames += 1
+
+    def run_batch(self, batch):
+        """Run all of the events in a batch with the updates of the affected windows suspended."""
+        suspended = self.frame_windows if self.frame_timer is not None else []
+        try:
+            for event in batch.get_events():
+                bind_cached_event(event)
+                self.suspend_updates(get_event_window(event), suspended)
+                self.run_event(event)
+        finally:
+            if self.frame_timer is None:
+                self.resume_updates(suspended)
+
+    def run_event(self, event):
+        """Execute the event and put it on the consumer queue if it has output.
+
+        Shared memory arguments are mapped while the event runs and released for reuse when it completes.
+        """
+        if isinstance(event, tuple):
+            event = read_message(event)  # Compact call
+
+        if isinstance(event, BatchEvent):
+            self.run_batch(event)
+        elif isinstance(event, Event):
+            window = None
+            if self.frame_timer is not None:
+                # Frame paced. The window repaints on the next frame.
+                window = get_event_window(event)
+                self.suspend_updates(window, self.frame_windows)
+
+            saved_names = None
+            if self.var_lru is not None:
+                if isinstance(event, SaveVarEvent):
+                    saved_names = set(event.cache)
+                elif isinstance(event, VarEvent):
+                    self.var_lru.touch(event.cache, event.object_id)
+
+            handles = map_shared_buffers(event)
+            start = time.perf_counter()
+            try:
+                event.exec_()
+            finally:
+                release_shared_buffers(event, handles)
+            if isinstance(event, WorkerEvent):
+                event.apply_results()
+            self.metrics.record_event(event, time.perf_counter() - start)
+
+            if saved_names is not None:
+                self.var_lru.add(event.cache, [name for name in event.cache if name not in saved_names])
+
+            if self.frame_timer is not None and window is None:
+                self.suspend_updates(get_event_window(event), self.frame_windows)  # Ex: created a widget
+
+            if self.consumer_queue and event.has_output:
+                self.consumer_queue.put(event)
+
+    def fill_lanes(self, deadline=None):
+        """Read the waiting messages off of the queue into the priority lanes.
+
+        Args:
+            deadline (float)[None]: time.perf_counter() time to stop reading at (The time budget of the tick).
+        """
+        while len(self.lanes) < self.max_buffered:
+            try:
+                header, event = open_envelope(self.event_queue.get_nowait())
+            except Empty:
+                break
+            except Exception as err:
+                print_exception(err, 'Could not read a message')
+                mark_task_done(self.event_queue)
+                continue
+            if self.tracer is not None:
+                header['dequeued'] = time.perf_counter()
+            if is_release_message(event):
+                self.releases.append((self.lanes.mark(), event[1]))
+            else:
+                self.lanes.put((header, event), header.get('lane', DEFAULT_LANE),
+                               resolve_event_keys(header.get('keys', None)))
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+    def run_releases(self):
+        """Release the objects of garbage collected proxies after the events that were queued before the release."""
+        while self.releases and self.lanes.reached(self.releases[0][0]):
+            items = self.releases.pop(0)[1]
+            try:
+                self.metrics.released += release_objects(items)
+            except Exception as err:
+                print_exception(err, 'Could not release the proxy objects')
+            finally:
+                mark_task_done(self.event_queue)
+
+    def run_next_event(self):
+        """Execute the next event of the highest priority lane. Raise Empty if there are no events."""
+        if not self.lanes:
+            self.fill_lanes()
+        try:
+            header, event = self.lanes.get()
+        except IndexError:
+            raise Empty
+        self.metrics.record_latency(header.get('sent', None))
+        try:
+            event = load_message(event)
+        except Exception as err:
+            # The event could not be unpickled (Ex: a payload reference that was never sent)
+            print_exception(err, 'Could not read an event')
+            mark_task_done(self.event_queue)
+            return
+        if self.workers is not None and is_gui_free(event):
+            self.submit_worker_event(event)  # The task is done when the results are applied
+            return
+        start = time.perf_counter()
+        try:
+            self.run_event(event)
+        finally:
+            mark_task_done(self.event_queue)
+            if self.tracer is not None:
+                self.tracer.add_event(header, event, start, time.perf_counter())
+
+    def submit_worker_event(self, event):
+        """Run a GUI free event on a worker thread. Shared memory is mapped on this thread."""
+        handles = map_shared_buffers(event)
+        self.workers.submit(event, handles)
+        self.metrics.offloaded += 1
+
+    def apply_worker_results(self):
+        """Apply the results of the finished GUI free events on this thread and send their output.
+
+        Returns:
+            count (int): Number of finished events.
+        """
+        finished = self.workers.take_finished()
+        for event, elapsed, handles in finished:
+            try:
+                release_shared_buffers(event, handles)
+                if isinstance(event, WorkerEvent):
+                    event.apply_results()
+                self.metrics.record_event(event, elapsed)
+                if self.consumer_queue and event.has_output:
+                    self.consumer_queue.put(event)
+            except Exception as err:
+                print_exception(err, 'Could not apply the results of a worker event')
+            finally:
+                mark_task_done(self.event_queue)
+        return len(finished)
 
     def process_single_event(self):
         """Get a single event off of the queue and execute it."""
         if self.alive_event.is_set():
             try:
-                event = self.event_queue.get_nowait()
-                try:
-                    process_event(event, consumer_queue=self.consumer_queue)
-                finally:
-                    mark_task_done(self.event_queue)
+                self.run_next_event()
             except Empty:
                 pass
+        else:
+            self.quit_app()
+
+    def process_events(self):
+        """Execute events until the queue is empty, max_events is reached, or the time_budget runs out.
 
-        elif self.app:
+        Returns:
+            count (int): Number of events that were executed.
+        """
+        if not self.alive_event.is_set():
+            self.quit_app()
+            return 0
+
+        max_events = self.max_events
+        start = time.perf_counter()
+        deadline = None
+        if self.time_budget is not None:
+            deadline = start + self.time_budget
+        self.fill_lanes(deadline)  # New interactive events are served before the events that are already buffered
+        queue_depth = get_queue_size(self.event_queue)
+        if queue_depth is not None:
+            queue_depth += len(self.lanes)
+
+        count = 0
+        while not max_events or count < max_events:
             try:
-                self.app.quit()
-            except (AttributeError, RuntimeError):
-                pass
+                self.run_next_event()
+            except Empty:
+                break
+            count += 1
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+        finished = 0
+        if self.workers is not None and self.workers.pending:
+            finished = self.apply_worker_results()
+        if self.releases:
+            self.run_releases()
+        if FORWARDED:
+            self.forward_signals()
+        pools_missing = 0
+        if count or finished:
+            self.sync_getters()
+        elif not self.lanes:
+            pools_missing = refill_widget_pools()  # Idle. Create widgets for the widget pools.
+        if self.notifier is not None:
+            # Buffered events do not make the pipe readable. Keep ticking until the lanes are empty.
+            interval = 0 if self.lanes or pools_missing else int(self.poll_interval * 1000)
+            if interval and self.workers is not None and self.workers.pending:
+                interval = min(interval, 5)  # Worker threads cannot wake the notifier. Check for results soon.
+            if self.event_mngr.interval() != interval:
+                self.event_mngr.setInterval(interval)
+        self.metrics.lane_depth = dict(zip(LANES, self.lanes.sizes()))
+        output_backlog = get_queue_size(self.consumer_queue) if self.consumer_queue is not None else None
+        self.metrics.record_tick(start, count, queue_depth, output_backlog)
+        if self.tracer is not None and count:
+            self.tracer.add_tick(start, time.perf_counter(), count)
+        return count
+
+    def sync_getters(self):
+        """Send the changed values of the watched proxy objects to the main process in one event."""
+        changed = collect_changed_values()
+        if changed and self.consumer_queue:
+            self.consumer_queue.put(GetterSyncEvent(changed))
+
+    def forward_signals(self):
+        """Send the signal emissions of the forwarded signals to the main process in one event."""
+        emitted = collect_signal_emissions()
+        if emitted and self.consumer_queue:
+            self.consumer_queue.put(SignalBatchEvent(emitted))
+
+    def push_stats(self):
+        """Send a snapshot of the metrics to the main process."""
+        if self.consumer_queue is not None:
+            self.consumer_queue.put(StatsEvent(self.metrics.snapshot()))
+            if self.tracer is not None and len(self.tracer):
+                self.consumer_queue.put(TraceEvent(self.tracer.take()))
 
     def start(self):
         self.event_mngr.start()
+        self.sync_timer.start()
+        if self.stats_timer is not None:
+            self.stats_timer.start()
+        if self.frame_timer is not None:
+            self.frame_timer.start()
+        if self.notifier is not None:
+            self.notifier.setEnabled(True)
 
     def stop(self):
         try:
@@ -51,30 +463,898 @@ class QtEventQueueManager(object):
             pass
         try:
             self.event_mngr.stop()
+            self.sync_timer.stop()
+            self.stats_timer.stop()
+        except (AttributeError, RuntimeError):
+            pass
+        try:
+            self.frame_timer.stop()
+            self.render_frame()
         except (AttributeError, RuntimeError):
             pass
+        try:
+            self.notifier.setEnabled(False)
+        except (AttributeError, RuntimeError):
+            pass
+        if self.workers is not None:
+            self.workers.close()
+
+        # Send the final metrics. This also wakes the consumer loop, which is waiting on the consumer queue.
+        self.push_stats()
 
 
 class AppEventLoop(EventLoop):
     """Run a Qt application in a separate process while processing events."""
 
+    queue_class = CountedQueue
+
+    def __init__(self, output_handlers=None, event_queue=None, consumer_queue=None, initialize_process=None,
+                 name='main', has_results=True, **options):
+        """Create the event loop.
+
+        Args:
+            output_handlers (list/tuple/callable)[None]: Function or list of funcs that executed events with results.
+            event_queue (Queue)[None]: Custom event queue for the event loop.
+            consumer_queue (Queue)[None]: Custom consumer queue for the consumer process.
+            initialize_process (function)[None]: Function to create and show widgets returning a dict of widgets and
+                variable names to save for use.
+            name (str)['main']: Event loop name. This name is passed to the event process and consumer process.
+            has_results (bool)[True]: Should this event loop create a consumer process to run executed events
+                through process_output.
+            **options (dict): Event loop options (max_events, wakeup, lane_weights, max_queue_size, overflow, preload,
+                output_dispatch, trace, transport, ...). See options.get_loop_options for every option.
+        """
+        self.options = options = get_loop_options(**options)
+        self.max_events = options['max_events']
+        self.time_budget = options['time_budget']
+        self.wakeup = options['wakeup']
+        self.poll_interval = options['poll_interval']
+        self.lane_weights = options['lane_weights']
+        self.frame_rate = options['frame_rate']
+
+        # Startup. A warm process with the same process options is adopted instead of spawning a process.
+        self.preload = options['preload']
+        self.keep_warm = options['keep_warm']
+        self.startup = {}
+
+        # Objects of garbage collected proxies are released in the separate process
+        self.max_cached_vars = options['max_cached_vars']
+        self.worker_threads = options['worker_threads']
+        self.released_count = 0
+        self._releases = []
+        self._release_scheduled = False
+
+        # Output events are delivered by a consumer thread or by a dispatcher on the Qt thread
+        self.output_dispatch = options['output_dispatch']
+        self.dispatcher = None
+        self.signal_handlers = {}  # Connection id: callback of a forwarded signal
+
+        # Bounded queue. Messages that do not fit are held in the main process or dropped by the overflow policy.
+        self.max_queue_size = options['max_queue_size']
+        self.overflow = options['overflow']
+        self.block_timeout = options['block_timeout']
+        self.dropped_count = 0
+        self.overflow_count = 0
+        self._held = OrderedDict()
+        self._held_ids = itertools.count()
+        self._drain_thread = None  # Sends the held events and releases without the Qt event loop of the main thread
+        self._drain_lock = threading.RLock()
+
+        # Metrics. The separate process pushes snapshots of its metrics to the stats handlers.
+        self.stats_interval = options['stats_interval']
+        self.stats_handlers = []
+        self.process_stats = None
+        self.sent_count = 0
+
+        # Tracing. Every message gets a trace id and both processes record the phases of the event.
+        self.trace = options['trace']
+        self.tracer = EventTracer() if self.trace else None
+
+        # Last write wins. Pending events are flushed when the Qt event loop is idle or before any other event.
+        self.coalesce = options['coalesce']
+        self.coalesced_count = 0
+        self._pending = OrderedDict()
+        self._pending_lock = threading.RLock()
+        self._flush_scheduled = False
+        self._batch_local = threading.local()
+        self._thread_lane = ThreadLane()
+
+        # Futures and key handlers that are resolved by the event_key of the output event
+        self.router = OutputRouter()
+        self.futures = self.router.futures
+        self.key_handlers = self.router.key_handlers
+
+        # Large arguments are passed with shared memory
+        self.shared_buffers = None
+        if options['shared_memory_threshold'] is not None:
+            self.shared_buffers = SharedBufferPool(options['shared_memory_threshold'])
+
+        # The separate process runs in a remote runner that is connected with a socket transport
+        self.transport = get_transport(options['transport'])
+
+        # Large registration payloads are sent once and referenced by their content hash
+        self.payloads = None
+        if options['payload_threshold'] is not None:
+            self.payloads = PayloadCache(options['payload_threshold'], options['max_payloads'])
+
+        super().__init__(output_handlers=output_handlers, event_queue=event_queue, consumer_queue=consumer_queue,
+                         initialize_process=initialize_process, name=name, has_results=has_results)
+
+    # ========== Output Management ==========
+    def process_output(self, event):
+        """Apply pushed proxy values, resolve the future for the event or pass the event to the output_handlers.
+
+        Args:
+            event (mp_event_loop.Event): Event that has results or error
+        """
+        if isinstance(event, GetterSyncEvent):
+            event.apply()
+            return
+        elif isinstance(event, StatsEvent):
+            self.process_stats = event.results
+            self.run_stats_handlers()
+            return
+        elif isinstance(event, SignalBatchEvent):
+            self.run_signal_handlers(event.results)
+            return
+        elif self.tracer is not None:
+            if isinstance(event, TraceEvent):
+                self.tracer.add_records(event.results)
+                return
+            self.tracer.trace_output(event)
+
+        if not self.router.route(event):
+            super().process_output(event)
+
+    def add_key_handler(self, event_key, handler, once=False):
+        """Add a function that handles the output events with the event_key.
+
+        Key handlers are found with one dictionary lookup and the output_handlers do not see the event.
+
+        Args:
+            event_key (str): Key of the output events.
+            handler (callable): Function that takes the output event.
+            once (bool)[False]: If True remove the handler after the first event.
+        """
+        self.router.add_key_handler(event_key, handler, once=once)
+
+    def remove_key_handler(self, event_key, handler=None):
+        """Remove a key handler or every handler of the event_key if handler is None."""
+        self.router.remove_key_handler(event_key, handler)
+
+    # ========== Signals ==========
+    def connect_signal(self, source, signal_name, callback, policy='all', interval=0.05):
+        """Call a function in this process when a signal of an object in the separate process is emitted.
+
+        Args:
+            source (str/WidgetProxy): Variable name or proxy of the object with the signal.
+            signal_name (str): Name of the signal. Ex: 'clicked', 'valueChanged'.
+            callback (callable): Function that is called with the signal arguments.
+            policy (str)['all']: 'all' sends every emission, 'latest' the last emission of every tick, 'throttle' the
+                last emission at most once every interval and 'debounce' the last emission after the signal was quiet
+                for the interval.
+            interval (float)[0.05]: Seconds for the 'throttle' and 'debounce' policies.
+
+        Returns:
+            conn_id (int): Connection id to disconnect the signal with.
+        """
+        get_signal_policy(policy)
+        conn_id = next(CONNECTION_IDS)
+        self.signal_handlers[conn_id] = callback
+        self.add_event(forward_signal, conn_id, source, signal_name, policy, interval,
+                       CacheEvent.get_object_key(self.cache), has_output=False)
+        return conn_id
+
+    def disconnect_signal(self, conn_id):
+        """Stop forwarding a connected signal."""
+        if self.signal_handlers.pop(conn_id, None) is not None:
+            self.add_event(unforward_signal, conn_id, has_output=False)
+
+    def run_signal_handlers(self, emitted):
+        """Call the callbacks of the forwarded signal emissions."""
+        for conn_id, emissions in emitted.items():
+            callback = self.signal_handlers.get(conn_id, None)
+            if callback is None:
+                continue
+            for args in emissions:
+                try:
+                    callback(*args)
+                except Exception as err:
+                    print_exception(err, 'Signal callback failed!')
+
+    # ========== Metrics ==========
+    def sync_trace_clock(self, rounds=5, timeout=5):
+        """Measure the offset between the trace clocks of this process and the separate process with round trips.
+
+        Returns:
+            offset (float): Seconds to add to the separate process' clock to get this process' clock.
+        """
+        samples = []
+        for _ in range(rounds):
+            send = time.perf_counter()
+            remote = self.add_future(Event(get_trace_time), priority='interactive').result(timeout)
+            samples.append((send, remote, time.perf_counter()))
+        return self.tracer.set_offset(samples)
+
+    def collect_trace(self, timeout=5):
+        """Ask the separate process for its trace records and wait for them."""
+        self.tracer.add_records(self.add_future(Event(take_trace_records)).result(timeout))
+
+    def export_trace(self, path=None, timeout=5, flow_scope=0, main_metadata=True):
+        """Return the traced events as a Chrome trace / Perfetto dictionary and write it as JSON if a path is given.
+
+        The records of the separate process are collected and the clock offset is measured first if the process is
+        running.
+
+        Args:
+            path (str)[None]: JSON file to write. Open it with chrome://tracing or ui.perfetto.dev.
+            timeout (float)[5]: Seconds to wait for the separate process.
+            flow_scope (int)[0]: Namespace of the flow ids when the traces of several loops are merged.
+            main_metadata (bool)[True]: If True add the process and thread names of the main process.
+        """
+        if self.tracer is None:
+            raise ValueError('Tracing is disabled! Create the event loop with trace=True.')
+        if self.is_running():
+            if self.tracer.offset is None:
+                self.sync_trace_clock(timeout=timeout)
+            self.collect_trace(timeout)
+        return self.tracer.export(path, flow_scope, main_metadata)
+
+    def add_stats_handler(self, handler):
+        """Add a function that is called with stats() every time the separate process pushes its metrics.
+
+        Handlers run in the thread that processes the output, so they can export the metrics (log, send to a
+        monitoring system) without blocking the GUI.
+        """
+        self.stats_handlers.append(handler)
+
+    def run_stats_handlers(self):
+        if self.stats_handlers:
+            run_stats_handlers(self.stats_handlers, self.stats())
+
+    def stats(self, refresh=False, reset=False, timeout=5):
+        """Return the metrics of the main process and the latest metrics of the separate process.
+
+        Args:
+            refresh (bool)[False]: If True ask the separate process for its current metrics and wait for the answer.
+                The request waits behind the queued events.
+            reset (bool)[False]: If refresh is True clear the metrics of the separate process after reading them.
+            timeout (float)[5]: Seconds to wait for a refresh.
+
+        Returns:
+            stats (dict): {'main': {'sent', 'coalesced', 'pending', 'held', 'dropped', 'overflow', 'startup',
+                'released', 'dispatched', 'futures', 'queue_depth', 'output_backlog', 'payloads'},
+                'process': separate process metrics or None if no snapshot was received yet}.
+                The process metrics have 'latency' (enqueue to execute seconds), 'exec_time', 'targets' (exec_time by
+                'Class.method'), 'events_per_tick', 'tick_time', 'tick_interval', 'queue_depth' and 'output_backlog'.
+        """
+        if refresh:
+            self.process_stats = self.add_event_future(get_process_stats, reset=reset).result(timeout)
+
+        return {'main': get_loop_stats(self), 'process': self.process_stats}
+
+    def add_future(self, event, priority=None):
+        """Send an event to the separate process and return a concurrent.futures.Future for the event results.
+
+        The future is resolved from the consumer queue by the event_key, so many calls can be sent before waiting.
+        Use future.result(timeout) to wait or asyncio.wrap_future(future) to await the result.
+
+        Args:
+            event (Event): Event to run in the separate process. The event_key is replaced with a unique key.
+            priority (str/int)[None]: Lane name ('interactive', 'normal', 'bulk') or index.
+
+        Returns:
+            future (concurrent.futures.Future): Future that is set with the event results or error.
+        """
+        if not self.has_results:
+            raise ValueError('Futures require an event loop with has_results=True!')
+
+        event.event_key, future = self.router.add_future(self)
+        event.has_output = True
+        self.put_event(event, priority=priority)
+        return future
+
+    def cancel_futures(self):
+        """Cancel all futures that are waiting for results."""
+        self.router.cancel_futures()
+
+    def add_event_future(self, target, *args, **kwargs):
+        """Run a callable in the separate process and return a Future for the results.
+
+        Args:
+            target (function/method/callable): Callable to run in a separate process.
+            *args (tuple): Arguments to pass into the target function.
+            **kwargs (dict): Keyword arguments to pass into the target function.
+        """
+        args, kwargs = self.share_args(args, kwargs)
+        return self.add_future(Event(target, *args, **kwargs))
+
+    def add_var_event_future(self, var_name, target, *args, **kwargs):
+        """Call a method of a variable in the separate process and return a Future for the results.
+
+        Args:
+            var_name (str): Variable name.
+            target (str): Method name of the variable.
+            *args (tuple): Arguments to pass into the target function.
+            **kwargs (dict): Keyword arguments to pass into the target function.
+        """
+        args, kwargs = self.share_args(args, kwargs)
+        return self.add_future(VarEvent(var_name, target, *args, cache=self.cache, **kwargs))
+
+    # ========== Event Management ==========
+    def put_event(self, event, coalesce_key=None, priority=None):
+        """Put an event on the event queue. Every event that is sent to the separate process goes through here.
+
+        Args:
+            event (Event/tuple): Event or compact message tuple to send to the separate process.
+            coalesce_key (tuple)[None]: If given the event replaces the pending event with the same key.
+            priority (str/int)[None]: Lane name ('interactive', 'normal', 'bulk') or index. None uses the lane of the
+                priority() with block or 'normal'.
+        """
+        lane = self.get_priority() if priority is None else get_lane(priority)
+
+        if self.shared_buffers is not None:
+            self.shared_buffers.share_event(event)
+        if self.payloads is not None:
+            self.payloads.share_event(event)
+
+        batch = getattr(self._batch_local, 'batch', None)
+        if batch is not None:
+            with self._pending_lock:
+                if self._pending:
+                    self.flush()
+            self._discard(batch.add(event, coalesce_key))
+            if batch.lane is None or lane < batch.lane:
+                batch.lane = lane
+            return
+
+        if coalesce_key is None and self.overflow == 'block' and self.is_queue_full():
+            self._wait_for_room(self.block_timeout)  # Wait without the lock, so the other threads can send
+
+        with self._pending_lock:
+            if coalesce_key is None:
+                if self._pending:
+                    self.flush()
+                self._send(event, lane)
+                return
+
+            self._discard(self._pending.pop(coalesce_key, (None, None))[0])
+            self._pending[coalesce_key] = (event, lane)
+            self._schedule_flush()
+
+    def _discard(self, event):
+        """Count an event that was replaced by a newer event and release its shared memory."""
+        if event is not None:
+            self.coalesced_count += 1
+            self._release_shared_buffers(event)
+
+    def _release_shared_buffers(self, event):
+        """Mark the shared memory of an event that will never be sent as free."""
+        if self.shared_buffers is not None:
+            if isinstance(event, tuple):
+                self.shared_buffers.discard_args(*get_message_args(event))
+            else:
+                self.shared_buffers.discard_event(event)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Collect the events of this thread and send them as one BatchEvent when the outermost batch exits.
+
+        The separate process runs all of the events in the same Qt tick with the updates of the affected windows
+        suspended. The events are discarded if an exception is raised in the with block.
+        """
+        local = self._batch_local
+        if getattr(local, 'batch', None) is not None:
+            yield local.batch  # Nested batch
+            return
+
+        local.batch = batch = BatchEvent()
+        try:
+            yield batch
+        except BaseException:
+            local.batch = None
+            for event in batch.get_events():
+                self._release_shared_buffers(event)
+            raise
+
+        local.batch = None
+        if batch.get_events():
+            self.put_event(batch, priority=batch.lane)
+
+    def get_priority(self):
+        """Return the priority lane index that is used for the events of this thread."""
+        return self._thread_lane.lane
+
+    @contextlib.contextmanager
+    def priority(self, priority):
+        """Send the events of this thread in the with block with the given priority lane.
+
+        .. code-block:: python
+
+            >>> with loop.priority('interactive'):
+            ...     dialog.show()
+            ...     dialog.raise_()
+
+        Args:
+            priority (str/int): Lane name ('interactive', 'normal', 'bulk') or index.
+        """
+        with self._thread_lane.use(priority) as lane:
+            yield lane
+
+    def _schedule_flush(self):
+        """Flush the pending events when the Qt event loop is idle. Flush now if there is no event loop to wait for."""
+        if self._flush_scheduled:
+            return
+
+        app = QtCore.QCoreApplication.instance()
+        if app is not None and QtCore.QThread.currentThread() == app.thread():
+            self._flush_scheduled = True
+            QtCore.QTimer.singleShot(0, self.flush)
+        else:
+            self.flush()
+
+    def flush(self):
+        """Send all pending coalesced events and the held events that fit in the queue to the separate process."""
+        with self._pending_lock:
+            self._flush_scheduled = False
+            self._drain_held()
+            while self._pending:
+                self._send(*self._pending.popitem(last=False)[1])
+            if self._releases and not self._held:
+                self._send_releases()  # After the calls that were sent before the proxy was collected
+
+    def queue_depth(self):
+        """Return the number of messages that are queued or running in the separate process or None."""
+        return get_queue_depth(self.event_queue)
+
+    def is_queue_full(self):
+        """Return True if the queue has max_queue_size messages and the separate process is running."""
+        if not self.max_queue_size:
+            return False
+        depth = self.queue_depth()
+        return depth is not None and depth >= self.max_queue_size and self.is_event_process_alive()
+
+    def _wait_for_room(self, timeout=None):
+        """Wait until the queue is not full. Return False if the timeout ran out.
+
+        The wait wakes up every poll_interval to check if the separate process is still alive.
+        """
+        deadline = None
+        if timeout is not None:
+            deadline = time.perf_counter() + timeout
+        while self.is_queue_full():
+            wait_time = self.poll_interval
+            if deadline is not None:
+                wait_time = min(wait_time, deadline - time.perf_counter())
+                if wait_time <= 0:
+                    return False
+            wait_for_room(self.event_queue, self.max_queue_size, wait_time)
+        return True
+
+    def _send(self, event, lane=DEFAULT_LANE):
+        """Put the event on the event queue or apply the overflow policy if the queue is full."""
+        if self.max_queue_size:
+            if self._held:
+                self._drain_held()
+            if self._held or self.is_queue_full():
+                self._handle_overflow(event, lane)
+                return
+        self._put(event, lane)
+
+    def _put(self, event, lane=DEFAULT_LANE):
+        """Put the event in an envelope with the send time, priority lane and object keys on the event queue.
+
+        The event is pickled to bytes in the feeder thread of the queue and unpickled when the separate process runs it.
+        """
+        self.sent_count += 1
+        if self.tracer is None:
+            self.event_queue.put(make_envelope(LazyMessage(event), sent=time.time(), lane=lane,
+                                               keys=get_event_keys(event)))
+        else:
+            trace_id = self.tracer.trace_put(event, lane)
+            message = LazyMessage(event, on_pickled=functools.partial(self.tracer.trace_pickle, trace_id))
+            self.event_queue.put(make_envelope(message, sent=time.time(), lane=lane, keys=get_event_keys(event),
+                                               trace=trace_id))
+
+    def _handle_overflow(self, event, lane):
+        """Apply the overflow policy to an event that does not fit in the queue."""
+        self.overflow_count += 1
+        policy = self.overflow
+        if policy == 'block':
+            if not self._wait_for_room(self.block_timeout):
+                self._drop(event)
+                raise Full('The event queue is full ({} messages)!'.format(self.max_queue_size))
+            self._put(event, lane)
+
+        elif policy == 'raise':
+            self._drop(event)
+            raise Full('The event queue is full ({} messages)!'.format(self.max_queue_size))
+
+        elif policy == 'drop_newest':
+            self._drop(event)
+
+        else:  # drop_oldest and coalesce hold the event until the separate process catches up
+            key = None
+            if policy == 'coalesce':
+                key = get_coalesce_key(event)
+            if key is None:
+                key = ('__held__', next(self._held_ids))
+            else:
+                self._drop(self._held.pop(key, (None, None))[0])
+            self._held[key] = (event, lane)
+            while len(self._held) > self.max_queue_size:
+                self._drop(self._held.popitem(last=False)[1][0])
+            self._schedule_drain()
+
+    def _drop(self, event):
+        """Count an event that will never be sent, release its shared memory and fail its future."""
+        if event is None:
+            return
+        self.dropped_count += 1
+        self._release_shared_buffers(event)
+
+        key = getattr(event, 'event_key', None)
+        if key is not None and self.futures:
+            future = self.router.pop_future(key)
+            if future is not None and not future.done():
+                future.set_exception(Full('The event was dropped, because the event queue is full!'))
+
+    def _drain_held(self):
+        """Send the held events in order while the queue has room."""
+        while self._held and not self.is_queue_full():
+            self._put(*self._held.popitem(last=False)[1])
+        if self._held:
+            self._schedule_drain()
+
+    def _schedule_drain(self):
+        """Start the thread that sends the held events and the releases when the separate process catches up."""
+        with self._drain_lock:
+            if self._drain_thread is not None:
+                return
+            self._drain_thread = threading.Thread(target=self._run_drain, name='QtMpDrain-' + self.name, daemon=True)
+            self._drain_thread.start()
+
+    def _run_drain(self):
+        """Send the held events while the queue has room and then the releases. Stop when nothing is left or the
+        separate process stopped.
+        """
+        while True:
+            with self._pending_lock:
+                self._drain_held()
+                if self._releases and not self._held:
+                    self._send_releases()
+                with self._drain_lock:
+                    if (not self._held and not self._releases) or not self.is_event_process_alive():
+                        self._drain_thread = None
+                        return
+            if self._held:
+                self._wait_for_room(self.poll_interval)
+
+    def release(self, item, keep=None):
+        """Queue the release of the object of a garbage collected proxy. All queued releases are sent in one message
+        when the Qt event loop is idle or with the next flush. Without a Qt event loop in this thread the drain thread
+        sends them.
+
+        Args:
+            item (tuple): (cache id, proxy id, object key, compact object number) of the proxy.
+            keep (object)[None]: Cache value of the proxy id. It is removed from the cache after the release is sent.
+        """
+        self._releases.append((item, keep))
+        app = QtCore.QCoreApplication.instance()
+        if app is None or QtCore.QThread.currentThread() != app.thread():
+            self._schedule_drain()
+        elif not self._release_scheduled:
+            self._release_scheduled = True
+            QtCore.QTimer.singleShot(0, self.flush)
+
+    def _send_releases(self):
+        """Send the queued releases in one message. The message is small and is never held or dropped."""
+        self._release_scheduled = False
+        releases, self._releases = self._releases, []
+        if self.is_running():
+            self.sent_count += 1
+            self.event_queue.put(make_envelope((MSG_RELEASE, [item for item, _ in releases]), sent=time.time()))
+            self.released_count += len(releases)
+
+        # The proxy ids can be reused now
+        for (cache_id, proxy_id, _, _), keep in releases:
+            cache = CacheEvent.CACHE.get(cache_id, CacheEvent.CACHE)
+            if cache.get(proxy_id, None) is keep:
+                del cache[proxy_id]
+
+    def share_args(self, args, kwargs):
+        """Return the args and kwargs with large buffers replaced by shared memory handles."""
+        if self.shared_buffers is not None:
+            return self.shared_buffers.share_args(args, kwargs)
+        return args, kwargs
+
+    def add_event(self, target, *args, has_output=None, event_key=None, cache=False, re_register=False,
+                  priority=None, gui_free=False, apply=None, **kwargs):
+        """Add an event to be run in a separate process.
+
+        Args:
+            target (function/method/callable/Event): Event or callable to run in a separate process.
+            *args (tuple): Arguments to pass into the target function.
+            has_output (bool) [False]: If True save the executed event and put it on the consumer/output queue.
+            event_key (str)[None]: Key to identify the event or output result.
+            cache (bool) [False]: If the target object should be cached.
+            re_register (bool)[False]: Forcibly register this object in the other process.
+            priority (str/int)[None]: Lane name ('interactive', 'normal', 'bulk') or index.
+            gui_free (bool)[False]: If True the target does not touch widgets and runs on a worker thread of the
+                separate process, so it does not freeze the widgets.
+            apply (callable/tuple)[None]: Called with the results on the GUI thread of the separate process. A
+                callable or (proxy/variable name, method name). Ex: apply=(label_proxy, 'setText').
+            **kwargs (dict): Keyword arguments to pass into the target function.
+            args (tuple)[None]: Keyword args argument.
+            kwargs (dict)[None]: Keyword kwargs argument.
+        """
+        args = kwargs.pop('args', args)
+        kwargs = kwargs.pop('kwargs', kwargs)
+
+        if cache:
+            return self.add_cache_event(target, *args, has_output=has_output, event_key=event_key,
+                                        re_register=re_register, priority=priority, **kwargs)
+
+        elif isinstance(target, Event):
+            event = target
+
+        else:
+            if has_output is None:
+                has_output = True
+            if gui_free or apply is not None:
+                args, kwargs = self.share_args(args, kwargs)
+                event = WorkerEvent(target, *args, has_output=has_output, event_key=event_key, gui_free=gui_free,
+                                    apply=apply, cache_id=CacheEvent.get_object_key(self.cache), **kwargs)
+            else:
+                event = Event(target, *args, has_output=has_output, event_key=event_key, **kwargs)
+
+        self.put_event(event, priority=priority)
+
+    def add_cache_event(self, target, *args, has_output=None, event_key=None, re_register=False, priority=None,
+                        **kwargs):
+        """Add an event that uses cached objects.
+
+        Args:
+            target (function/method/callable/Event): Event or callable to run in a separate process.
+            *args (tuple): Arguments to pass into the target function.
+            has_output (bool) [False]: If True save the executed event and put it on the consumer/output queue.
+            event_key (str)[None]: Key to identify the event or output result.
+            re_register (bool)[False]: Forcibly register this object in the other process.
+            priority (str/int)[None]: Lane name ('interactive', 'normal', 'bulk') or index.
+            **kwargs (dict): Keyword arguments to pass into the target function.
+            args (tuple)[None]: Keyword args argument.
+            kwargs (dict)[None]: Keyword kwargs argument.
+        """
+        args = kwargs.pop('args', args)
+        kwargs = kwargs.pop('kwargs', kwargs)
+
+        # Make sure cache is not a kwargs
+        kwargs.pop('cache', None)
+
+        if isinstance(target, CacheEvent):
+            event = target
+        else:
+            if isinstance(target, Event):
+                args = args or target.args
+                kwargs = kwargs or target.kwargs
+                has_output = has_output or target.has_output
+                event_key = event_key or target.event_key
+                target = target.target
+
+            if has_output is None:
+                has_output = True
+            args, kwargs = self.share_args(args, kwargs)
+            event = CacheEvent(target, *args, has_output=has_output, event_key=event_key, cache=self.cache,
+                               re_register=re_register, **kwargs)
+
+        self.put_event(event, priority=priority)
+
+    def cache_object(self, obj, has_output=False, event_key=None, re_register=False):
+        """Save an object in the separate processes, so the object can persist.
+
+        Args:
+            obj (object): Object to save in the separate process. This object will keep it's values between cache events
+            has_output (bool)[False]: If True the cache object will be a result passed into the output_handlers.
+            event_key (str)[None]: Key to identify the event or output result.
+            re_register (bool)[False]: Forcibly register this object in the other process.
+        """
+        if isinstance(obj, CacheEvent):
+            event = obj
+        elif isinstance(obj, Event):
+            old_event = obj
+            event = CacheObjectEvent(old_event.target, has_output=has_output, event_key=event_key,
+                                     cache=self.cache, re_register=re_register)
+            event.args = old_event.args
+            event.kwargs = old_event.kwargs
+            event.event_key = old_event.event_key
+        else:
+            event = CacheObjectEvent(obj, has_output=has_output, event_key=event_key,
+                                     cache=self.cache, re_register=re_register)
+
+        self.put_event(event)
+
+    def add_var_event(self, var_name, target, *args, has_output=None, event_key=None, re_register=False,
+                      coalesce=None, priority=None, **kwargs):
+        """Add an event to be run in a separate process.
+
+        Args:
+            var_name (str): Variable name.
+            target (str/function/method/callable): Function or string object and function name.
+            *args (tuple): Arguments to pass into the target function.
+            has_output (bool) [False]: If True save the executed event and put it on the consumer/output queue.
+            event_key (str)[None]: Key to identify the event or output result.
+            re_register (bool)[False]: Forcibly register this object in the other process.
+            coalesce (bool)[None]: If True drop the pending call with the same var_name and method name.
+                None uses the loop's coalesce value.
+            priority (str/int)[None]: Lane name ('interactive', 'normal', 'bulk') or index.
+            **kwargs (dict): Keyword arguments to pass into the target function.
+            args (tuple)[None]: Keyword args argument.
+            kwargs (dict)[None]: Keyword kwargs argument.
+        """
+        args = kwargs.pop('args', args)
+        kwargs = kwargs.pop('kwargs', kwargs)
+
+        # Make sure cache is not a kwargs
+        kwargs.pop('cache', None)
+
+        # CacheEvents check if arguments are cached, so large buffers are replaced before the event is created
+        args, kwargs = self.share_args(args, kwargs)
+
+        if coalesce is None:
+            coalesce = self.coalesce and event_key is None  # Do not drop calls where the output is identified
+        if not coalesce or not isinstance(target, str):
+            with self.priority(priority if priority is not None else self.get_priority()):
+                return super().add_var_event(var_name, target, *args, has_output=has_output, event_key=event_key,
+                                             re_register=re_register, **kwargs)
+
+        if has_output is None:
+            has_output = True
+        event = VarEvent(var_name, target, *args, has_output=has_output, event_key=event_key, cache=self.cache,
+                         re_register=re_register, **kwargs)
+        self.put_event(event, coalesce_key=(var_name, target), priority=priority)
+
+    def wait(self):
+        """Flush the pending and held events and wait for the event queue and consumer queue to finish processing."""
+        self.flush()
+        while self._held and self.is_event_process_alive():
+            self._wait_for_room(self.poll_interval)
+            with self._pending_lock:
+                self._drain_held()
+        if self._releases:
+            self.flush()
+        super().wait()
+        if self.dispatcher is not None:
+            self.dispatcher.drain(self.is_event_process_alive)
+
+    def start_consumer_loop(self):
+        """Start the consumer thread or the output dispatcher of this Qt thread."""
+        app = QtCore.QCoreApplication.instance()
+        if self.output_dispatch == 'qt' and app is not None and QtCore.QThread.currentThread() == app.thread():
+            self.dispatcher = OutputDispatcher(self.consumer_queue, self.process_output,
+                                               fileno=get_queue_fileno(self.consumer_queue),
+                                               poll_interval=self.poll_interval)
+            self.dispatcher.start()
+        else:
+            super().start_consumer_loop()
+
+    def stop(self):
+        """Stop running the process and the output dispatcher."""
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+            self.dispatcher = None
+        super().stop()
+
+    def close(self):
+        """Close the event loop, cancel the waiting futures and remove the shared memory segments."""
+        super().close()
+        self.cancel_futures()
+        if self.shared_buffers is not None and not self.is_event_process_alive():
+            self.shared_buffers.close()
+
+    def get_process_options(self):
+        """Return the keyword arguments that configure the QtEventQueueManager in the separate process."""
+        options = {name: self.options[name] for name in PROCESS_OPTIONS}
+        options['has_results'] = self.has_results
+        return options
+
+    def prewarm(self, count=1):
+        """Start warm processes with this event loop's process options. Return the list of WarmProcess objects.
+
+        start() (or __enter__) adopts a warm process instead of spawning a new process. Event loops with a transport
+        do not use warm processes.
+        """
+        if self.transport is not None:
+            return []
+        return [add_warm_process(self.run_event_loop, self.get_process_options()) for _ in range(count)]
+
+    def start(self):
+        """Start running the separate process which runs an event loop."""
+        start = time.perf_counter()
+        super().start()
+        self.startup['start'] = time.perf_counter() - start
+
+    def start_event_loop(self):
+        """Start running the event loop. Adopt a warm process with the same process options if one is available."""
+        options = self.get_process_options()
+        if self.payloads is not None:
+            self.payloads.clear()  # The new process does not have the payloads
+        if self.transport is not None:
+            self.startup = {'time': time.time(), 'warm': False, 'warm_age': None}
+            self.alive_event.set()
+            self.event_process = self.transport.open(self.name, options, initialize_process=self.initialize_process,
+                                                     has_results=self.has_results)
+            self.event_queue = self.event_process.event_queue
+            self.consumer_queue = self.event_process.consumer_queue
+            return
+
+        warm = None
+        if self.event_queue.empty() and self.consumer_queue.empty():
+            warm = take_warm_process(self.run_event_loop, options)
+        self.startup = {'time': time.time(), 'warm': warm is not None,
+                        'warm_age': time.time() - warm.started if warm is not None else None}
+
+        if warm is not None:
+            self.alive_event = warm.alive_event
+            self.event_queue = warm.event_queue
+            self.consumer_queue = warm.consumer_queue
+            self.event_process = warm.event_process
+            if callable(self.initialize_process):
+                with self.priority('interactive'):  # Run before any other event
+                    self.save_variables(self.initialize_process)
+            if self.keep_warm:
+                self.prewarm()
+            return
+
+        self.alive_event.set()
+
+        kwargs = options
+        kwargs['initialize_process'] = self.initialize_process
+        self.event_process = self.event_loop_class(name="EventLoop-" + self.name, target=self.run_event_loop,
+                                                   args=(self.alive_event, self.event_queue, self.consumer_queue),
+                                                   kwargs=kwargs)
+        self.event_process.daemon = True
+        self.event_process.start()
+
     @staticmethod
-    def run_qt_process(alive_event, event_queue, consumer_queue, initialize_process=None):
-        """Start an application and run an event loop for multiprocessing."""
+    def run_qt_process(alive_event, event_queue, consumer_queue, initialize_process=None, preload=None, **options):
+        """Start an application and run an event loop for multiprocessing.
+
+        Args:
+            alive_event (multiprocessing.Event): Event to signal when to quit the application.
+            event_queue (multiprocessing.Queue/multiprocessing.JoinableQueue): Queue to get and run events with.
+            consumer_queue (multiprocessing.Queue/multiprocessing.JoinableQueue): Output queue of events.
+            initialize_process (function)[None]: Function run at the start of the event loop. It should return a
+                dictionary of variable name, object pairs.
+            preload (list)[None]: Module names to import before the application is created.
+            **options (dict): QtEventQueueManager keyword arguments (max_events, time_budget, wakeup, ...).
+        """
+        # Time the startup phases. They are reported in the process stats.
+        startup = PROCESS_METRICS.startup
+        startup['process_started'] = time.time()
+
+        start = time.perf_counter()
+        startup['modules'] = preload_modules(preload)
+        startup['preload'] = time.perf_counter() - start
+
+        start = time.perf_counter()
         app = QtWidgets.QApplication([])
+        startup['qapplication'] = time.perf_counter() - start
 
         # Create widgets and store the widgets
+        start = time.perf_counter()
         cache = CacheEvent.CACHE  # This is the cache for this process
         if callable(initialize_process):
             variables = initialize_process()
             for key, val in variables.items():
                 cache[key] = val
+        startup['initialize'] = time.perf_counter() - start
 
         # Start the system to process events (Note threads cannot create widgets).
         # event_mngr = threading.Thread(target=run_qt_event_loop, args=(alive_event, event_queue, consumer_queue, app))
         # event_mngr.start()
-        event_mngr = QtEventQueueManager(alive_event, event_queue, consumer_queue, app)
+        event_mngr = QtEventQueueManager(alive_event, event_queue, consumer_queue, app, **options)
         event_mngr.start()
+        startup['ready'] = time.time()
 
         # Run the application
         app.exec_()
@@ -0,0 +1,267 @@
+import json
+import itertools
+import contextlib
+
+from .qt_mp_event_loop import AppEventLoop
+
+
+__all__ = ['AppEventLoopPool']
+
+
+class AppEventLoopPool(object):
+    """Run multiple Qt applications in separate processes and place widget proxies between them.
+
+    Each process has its own QApplication, so a slow widget only stalls the widgets in the same process. Proxies are
+    placed when they are created and every call of a proxy is sent to the process that owns the widget. Variable events
+    (save_variables, add_var_event, initialize_process) run in the primary (first) process.
+    """
+
+    EVENT_LOOP = AppEventLoop
+    PLACEMENTS = ('round_robin', 'least_loaded')
+
+    def __init__(self, processes=2, placement='round_robin', output_handlers=None, initialize_process=None,
+                 name='main', has_results=True, **options):
+        """Create the event loops.
+
+        Args:
+            processes (int)[2]: How many Qt processes to create.
+            placement (str/callable)['round_robin']: How to place new proxies. 'round_robin', 'least_loaded' or a
+                function that takes the pool and the proxy class and returns a loop index.
+            output_handlers (list/tuple/callable)[None]: Function or list of funcs that executed events with results.
+            initialize_process (function)[None]: Function to create and show widgets in the primary process returning
+                a dict of widgets and variable names to save for use.
+            name (str)['main']: Event loop name. Each process is named name + '_' + index.
+            has_results (bool)[True]: Should the event loops create a consumer process to run executed events
+                through process_output.
+            **options (dict): Event loop options (max_events, time_budget, wakeup, ...). See options.get_loop_options.
+        """
+        if not callable(placement) and placement not in self.PLACEMENTS:
+            raise ValueError('Invalid placement {}! Use one of {} or a callable'.format(repr(placement),
+                                                                                       self.PLACEMENTS))
+        self.name = str(name)
+        self.placement = placement
+        self.loops = [self.EVENT_LOOP(output_handlers=output_handlers,
+                                      initialize_process=initialize_process if i == 0 else None,
+                                      name=self.name + '_' + str(i), has_results=has_results, **options)
+                      for i in range(max(int(processes), 1))]
+        self.placed = [0 for _ in self.loops]  # Number of proxies placed in each process
+        self.affinity = {}  # Affinity group name: loop index
+        self._round_robin = itertools.cycle(range(len(self.loops)))
+
+    @property
+    def primary(self):
+        """Return the event loop that runs variable events."""
+        return self.loops[0]
+
+    @property
+    def output_handlers(self):
+        return self.primary.output_handlers
+
+    @property
+    def cache(self):
+        return self.primary.cache
+
+    @property
+    def coalesced_count(self):
+        """Return the number of calls that were dropped, because a newer call replaced them."""
+        return sum(loop.coalesced_count for loop in self.loops)
+
+    @property
+    def dropped_count(self):
+        """Return the number of events that the overflow policy dropped, because an event queue was full."""
+        return sum(loop.dropped_count for loop in self.loops)
+
+    # ========== Placement ==========
+    def get_load(self, index):
+        """Return the load of a process as (number of placed proxies, number of queued events)."""
+        try:
+            qsize = self.loops[index].event_queue.qsize()
+        except (AttributeError, NotImplementedError):
+            qsize = 0
+        return self.placed[index], qsize
+
+    def get_placement_index(self, proxy_class=None):
+        """Return the index of the loop that the placement policy chooses for a new proxy."""
+        if callable(self.placement):
+            return int(self.placement(self, proxy_class)) % len(self.loops)
+        elif self.placement == 'least_loaded':
+            return min(range(len(self.loops)), key=self.get_load)
+        return next(self._round_robin)
+
+    def set_affinity(self, group, index):
+        """Place all proxies of the affinity group in the process at the given index."""
+        self.affinity[group] = int(index) % len(self.loops)
+
+    def get_loop(self, proxy_class=None, affinity=None):
+        """Return the event loop that a new proxy should live in.
+
+        Args:
+            proxy_class (type)[None]: Proxy class that is being created.
+            affinity (object)[None]: Affinity group. Proxies with the same group are placed in the same process.
+        """
+        if affinity is not None:
+            if affinity not in self.affinity:
+                self.affinity[affinity] = self.get_placement_index(proxy_class)
+            index = self.affinity[affinity]
+        else:
+            index = self.get_placement_index(proxy_class)
+
+        self.placed[index] += 1
+        return self.loops[index]
+
+    def unplace(self, loop):
+        """Remove the placement of a released proxy from the load of its process."""
+        try:
+            index = self.loops.index(loop)
+        except ValueError:
+            return
+        self.placed[index] = max(self.placed[index] - 1, 0)
+
+    # ========== Output Management ==========
+    def add_output_handler(self, handler):
+        """Add a function that handles the event output for every process."""
+        for loop in self.loops:
+            loop.add_output_handler(handler)
+
+    def insert_output_handler(self, index, handler):
+        """Insert a function that handles the event output into a specific order for every process."""
+        for loop in self.loops:
+            loop.insert_output_handler(index, handler)
+
+    # ========== Metrics ==========
+    def add_key_handler(self, event_key, handler, once=False):
+        """Add a function that handles the output events with the event_key of every process."""
+        for loop in self.loops:
+            loop.add_key_handler(event_key, handler, once=once)
+
+    def remove_key_handler(self, event_key, handler=None):
+        for loop in self.loops:
+            loop.remove_key_handler(event_key, handler)
+
+    def connect_signal(self, source, signal_name, callback, policy='all', interval=0.05):
+        """Call a function when a signal in a separate process is emitted. Proxies use the process that owns them.
+        Variable names use the primary process.
+        """
+        loop = getattr(source, '__loop__', None) if not isinstance(source, str) else None
+        if loop is None:
+            loop = self.primary
+        return loop.connect_signal(source, signal_name, callback, policy=policy, interval=interval)
+
+    def disconnect_signal(self, conn_id):
+        for loop in self.loops:
+            loop.disconnect_signal(conn_id)
+
+    def add_stats_handler(self, handler):
+        """Add a function that is called with the stats of a process every time that process pushes its metrics."""
+        for loop in self.loops:
+            loop.add_stats_handler(handler)
+
+    def stats(self, refresh=False, reset=False, timeout=5):
+        """Return {'processes': [stats of each event loop]}. See AppEventLoop.stats."""
+        return {'processes': [loop.stats(refresh=refresh, reset=reset, timeout=timeout) for loop in self.loops]}
+
+    def export_trace(self, path=None, timeout=5):
+        """Return the traces of all processes as one Chrome trace dictionary. See AppEventLoop.export_trace.
+
+        The flow ids of each loop are namespaced by the loop index and the main process names are only added once.
+        """
+        traces = [loop.export_trace(timeout=timeout, flow_scope=i, main_metadata=(i == 0))
+                  for i, loop in enumerate(self.loops)]
+        trace = {'traceEvents': [item for loop_trace in traces for item in loop_trace['traceEvents']],
+                 'displayTimeUnit': 'ms'}
+        if path is not None:
+            with open(path, 'w') as f:
+                json.dump(trace, f)
+        return trace
+
+    # ========== Event Management (Primary process) ==========
+    def add_event(self, *args, **kwargs):
+        return self.primary.add_event(*args, **kwargs)
+
+    def add_cache_event(self, *args, **kwargs):
+        return self.primary.add_cache_event(*args, **kwargs)
+
+    def cache_object(self, *args, **kwargs):
+        return self.primary.cache_object(*args, **kwargs)
+
+    def is_object_cached(self, obj):
+        return self.primary.is_object_cached(obj)
+
+    def save_variables(self, *args, **kwargs):
+        return self.primary.save_variables(*args, **kwargs)
+
+    def add_var_event(self, *args, **kwargs):
+        return self.primary.add_var_event(*args, **kwargs)
+
+    def add_future(self, *args, **kwargs):
+        return self.primary.add_future(*args, **kwargs)
+
+    def add_event_future(self, *args, **kwargs):
+        return self.primary.add_event_future(*args, **kwargs)
+
+    def add_var_event_future(self, *args, **kwargs):
+        return self.primary.add_var_event_future(*args, **kwargs)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Collect the events of every process and send one message to each process when the with block exits."""
+        with contextlib.ExitStack() as stack:
+            yield [stack.enter_context(loop.batch()) for loop in self.loops]
+
+    @contextlib.contextmanager
+    def priority(self, priority):
+        """Send the events of this thread in the with block with the given priority lane in every process."""
+        with contextlib.ExitStack() as stack:
+            yield [stack.enter_context(loop.priority(priority)) for loop in self.loops][0]
+
+    def flush(self):
+        """Send all pending coalesced events."""
+        for loop in self.loops:
+            loop.flush()
+
+    # ========== Process Management ==========
+    def is_running(self):
+        """Return if any of the event loops are running."""
+        return any(loop.is_running() for loop in self.loops)
+
+    def prewarm(self, count=None):
+        """Start warm processes that start() adopts instead of spawning a process for each event loop.
+
+        Args:
+            count (int)[None]: Number of warm processes. None starts one for each event loop.
+        """
+        if count is None:
+            count = len(self.loops)
+        return self.primary.prewarm(count)  # Every loop has the same process options
+
+    def start(self):
+        """Start running all of the separate processes."""
+        for loop in self.loops:
+            loop.start()
+
+    def wait(self):
+        """Wait for every event queue and consumer queue to finish processing."""
+        for loop in self.loops:
+            loop.wait()
+
+    def stop(self):
+        """Stop running all of the processes."""
+        for loop in self.loops:
+            loop.stop()
+
+    def close(self):
+        """Close all of the event loops."""
+        for loop in self.loops:
+            loop.close()
+
+    def __enter__(self):
+        if not self.is_running():
+            self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+        if exc_type is not None:
+            return False
+        return True
@@ -1,20 +1,228 @@
+import asyncio
+
 import mp_event_loop
 
+from .getter_sync import watch_object
+from .compact import MSG_CALL, OBJECT_NUMBERS, register_compact_object
+from .widget_pool import get_widget_pool, fill_widget_pool
+from .release import track_proxy
+
 
 __all__ = ['WidgetProxy']
 
 
+def make_compact_stub(method_name, index):
+    """Return a proxy method that sends a compact call for the method index."""
+    def compact_stub(self, *args, **kwargs):
+        return self.mp_call_compact(index, method_name, args, kwargs)
+    compact_stub.__name__ = method_name
+    return compact_stub
+
+
 class WidgetProxy(mp_event_loop.Proxy):
     """Proxy to create a widget in a separate process."""
 
+    SLOTS = mp_event_loop.Proxy.SLOTS + ['__object_num__']
+
     PROXY_CLASS = None
     SHOW_WIDGET = True
+    AFFINITY = None  # Proxies with the same affinity group are placed in the same process of an AppEventLoopPool
+    COALESCE = []  # Method names where only the latest pending call is sent (Last write wins)
+    PUSH_GETTERS = False  # Separate process pushes changed GETTERS/PROPERTIES instead of returning every proxy call
+    METHODS = []  # Method names that are precompiled into stubs which send compact calls (No output)
+    PRIORITIES = {}  # Method name: priority lane ('interactive', 'normal', 'bulk'). Ex: {'show': 'interactive'}
+    POOL_SIZE = 0  # Number of hidden PROXY_CLASS widgets that the separate process keeps ready for new proxies
+    RELEASE_ON_DELETE = False  # If True delete the widget in the separate process when the proxy is garbage collected
+
+    def __init_subclass__(cls, **kwargs):
+        """Register the METHODS of the subclass by creating a compact call stub for each method index."""
+        super().__init_subclass__(**kwargs)
+        if 'METHODS' in cls.__dict__:
+            for index, name in enumerate(cls.METHODS):
+                if name not in cls.__dict__ and name not in cls.GETTERS and name not in cls.PROPERTIES:
+                    setattr(cls, name, make_compact_stub(name, index))
+
+    def __init__(self, *args, loop=None, affinity=None, **kwargs):
+        """Create the widget in a separate process.
+
+        Args:
+            *args (tuple): Arguments to create the PROXY_CLASS with.
+            loop (AppEventLoop/AppEventLoopPool)[None]: Event loop to create the widget with. Default __loop__.
+            affinity (object)[None]: Affinity group used to place the widget when the loop is an AppEventLoopPool.
+                Default AFFINITY.
+            **kwargs (dict): Keyword arguments to create the PROXY_CLASS with.
+        """
+        if loop is None:
+            loop = self.__loop__
+        if affinity is None:
+            affinity = self.AFFINITY
+
+        # Place the widget in one of the processes of a pool. All calls are sent to the owning process.
+        pool = None
+        try:
+            pool, loop = loop, loop.get_loop(type(self), affinity=affinity)
+        except AttributeError:
+            pass
+
+        self.__object_num__ = next(OBJECT_NUMBERS)
+        super().__init__(*args, loop=loop, **kwargs)
+
+        if self.RELEASE_ON_DELETE:
+            track_proxy(self, pool)
+
+    @staticmethod
+    def _call_in_process(loop, obj, method_name=None, *args, **kwargs):
+        """Call the target function in a separate process. Coalesce the call if the method is in COALESCE and send it
+        with the priority lane in PRIORITIES.
+        """
+        if loop is not None:
+            # Pushed getters do not need the proxy to return to the main process to sync
+            pe = mp_event_loop.ProxyEvent(obj, method_name, *args, has_output=not obj.PUSH_GETTERS, **kwargs)
+            coalesce_key = None
+            if method_name in obj.COALESCE:
+                coalesce_key = (obj.__proxy_id__, method_name)
+            try:
+                loop.put_event(pe, coalesce_key=coalesce_key, priority=obj.PRIORITIES.get(method_name, None))
+            except AttributeError:
+                loop.add_event(pe)  # Not an AppEventLoop
+            return True
+        return False
+
+    def mp_call_compact(self, index, method_name, args, kwargs):
+        """Send a compact call of a METHODS index to the separate process."""
+        if not self.is_mp_proxy():
+            # This is the object in the separate process
+            return getattr(self.__object__, method_name)(*args, **kwargs)
+
+        loop = self.__loop__
+        try:
+            args, kwargs = loop.share_args(args, kwargs)
+            put_event = loop.put_event
+        except AttributeError:
+            # Not an AppEventLoop. Send a normal proxy event.
+            return self._call_in_process(loop, self, method_name, *args, **kwargs)
+
+        coalesce_key = None
+        if method_name in self.COALESCE:
+            coalesce_key = (self.__proxy_id__, method_name)
+        put_event((MSG_CALL, self.__object_num__, index, args, kwargs), coalesce_key=coalesce_key,
+                  priority=self.PRIORITIES.get(method_name, None))
+
+    def batch(self):
+        """Return a context manager that sends all of the calls in the with block as one message.
+
+        All events of the proxy's event loop in this thread are collected, not only the calls of this proxy.
+        """
+        return self.__loop__.batch()
+
+    def mp_priority(self, priority):
+        """Return a context manager that sends the calls in the with block with the given priority lane.
+
+        All events of the proxy's event loop in this thread use the lane, not only the calls of this proxy. The mp_
+        prefix keeps the priority method of widgets like QAction available.
+        """
+        return self.__loop__.priority(priority)
+
+    def mp_connect(self, signal_name, callback, policy='all', interval=0.05):
+        """Call a function in the main process when a signal of the widget is emitted in the separate process.
+
+        Args:
+            signal_name (str): Name of the signal. Ex: 'clicked', 'valueChanged'.
+            callback (callable): Function that is called with the signal arguments.
+            policy (str)['all']: 'all', 'latest', 'throttle' or 'debounce'. See AppEventLoop.connect_signal.
+            interval (float)[0.05]: Seconds for the 'throttle' and 'debounce' policies.
+
+        Returns:
+            conn_id (int): Connection id to disconnect the signal with (mp_disconnect).
+        """
+        return self.__loop__.connect_signal(self, signal_name, callback, policy=policy, interval=interval)
+
+    def mp_disconnect(self, conn_id):
+        self.__loop__.disconnect_signal(conn_id)
+
+    def mp_future(self, method_name, *args, **kwargs):
+        """Call a method in the separate process and return a concurrent.futures.Future for the return value.
+
+        Args:
+            method_name (str): Name of the method to call.
+            *args (tuple): Arguments to pass into the method.
+            **kwargs (dict): Keyword arguments to pass into the method.
+        """
+        pe = mp_event_loop.ProxyEvent(self, method_name, *args, **kwargs)
+        return self.__loop__.add_future(pe, priority=self.PRIORITIES.get(method_name, None))
+
+    async def mp_async(self, method_name, *args, **kwargs):
+        """Call a method in the separate process and await the return value."""
+        return await asyncio.wrap_future(self.mp_future(method_name, *args, **kwargs))
+
+    @classmethod
+    def mp_prefill(cls, size=None, loop=None):
+        """Fill the widget pool of the PROXY_CLASS in the separate process now instead of after the first proxy.
+
+        Args:
+            size (int)[None]: Number of widgets to keep in the pool. Default POOL_SIZE.
+            loop (AppEventLoop/AppEventLoopPool)[None]: Event loop of the separate process. Default __loop__. Every
+                process of an AppEventLoopPool gets a pool.
+        """
+        if loop is None:
+            loop = cls.__loop__
+        if size is None:
+            size = cls.POOL_SIZE
+        for process_loop in getattr(loop, 'loops', [loop]):
+            process_loop.add_event(fill_widget_pool, cls.PROXY_CLASS, size, has_output=False, priority='bulk')
+
+    def mp_reset_widget(self, widget, *args, **kwargs):
+        """Prepare a pooled widget for this proxy in the separate process. Return the widget or None to construct
+        a new widget with the arguments instead.
+
+        Override this to apply the creation arguments. The default only reuses a widget for a proxy that was created
+        without arguments.
+
+        Args:
+            widget (QWidget): Hidden PROXY_CLASS widget from the pool.
+            *args (tuple): Arguments the proxy was created with.
+            **kwargs (dict): Keyword arguments the proxy was created with.
+        """
+        if args or kwargs:
+            return None
+        return widget
 
     def create_mp_object(self, *args, **kwargs):
-        obj = self.PROXY_CLASS(*args, **kwargs)
+        obj = None
+        if self.POOL_SIZE:
+            # The pool is refilled when the separate process is idle
+            pool = get_widget_pool(self.PROXY_CLASS, self.POOL_SIZE)
+            widget = pool.take()
+            if widget is not None:
+                obj = self.mp_reset_widget(widget, *args, **kwargs)
+                if obj is None:
+                    pool.give_back(widget)
+        if obj is None:
+            obj = self.PROXY_CLASS(*args, **kwargs)
         if self.SHOW_WIDGET:
             try:
                 obj.show()
             except AttributeError:
                 pass
+        if self.PUSH_GETTERS:
+            watch_object(self.__cache_id__, self.__proxy_id__, obj, self.GETTERS, self.PROPERTIES)
         return obj
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['__object_num__'] = self.__object_num__
+        return state
+
+    def __setstate__(self, state):
+        self.__object_num__ = state.get('__object_num__', None)
+        if not state.get('is_other_process', False):
+            cache_event = mp_event_loop.CacheEvent
+            cache = cache_event.get_or_register_object(state['__cache_id__'], cache_event.CACHE)
+            if state['__proxy_id__'] not in cache:
+                # The proxy was released before this output came back. There are no values to sync.
+                state = dict(state, PROPERTIES={}, GETTERS={})
+        super().__setstate__(state)
+
+        # Register the object in the separate process for compact calls
+        if self.__object__ is not None and self.__object_num__ is not None and self.METHODS:
+            register_compact_object(self.__object_num__, self.__object__, self.METHODS)
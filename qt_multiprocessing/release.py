@@ -0,0 +1,146 @@
+"""
+Release the objects of garbage collected proxies.
+
+The separate process keeps every proxied widget in its cache, so a widget lives as long as the application even after
+its proxy is gone. A WidgetProxy with RELEASE_ON_DELETE is tracked with a weakref finalizer instead of being kept alive
+by the cache of the main process. When the proxy is garbage collected its ids are queued and the event loop sends the
+ids of all collected proxies in one (MSG_RELEASE, items) message. The separate process runs the release after every
+event that was queued before it, evicts the cache, compact call and watched object entries and calls deleteLater() on
+widgets that do not have a parent (A parent owns and deletes its children).
+
+Variables that are saved with save_variables are only released by name. With max_cached_vars the separate process keeps
+the most recently used variables and releases the least recently used ones.
+"""
+import weakref
+from collections import OrderedDict
+
+from mp_event_loop import CacheEvent
+
+from .compact import unregister_compact_object
+from .getter_sync import unwatch_object
+
+
+__all__ = ['track_proxy', 'release_proxy', 'release_objects', 'delete_object', 'VariableLRU']
+
+
+def track_proxy(proxy, pool=None):
+    """Release the object of the proxy in the separate process when the proxy is garbage collected.
+
+    The cache of the main process holds the proxy with its object key. That entry is removed, so the cache does not
+    keep the proxy alive. The proxy's value dictionary stays in the cache until the release is sent, so its id cannot
+    be reused by a new proxy before the separate process evicted the old object.
+
+    Args:
+        proxy (Proxy): Proxy to track.
+        pool (AppEventLoopPool)[None]: Pool that placed the proxy. The placement is removed with the release.
+
+    Returns:
+        finalizer (weakref.finalize): Finalizer that queues the release or None if the event loop cannot release.
+    """
+    loop = proxy.__loop__
+    if not hasattr(loop, 'release'):
+        return None
+
+    cache = proxy.__cache__
+    object_key = CacheEvent.get_object_key(proxy)
+    if cache.get(object_key, None) is proxy:
+        del cache[object_key]
+
+    item = (proxy.__cache_id__, proxy.__proxy_id__, object_key, getattr(proxy, '__object_num__', None))
+    finalizer = weakref.finalize(proxy, release_proxy, loop, item, proxy.__proxy__, pool)
+    finalizer.atexit = False  # The separate process is closing anyway
+    return finalizer
+
+
+def release_proxy(loop, item, keep=None, pool=None):
+    """Queue the release of a garbage collected proxy and remove its placement from the pool."""
+    loop.release(item, keep)
+    if pool is not None:
+        pool.unplace(loop)
+
+
+def delete_object(obj):
+    """Delete a widget that does not have a parent with deleteLater.
+
+    The widget is hidden first. Deleting a visible window closes it, which quits the application when it is the last
+    window.
+    """
+    try:
+        if obj.parent() is None:
+            obj.hide()
+            obj.deleteLater()
+    except (AttributeError, RuntimeError, TypeError):
+        pass
+
+
+def release_objects(items):
+    """Evict the objects of released proxies from this (separate) process and delete the widgets.
+
+    Args:
+        items (list): (cache id, proxy id, object key, compact object number) of each released proxy.
+
+    Returns:
+        count (int): Number of objects that were found and released.
+    """
+    count = 0
+    for cache_id, proxy_id, object_key, object_num in items:
+        cache = CacheEvent.CACHE.get(cache_id, CacheEvent.CACHE)
+        obj = cache.pop(proxy_id, None)
+
+        # The object key is the id of the proxy in the main process. Only remove the entry if it is still this proxy.
+        proxy = cache.get(object_key, None)
+        try:
+            if proxy is not None and proxy.__proxy_id__ == proxy_id:
+                del cache[object_key]
+        except AttributeError:
+            pass
+
+        if object_num is not None:
+            unregister_compact_object(object_num)
+        unwatch_object(cache_id, proxy_id)
+
+        if obj is not None:
+            # The separate process also registered the object with its own id
+            obj_key = CacheEvent.get_object_key(obj)
+            if cache.get(obj_key, None) is obj:
+                del cache[obj_key]
+            delete_object(obj)
+            count += 1
+    return count
+
+
+class VariableLRU(object):
+    """Keep the most recently used variables that were saved in a cache and release the least recently used ones."""
+
+    def __init__(self, max_count):
+        """Create the LRU.
+
+        Args:
+            max_count (int): Maximum number of saved variables to keep.
+        """
+        self.max_count = int(max_count)
+        self.names = OrderedDict()  # (cache id, name): cache
+        self.evicted = 0
+
+    def touch(self, cache, name):
+        """Mark a variable as recently used."""
+        key = (id(cache), name)
+        if key in self.names:
+            self.names.move_to_end(key)
+
+    def add(self, cache, names):
+        """Add saved variable names and release the least recently used variables over max_count."""
+        for name in names:
+            key = (id(cache), name)
+            self.names[key] = cache
+            self.names.move_to_end(key)
+
+        while len(self.names) > self.max_count:
+            (_, name), old_cache = self.names.popitem(last=False)
+            obj = old_cache.pop(name, None)
+            if obj is not None:
+                delete_object(obj)
+            self.evicted += 1
+
+    def __len__(self):
+        return len(self.names)
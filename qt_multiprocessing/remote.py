@@ -0,0 +1,134 @@
+"""
+Remote runner for event loops that use a socket transport.
+
+The runner listens on a Unix domain socket or a TCP socket. Every event loop that connects gets its own process with a
+QApplication, so the runner keeps serving while event loops come and go. Run it on the host or display that should show
+the widgets. The modules of the main process (initialize_process, PROXY_CLASS widgets) must be importable.
+
+Connections must pass the authkey handshake before anything is unpickled. The runner reads the authkey from the
+QT_MP_AUTHKEY environment variable or generates one and prints it. Anyone with the authkey can run code in the runner,
+so bind to 127.0.0.1 or a Unix socket and use an ssh tunnel (ssh -L 8765:127.0.0.1:8765 display-node) for other hosts.
+
+.. code-block:: bash
+
+    QT_MP_AUTHKEY=secret DISPLAY=:1 python -m qt_multiprocessing.remote tcp://127.0.0.1:8765
+    QT_MP_AUTHKEY=secret python -m qt_multiprocessing.remote unix:///tmp/qt_mp.sock --once
+"""
+import os
+import sys
+import socket
+import pickle
+import argparse
+import multiprocessing as mp
+
+from .utils import print_exception
+from .transport import HELLO, AUTHKEY_ENV, parse_address, create_listener, recv_frame, get_authkey, \
+    deliver_challenge, answer_challenge, SocketConnection, SocketQueue
+from .qt_mp_event_loop import AppEventLoop
+
+
+__all__ = ['run_session', 'serve', 'main']
+
+
+def run_session(sock, hello, target=None):
+    """Run the event loop of a connected session until the main process closes it.
+
+    Args:
+        sock (socket.socket): Connected socket that passed the authkey handshake.
+        hello (bytes): Pickled HELLO frame payload with the name, options and initialize_process of the event loop.
+        target (function)[None]: Function that runs the event loop. Default AppEventLoop.run_event_loop.
+    """
+    if target is None:
+        target = AppEventLoop.run_event_loop
+
+    try:
+        hello = pickle.loads(hello)
+    except Exception as err:
+        print_exception(err, 'Could not read the session request! Can the runner import the modules of the main '
+                             'process?')
+        sock.close()
+        return
+
+    connection = SocketConnection(sock, name=hello.get('name', 'main'))
+    event_queue = SocketQueue(connection, incoming=True)
+    consumer_queue = SocketQueue(connection) if hello.get('has_results', True) else None
+    try:
+        target(connection.alive, event_queue, consumer_queue, initialize_process=hello.get('initialize_process'),
+               **hello.get('options', {}))
+    finally:
+        connection.close()
+
+
+def serve(address, authkey=None, once=False, target=None, auth_timeout=10):
+    """Accept event loop sessions on an address and run each session in a new process.
+
+    Args:
+        address (str/tuple): 'tcp://host:port', 'unix:///path/to/socket', (host, port) or a socket path.
+        authkey (bytes/str)[None]: Key that the main processes must know. None uses QT_MP_AUTHKEY.
+        once (bool)[False]: If True run the first session in this process and return when it closes.
+        target (function)[None]: Function that runs the event loop. Default AppEventLoop.run_event_loop.
+        auth_timeout (float)[10]: Seconds a new connection has to pass the handshake and send HELLO.
+    """
+    authkey = get_authkey(authkey)
+    listener = create_listener(address)
+    print('Serving Qt event loops on {}'.format(address), file=sys.stderr)
+    try:
+        while True:
+            sock, _ = listener.accept()
+            try:
+                # Nothing is unpickled before the other side proved that it has the authkey
+                sock.settimeout(auth_timeout)
+                deliver_challenge(sock, authkey)
+                answer_challenge(sock, authkey)
+                kind, hello = recv_frame(sock)
+                if kind != HELLO:
+                    raise ValueError('The first frame of a session must be HELLO!')
+                sock.settimeout(None)
+            except Exception as err:
+                print_exception(err, 'Invalid session request!')
+                sock.close()
+                continue
+
+            if once:
+                listener.close()
+                run_session(sock, bytes(hello), target)
+                return
+
+            proc = mp.Process(target=run_session, args=(sock, bytes(hello), target), name='RemoteEventLoop')
+            proc.daemon = True
+            proc.start()
+            sock.close()  # The session process owns the connection
+    finally:
+        listener.close()
+        family, addr = parse_address(address)
+        if family == socket.AF_UNIX:
+            try:
+                os.unlink(addr)
+            except OSError:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m qt_multiprocessing.remote',
+                                     description='Run the Qt event loops of remote main processes. The authkey is '
+                                                 'read from the {} environment variable.'.format(AUTHKEY_ENV))
+    parser.add_argument('address', help="'tcp://host:port' or 'unix:///path/to/socket'")
+    parser.add_argument('--once', action='store_true', help='Run one session in this process and exit.')
+    parser.add_argument('--path', action='append', default=[],
+                        help='Directory to add to sys.path, so the modules of the main process can be imported.')
+    args = parser.parse_args(argv)
+
+    authkey = os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        authkey = os.urandom(16).hex()
+        print('Generated the authkey. Use {}={} in the main process.'.format(AUTHKEY_ENV, authkey), file=sys.stderr)
+
+    sys.path[:0] = [os.path.abspath(path) for path in args.path]
+    try:
+        serve(args.address, authkey=authkey, once=args.once)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""
+Pass large buffers (bytes, bytearray, memoryview, numpy arrays) to the separate process with shared memory.
+
+The main process copies a large argument into a reusable shared memory segment and only sends a small SharedBuffer
+handle through the event queue. The separate process maps the segment without copying and passes a memoryview or numpy
+array into the target function. When the event completes the segment is marked free and the main process reuses it.
+
+The first byte of every segment is a state flag (free/busy) which is shared by both processes, so no extra messages are
+needed to return a segment to the pool.
+
+Warning:
+    The mapped buffer is only valid while the event runs. Copy the data if the widget needs to keep it.
+"""
+import threading
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+__all__ = ['SharedBuffer', 'SharedBufferPool', 'map_shared_buffers', 'release_shared_buffers', 'attach_segment',
+           'detach_segment']
+
+
+SEGMENT_FREE = 0
+SEGMENT_BUSY = 1
+HEADER_SIZE = 64  # Keep the data aligned for numpy
+MIN_SEGMENT_SIZE = 64 * 1024
+
+ATTACHED_SEGMENTS = {}  # Segments that this process attached to by name
+
+
+def attach_segment(name):
+    """Attach to an existing shared memory segment by name. Segments are only attached once in a process."""
+    try:
+        return ATTACHED_SEGMENTS[name]
+    except KeyError:
+        pass
+
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            # The main process owns and unlinks the segment. Do not let this process' resource tracker unlink it.
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except (ImportError, AttributeError, KeyError):
+            pass
+    ATTACHED_SEGMENTS[name] = shm
+    return shm
+
+
+def detach_segment(name):
+    """Close a segment that this process attached to and forget it. Call this when nothing uses the segment anymore."""
+    shm = ATTACHED_SEGMENTS.pop(name, None)
+    if shm is not None:
+        try:
+            shm.close()
+        except (OSError, BufferError):
+            pass  # Something still uses the buffer. The mapping is closed when the object is garbage collected.
+
+
+class SharedBuffer(object):
+    """Handle for a buffer that lives in a shared memory segment."""
+
+    def __init__(self, name, nbytes, kind='bytes', dtype=None, shape=None):
+        """Create the handle.
+
+        Args:
+            name (str): Shared memory segment name.
+            nbytes (int): Number of bytes used by the buffer.
+            kind (str)['bytes']: 'bytes' maps a memoryview. 'numpy' maps a numpy array.
+            dtype (str)[None]: Numpy dtype string.
+            shape (tuple)[None]: Numpy array shape.
+        """
+        self.name = name
+        self.nbytes = nbytes
+        self.kind = kind
+        self.dtype = dtype
+        self.shape = shape
+        self._view = None
+
+    def map(self):
+        """Return a memoryview or numpy array of the shared memory without copying."""
+        shm = attach_segment(self.name)
+        if self.kind == 'numpy':
+            self._view = numpy.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf, offset=HEADER_SIZE)
+        else:
+            self._view = shm.buf[HEADER_SIZE: HEADER_SIZE + self.nbytes]
+        return self._view
+
+    def release(self):
+        """Release the mapped view and mark the segment as free, so the main process can reuse it."""
+        view, self._view = self._view, None
+        if isinstance(view, memoryview):
+            try:
+                view.release()
+            except BufferError:
+                pass  # Something still uses the view. The segment is still released for reuse.
+        try:
+            attach_segment(self.name).buf[0] = SEGMENT_FREE
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def __getstate__(self):
+        return {'name': self.name, 'nbytes': self.nbytes, 'kind': self.kind, 'dtype': self.dtype,
+                'shape': self.shape}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __repr__(self):
+        return '<{} {} nbytes={}>'.format(self.__class__.__name__, self.name, self.nbytes)
+
+
+class SharedBufferPool(object):
+    """Reusable shared memory segments for large event arguments in the main process."""
+
+    def __init__(self, threshold=1024 * 1024, max_segments=32):
+        """Create the pool.
+
+        Args:
+            threshold (int)[1048576]: Arguments with at least this many bytes are sent with shared memory.
+            max_segments (int)[32]: Maximum number of segments. Arguments are pickled normally when every segment is
+                busy and no more segments can be created.
+        """
+        if shared_memory is None:
+            raise RuntimeError('Shared memory requires multiprocessing.shared_memory (Python 3.8+)!')
+        self.threshold = threshold
+        self.max_segments = max_segments
+        self.segments = []
+        self.lock = threading.Lock()
+
+    def acquire(self, nbytes):
+        """Return a free segment with at least nbytes of data marked as busy or None if no segment is available."""
+        with self.lock:
+            free = [shm for shm in self.segments
+                    if shm.buf[0] == SEGMENT_FREE and shm.size - HEADER_SIZE >= nbytes]
+            if free:
+                shm = min(free, key=lambda s: s.size)
+            elif self.max_segments is None or len(self.segments) < self.max_segments:
+                size = MIN_SEGMENT_SIZE
+                while size - HEADER_SIZE < nbytes:
+                    size *= 2
+                shm = shared_memory.SharedMemory(create=True, size=size)
+                self.segments.append(shm)
+            else:
+                return None
+
+            shm.buf[0] = SEGMENT_BUSY
+            return shm
+
+    def share(self, value):
+        """Copy a large buffer into shared memory and return a SharedBuffer handle. Return other values unchanged."""
+        if numpy is not None and isinstance(value, numpy.ndarray):
+            if value.nbytes < self.threshold or value.dtype.hasobject:
+                return value
+            shm = self.acquire(value.nbytes)
+            if shm is None:
+                return value
+            numpy.ndarray(value.shape, dtype=value.dtype, buffer=shm.buf, offset=HEADER_SIZE)[...] = value
+            return SharedBuffer(shm.name, value.nbytes, 'numpy', value.dtype.str, value.shape)
+
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            try:
+                data = memoryview(value).cast('B')
+            except TypeError:
+                return value  # Not contiguous
+            if data.nbytes < self.threshold:
+                return value
+            shm = self.acquire(data.nbytes)
+            if shm is None:
+                return value
+            shm.buf[HEADER_SIZE: HEADER_SIZE + data.nbytes] = data
+            return SharedBuffer(shm.name, data.nbytes)
+
+        return value
+
+    def share_args(self, args, kwargs):
+        """Return the args and kwargs with the large arguments replaced by SharedBuffer handles."""
+        return tuple(self.share(arg) for arg in args), {key: self.share(val) for key, val in kwargs.items()}
+
+    def share_event(self, event):
+        """Replace the large arguments of an event with SharedBuffer handles."""
+        try:
+            event.args, event.kwargs = self.share_args(event.args, event.kwargs)
+        except AttributeError:
+            pass
+        return event
+
+    def discard_event(self, event):
+        """Mark the segments of an event that will never be sent as free."""
+        try:
+            self.discard_args(event.args, event.kwargs)
+        except AttributeError:
+            pass
+
+    def discard_args(self, args, kwargs):
+        """Mark the segments of arguments that will never be sent as free."""
+        values = list(args) + list(kwargs.values())
+        names = {value.name for value in values if isinstance(value, SharedBuffer)}
+        with self.lock:
+            for shm in self.segments:
+                if shm.name in names:
+                    shm.buf[0] = SEGMENT_FREE
+
+    def close(self):
+        """Close and remove all of the shared memory segments."""
+        with self.lock:
+            segments, self.segments = self.segments, []
+        for shm in segments:
+            try:
+                shm.close()
+                shm.unlink()
+            except (OSError, BufferError):
+                pass
+
+
+def map_shared_buffers(event):
+    """Replace the SharedBuffer handles in the event arguments with mapped buffers. Return the handles."""
+    handles = []
+    try:
+        if any(isinstance(arg, SharedBuffer) for arg in event.args):
+            handles.extend(arg for arg in event.args if isinstance(arg, SharedBuffer))
+            event.args = tuple(arg.map() if isinstance(arg, SharedBuffer) else arg for arg in event.args)
+        if any(isinstance(val, SharedBuffer) for val in event.kwargs.values()):
+            handles.extend(val for val in event.kwargs.values() if isinstance(val, SharedBuffer))
+            event.kwargs = {key: val.map() if isinstance(val, SharedBuffer) else val
+                            for key, val in event.kwargs.items()}
+    except AttributeError:
+        pass
+    return handles
+
+
+def release_shared_buffers(event, handles):
+    """Put the SharedBuffer handles back into the event arguments and release the segments for reuse."""
+    if not handles:
+        return
+    views = {id(handle._view): handle for handle in handles}
+    event.args = tuple(views.get(id(arg), arg) for arg in event.args)
+    event.kwargs = {key: views.get(id(val), val) for key, val in event.kwargs.items()}
+    for handle in handles:
+        handle.release()
@@ -0,0 +1,161 @@
+"""
+Forward Qt signals of objects in the separate process to callables in the main process.
+
+AppEventLoop.connect_signal connects a signal of a proxied widget or a saved variable in the separate process. Every
+emission is recorded by a ForwardedSignal and all recorded emissions are sent back in one SignalBatchEvent per tick. The
+main process calls the callback with the signal arguments (On the GUI thread with output_dispatch='qt').
+
+A policy limits chatty signals like valueChanged:
+
+  * 'all' - Send every emission. The emissions of a tick are sent in one message.
+  * 'latest' - Only send the last emission of each tick.
+  * 'throttle' - Send the last emission at most once every interval seconds.
+  * 'debounce' - Send the last emission after the signal was quiet for interval seconds.
+"""
+import time
+import pickle
+import itertools
+
+from mp_event_loop import Event, CacheEvent, Proxy
+
+from .utils import print_exception
+
+
+__all__ = ['SIGNAL_POLICIES', 'ForwardedSignal', 'SignalBatchEvent', 'forward_signal', 'unforward_signal',
+           'collect_signal_emissions']
+
+
+SIGNAL_POLICIES = ('all', 'latest', 'throttle', 'debounce')
+PLAIN_TYPES = (type(None), bool, int, float, complex, str, bytes)
+
+FORWARDED = {}  # Connection id: ForwardedSignal for the signals in this (separate) process
+CONNECTION_IDS = itertools.count(1)  # Connection ids given to callbacks in the main process
+
+
+def get_signal_policy(policy):
+    """Return the signal policy name or raise a ValueError."""
+    if policy not in SIGNAL_POLICIES:
+        raise ValueError('Invalid signal policy {}! Use one of {}'.format(repr(policy), SIGNAL_POLICIES))
+    return policy
+
+
+def make_picklable(value):
+    """Return the value or its repr if it cannot be sent to the main process (Ex: QModelIndex)."""
+    if isinstance(value, PLAIN_TYPES):
+        return value
+    try:
+        pickle.dumps(value)
+        return value
+    except Exception:
+        return repr(value)
+
+
+class ForwardedSignal(object):
+    """Record the emissions of a signal in the separate process."""
+
+    def __init__(self, conn_id, obj, signal_name, policy='all', interval=0.05):
+        """Connect to the signal.
+
+        Args:
+            conn_id (int): Connection id of the callback in the main process.
+            obj (QObject): Object that lives in this process.
+            signal_name (str): Name of the signal attribute. Ex: 'clicked', 'valueChanged'.
+            policy (str)['all']: 'all', 'latest', 'throttle' or 'debounce'.
+            interval (float)[0.05]: Seconds for the 'throttle' and 'debounce' policies.
+        """
+        self.conn_id = conn_id
+        self.policy = get_signal_policy(policy)
+        self.interval = interval
+        self.pending = []
+        self.emitted = 0
+        self.last_emit = 0
+        self.last_sent = 0
+
+        self.signal = getattr(obj, signal_name)
+        self.signal.connect(self.record)
+
+    def record(self, *args):
+        self.emitted += 1
+        self.last_emit = time.perf_counter()
+        if self.policy == 'all':
+            self.pending.append(args)
+        else:
+            self.pending = [args]
+
+    def take(self, now=None):
+        """Return the emissions that should be sent now or None."""
+        if not self.pending:
+            return None
+        if now is None:
+            now = time.perf_counter()
+        if self.policy == 'throttle' and now - self.last_sent < self.interval:
+            return None
+        elif self.policy == 'debounce' and now - self.last_emit < self.interval:
+            return None
+
+        emissions, self.pending = self.pending, []
+        self.last_sent = now
+        return [tuple(make_picklable(arg) for arg in args) for args in emissions]
+
+    def disconnect(self):
+        try:
+            self.signal.disconnect(self.record)
+        except (RuntimeError, TypeError):
+            pass
+
+
+def forward_signal(conn_id, source, signal_name, policy='all', interval=0.05, cache_id=None):
+    """Connect a signal in this (separate) process. This runs as an event.
+
+    Args:
+        conn_id (int): Connection id of the callback in the main process.
+        source (str/Proxy/QObject): Variable name, proxy or object with the signal.
+        signal_name (str): Name of the signal attribute.
+        policy (str)['all']: 'all', 'latest', 'throttle' or 'debounce'.
+        interval (float)[0.05]: Seconds for the 'throttle' and 'debounce' policies.
+        cache_id (str)[None]: Id of the cache that has the variable name.
+    """
+    obj = source
+    if isinstance(source, str):
+        cache = CacheEvent.CACHE.get(cache_id, CacheEvent.CACHE)
+        obj = cache.get(source, None)
+    if isinstance(obj, Proxy):
+        obj = obj.__object__
+
+    unforward_signal(conn_id)
+    try:
+        forwarded = FORWARDED[conn_id] = ForwardedSignal(conn_id, obj, signal_name, policy, interval)
+    except (AttributeError, RuntimeError, TypeError, ValueError) as err:
+        print_exception(err, 'Could not forward the signal {} of {}'.format(repr(signal_name), repr(source)))
+        return None
+    try:
+        obj.destroyed.connect(lambda *args: FORWARDED.pop(conn_id, None))
+    except (AttributeError, RuntimeError, TypeError):
+        pass
+    return forwarded.conn_id
+
+
+def unforward_signal(conn_id):
+    """Disconnect a forwarded signal in this (separate) process."""
+    forwarded = FORWARDED.pop(conn_id, None)
+    if forwarded is not None:
+        forwarded.disconnect()
+
+
+def collect_signal_emissions():
+    """Return {connection id: [signal args]} of the emissions that should be sent now."""
+    emitted = {}
+    now = time.perf_counter()
+    for conn_id, forwarded in list(FORWARDED.items()):
+        emissions = forwarded.take(now)
+        if emissions:
+            emitted[conn_id] = emissions
+    return emitted
+
+
+class SignalBatchEvent(Event):
+    """Output event with the signal emissions of a tick. The main process calls the connected callbacks."""
+
+    def __init__(self, emitted=None):
+        super().__init__(None, has_output=True)
+        self.results = emitted or {}
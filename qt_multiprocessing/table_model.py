@@ -0,0 +1,356 @@
+"""
+Virtualized table model for large tables in the separate process.
+
+Sending a whole dataset to a QTableView in the separate process pickles every row, even the rows that are never shown.
+A TableModelProxy keeps the rows in the main process and creates a RemoteTableModel in the separate process that only
+holds the blocks of rows that the view asked for:
+
+  * The model reports a row count that grows with canFetchMore/fetchMore, so a view only lays out what it can reach.
+  * data() for a row that is not loaded requests its block. The requests of an event loop iteration are forwarded to
+    the main process in one signal emission and the main process answers with the block rows.
+  * The least recently used blocks are evicted, so memory in the separate process scales with the viewport.
+  * Appending, inserting, updating or removing rows sends a small delta. Updates only send the rows of the blocks that
+    the separate process holds.
+
+.. code-block:: python
+
+    model = qt_multiprocessing.TableModelProxy(['Time', 'Level', 'Message'])
+    view = TableViewProxy()
+    model.mp_set_view(view)
+    model.mp_append_rows(log_rows)
+"""
+import weakref
+import threading
+from collections import OrderedDict
+
+from qtpy import QtCore
+
+from mp_event_loop import CacheEvent, Proxy
+
+from .qt_proxy import WidgetProxy
+
+
+__all__ = ['RemoteTableModel', 'TableModelProxy', 'set_view_model']
+
+
+def get_object(obj, cache_id=None):
+    """Return the object of a proxy or a variable name in the separate process.
+
+    Args:
+        obj (str/Proxy/object): Variable name, proxy or object.
+        cache_id (str)[None]: Id of the cache that has the variable name.
+    """
+    if isinstance(obj, str):
+        cache = CacheEvent.CACHE.get(cache_id, CacheEvent.CACHE)
+        obj = cache.get(obj, None)
+    if isinstance(obj, Proxy):
+        obj = obj.__object__
+    return obj
+
+
+def set_view_model(view, model, cache_id=None):
+    """Set the model of a view in the separate process. The view and model may be proxies or variable names."""
+    get_object(view, cache_id).setModel(get_object(model, cache_id))
+
+
+class RemoteTableModel(QtCore.QAbstractTableModel):
+    """Table model in the separate process that loads blocks of rows from the main process when they are shown."""
+
+    blocks_requested = QtCore.Signal(object, object)  # Block indexes to load, block indexes that were evicted
+
+    def __init__(self, headers=None, total=0, block_size=256, max_blocks=64, fetch_size=10000, parent=None):
+        """Create the model.
+
+        Args:
+            headers (list)[None]: Column names.
+            total (int)[0]: Number of rows in the main process.
+            block_size (int)[256]: Number of rows in a block.
+            max_blocks (int)[64]: Maximum number of blocks to keep. The least recently used blocks are evicted.
+            fetch_size (int)[10000]: Number of rows that fetchMore adds to the row count.
+            parent (QObject)[None]: Parent object.
+        """
+        super().__init__(parent)
+        self.headers = list(headers or [])
+        self.total = total
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.fetch_size = fetch_size
+        self.fetched = min(total, fetch_size)  # Row count that the view sees
+
+        self.blocks = OrderedDict()  # Block index: rows
+        self.requested = set()  # Blocks that were requested and not received
+        self.pending = []  # Blocks to request on the next emission
+        self.evicted = []  # Blocks that were evicted since the last emission
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.fetched
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and self.fetched < self.total
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        count = min(self.fetch_size, self.total - self.fetched)
+        if parent.isValid() or count <= 0:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self.fetched, self.fetched + count - 1)
+        self.fetched += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole and 0 <= section < len(self.headers):
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role not in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return None
+        row = self.get_row(index.row())
+        try:
+            return row[index.column()]
+        except (IndexError, KeyError, TypeError):
+            return None  # Not loaded yet
+
+    def get_row(self, row):
+        """Return the values of a loaded row or request its block and return None."""
+        block, offset = divmod(row, self.block_size)
+        try:
+            rows = self.blocks[block]
+        except KeyError:
+            self.request_block(block)
+            return None
+        self.blocks.move_to_end(block)
+        try:
+            return rows[offset]
+        except IndexError:
+            return None
+
+    def request_block(self, block):
+        """Request a block of rows from the main process. Requests are sent once per event loop iteration."""
+        if block in self.requested:
+            return
+        self.requested.add(block)
+        if not self.pending:
+            QtCore.QTimer.singleShot(0, self.send_requests)
+        self.pending.append(block)
+
+    def send_requests(self):
+        pending, self.pending = self.pending, []
+        evicted, self.evicted = self.evicted, []
+        if pending or evicted:
+            self.blocks_requested.emit(pending, evicted)
+
+    def emit_rows_changed(self, first, last):
+        """Emit dataChanged for the rows that the view sees."""
+        last = min(last, self.fetched - 1)
+        if first <= last and self.headers:
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(self.headers) - 1))
+
+    def set_block(self, block, rows):
+        """Store the rows of a requested block."""
+        self.requested.discard(block)
+        start = block * self.block_size
+        if start >= self.total:
+            return
+        self.blocks[block] = list(rows)
+        self.blocks.move_to_end(block)
+        while len(self.blocks) > self.max_blocks:
+            old_block, _ = self.blocks.popitem(last=False)
+            self.evicted.append(old_block)
+        if self.evicted and not self.pending:
+            QtCore.QTimer.singleShot(0, self.send_requests)
+        self.emit_rows_changed(start, start + len(rows) - 1)
+
+    def invalidate_blocks(self, block, rows=None):
+        """Drop the blocks after a block whose rows moved and replace the rows of the block if it is loaded.
+
+        The main process drops the same blocks, so the blocks are not reported as evicted.
+        """
+        for index in [index for index in self.blocks if index > block]:
+            del self.blocks[index]
+        if rows is None:
+            self.blocks.pop(block, None)
+        elif block in self.blocks:
+            self.blocks[block] = list(rows)
+
+    def insert_rows(self, row, count, total, block_rows=None):
+        """Rows were inserted in the main process.
+
+        Args:
+            row (int): Index of the first inserted row.
+            count (int): Number of inserted rows.
+            total (int): Number of rows in the main process.
+            block_rows (list)[None]: Rows of the block with the first inserted row if it was sent to this process.
+        """
+        self.invalidate_blocks(row // self.block_size, block_rows)
+        old_total, self.total = self.total, total
+        if count > 0 and (row < self.fetched or self.fetched == old_total):
+            # At most fetch_size new rows are shown. fetchMore adds the rest when the view scrolls to them.
+            shown = min(count, self.fetch_size)
+            moved = row < self.fetched
+            self.beginInsertRows(QtCore.QModelIndex(), row, row + shown - 1)
+            self.fetched += shown
+            self.endInsertRows()
+            if moved and shown < count:
+                self.emit_rows_changed(row + shown, self.fetched - 1)  # The rows after them moved down
+
+    def remove_rows(self, row, count, total, block_rows=None):
+        """Rows were removed in the main process. The arguments are the same as insert_rows."""
+        self.invalidate_blocks(row // self.block_size, block_rows)
+        self.total = total
+        visible = min(row + count, self.fetched) - row
+        if visible > 0:
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row + visible - 1)
+            self.fetched -= visible
+            self.endRemoveRows()
+        self.fetched = min(self.fetched, self.total)
+
+    def update_rows(self, row, rows):
+        """Rows were changed in the main process. Only the rows of loaded blocks are sent."""
+        for i, values in enumerate(rows):
+            block, offset = divmod(row + i, self.block_size)
+            try:
+                self.blocks[block][offset] = values
+            except (KeyError, IndexError):
+                pass
+        self.emit_rows_changed(row, row + len(rows) - 1)
+
+    def reset_rows(self, total):
+        """All rows were replaced in the main process."""
+        self.beginResetModel()
+        self.blocks.clear()
+        self.requested.clear()
+        self.pending = []
+        self.evicted = []
+        self.total = total
+        self.fetched = min(total, self.fetch_size)
+        self.endResetModel()
+
+    def set_headers(self, headers):
+        self.beginResetModel()
+        self.headers = list(headers or [])
+        self.endResetModel()
+
+
+class TableModelProxy(WidgetProxy):
+    """Proxy for a RemoteTableModel. The rows live in the main process and are sent in blocks when they are shown."""
+
+    SLOTS = WidgetProxy.SLOTS + ['__rows__', '__sent_blocks__', '__rows_lock__', '__conn_id__']
+
+    PROXY_CLASS = RemoteTableModel
+    SHOW_WIDGET = False
+    METHODS = ['set_block', 'insert_rows', 'remove_rows', 'update_rows', 'reset_rows', 'set_headers']
+
+    BLOCK_SIZE = 256  # Rows sent in a block
+    MAX_BLOCKS = 64  # Blocks the separate process keeps
+    FETCH_SIZE = 10000  # Rows that fetchMore adds to the row count of the view
+
+    def __init__(self, headers=None, rows=None, loop=None, affinity=None):
+        """Create the model in the separate process.
+
+        Args:
+            headers (list)[None]: Column names.
+            rows (list)[None]: Initial rows. Each row is a sequence of column values.
+            loop (AppEventLoop/AppEventLoopPool)[None]: Event loop to create the model with. Default __loop__.
+            affinity (object)[None]: Affinity group used to place the model when the loop is an AppEventLoopPool. Use
+                the affinity of the view, so both live in the same process.
+        """
+        self.__rows__ = list(rows or [])
+        self.__sent_blocks__ = set()  # Blocks that the separate process holds
+        self.__rows_lock__ = threading.RLock()
+        super().__init__(list(headers or []), len(self.__rows__), self.BLOCK_SIZE, self.MAX_BLOCKS, self.FETCH_SIZE,
+                         loop=loop, affinity=affinity)
+
+        # The signal handler must not keep the proxy alive
+        ref = weakref.WeakMethod(self.send_blocks)
+
+        def send_blocks(blocks, evicted):
+            method = ref()
+            if method is not None:
+                method(blocks, evicted)
+
+        self.__conn_id__ = self.mp_connect('blocks_requested', send_blocks)
+        weakref.finalize(self, self.__loop__.signal_handlers.pop, self.__conn_id__, None)
+
+    def send_blocks(self, blocks, evicted):
+        """Send the rows of the requested blocks in one message."""
+        size = self.BLOCK_SIZE
+        with self.__rows_lock__:
+            self.__sent_blocks__.difference_update(evicted)
+            with self.batch():
+                for block in blocks:
+                    self.set_block(block, self.__rows__[block * size: (block + 1) * size])
+                    self.__sent_blocks__.add(block)
+
+    def _moved_block_rows(self, row):
+        """Drop the sent blocks after the block of a moved row and return the rows of the block if it was sent."""
+        block = row // self.BLOCK_SIZE
+        self.__sent_blocks__ = {index for index in self.__sent_blocks__ if index <= block}
+        if block in self.__sent_blocks__:
+            return self.__rows__[block * self.BLOCK_SIZE: (block + 1) * self.BLOCK_SIZE]
+        return None
+
+    def mp_row_count(self):
+        return len(self.__rows__)
+
+    def mp_get_row(self, row):
+        return self.__rows__[row]
+
+    def mp_set_view(self, view):
+        """Set this model on a view proxy or view variable name in the separate process."""
+        self.__loop__.add_event(set_view_model, view, self, CacheEvent.get_object_key(self.__loop__.cache),
+                                has_output=False)
+
+    def mp_set_headers(self, headers):
+        self.set_headers(list(headers))
+
+    def mp_set_rows(self, rows):
+        """Replace all of the rows."""
+        with self.__rows_lock__:
+            self.__rows__ = list(rows)
+            self.__sent_blocks__ = set()
+            self.reset_rows(len(self.__rows__))
+
+    def mp_append_rows(self, rows):
+        """Add rows to the end of the table."""
+        with self.__rows_lock__:
+            self.mp_insert_rows(len(self.__rows__), rows)
+
+    def mp_insert_rows(self, row, rows):
+        """Insert rows before the given row index."""
+        rows = list(rows)
+        if not rows:
+            return
+        with self.__rows_lock__:
+            row = min(max(row, 0), len(self.__rows__))
+            self.__rows__[row:row] = rows
+            self.insert_rows(row, len(rows), len(self.__rows__), self._moved_block_rows(row))
+
+    def mp_remove_rows(self, row, count=1):
+        """Remove count rows starting at the given row index."""
+        with self.__rows_lock__:
+            row = min(max(row, 0), len(self.__rows__))
+            count = min(count, len(self.__rows__) - row)
+            if count <= 0:
+                return
+            del self.__rows__[row: row + count]
+            self.remove_rows(row, count, len(self.__rows__), self._moved_block_rows(row))
+
+    def mp_update_rows(self, row, rows):
+        """Replace the values of the rows starting at the given row index. Only loaded rows are sent."""
+        size = self.BLOCK_SIZE
+        with self.__rows_lock__:
+            rows = list(rows)[:max(len(self.__rows__) - row, 0)]
+            self.__rows__[row: row + len(rows)] = rows
+
+            # Send the runs of rows that are in the sent blocks
+            start = row
+            end = row + len(rows)
+            while start < end:
+                block = start // size
+                block_end = min((block + 1) * size, end)
+                if block in self.__sent_blocks__:
+                    self.update_rows(start, self.__rows__[start: block_end])
+                start = block_end
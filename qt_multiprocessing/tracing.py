@@ -0,0 +1,227 @@
+"""
+Trace the lifecycle of events across the main process and the separate process.
+
+With trace=True every message that is put on the event queue gets a trace id in its envelope header. Each process records
+time.perf_counter() timestamps of the phases that it sees:
+
+  * 'pickle' - Main process. Pickling the message in the feeder thread of the queue (See compact.LazyMessage).
+  * 'queued' - From the put in the main process until the separate process read it off of the event queue.
+  * 'waiting' - From the read until the event ran (Priority lanes and QtEventQueueManager ticks).
+  * 'exec' - Running the event on the Qt thread of the separate process.
+  * 'output' - From putting the output event on the consumer queue until the main process received it. Only events with
+    an event_key (futures, key handlers) are matched.
+
+The separate process also records its ticks. Its records are pushed to the main process with the metrics snapshots and
+collected when the trace is exported. The clock offset between the processes is measured with round trips, so both
+timelines are aligned. export_trace writes Chrome trace / Perfetto JSON (chrome://tracing or ui.perfetto.dev).
+
+When tracing is disabled the only cost is a None check for each message.
+"""
+import os
+import json
+import time
+import itertools
+import threading
+from collections import deque, OrderedDict
+
+from mp_event_loop import Event
+
+from .metrics import get_event_name
+from .compact import read_message
+
+
+__all__ = ['TraceBuffer', 'TraceEvent', 'EventTracer', 'take_trace_records', 'get_trace_time']
+
+
+FLOW_SCOPE_SIZE = 2 ** 32  # Flow ids of a trace are flow_scope * FLOW_SCOPE_SIZE + trace id
+
+
+def get_trace_time():
+    """Return the trace clock of this process. Run this as an event to measure the clock offset."""
+    return time.perf_counter()
+
+
+class TraceBuffer(object):
+    """Trace records of the separate process."""
+
+    def __init__(self, max_records=100000):
+        self.events = deque(maxlen=max_records)  # (trace id, name, lane, dequeued, start, end, has_output)
+        self.ticks = deque(maxlen=max_records)  # (start, end, count)
+
+    def add_event(self, header, event, start, end):
+        """Record an event that ran. The header has the 'trace' id and the 'dequeued' time."""
+        if isinstance(event, tuple):
+            event = read_message(event)
+        self.events.append((header.get('trace'), get_event_name(event), header.get('lane'), header.get('dequeued'),
+                            start, end, bool(getattr(event, 'has_output', False))))
+
+    def add_tick(self, start, end, count):
+        self.ticks.append((start, end, count))
+
+    def take(self):
+        """Remove and return the records as {'pid', 'events', 'ticks'}."""
+        events = [self.events.popleft() for _ in range(len(self.events))]
+        ticks = [self.ticks.popleft() for _ in range(len(self.ticks))]
+        return {'pid': os.getpid(), 'events': events, 'ticks': ticks}
+
+    def __len__(self):
+        return len(self.events) + len(self.ticks)
+
+
+PROCESS_TRACE = TraceBuffer()  # Trace records of this (separate) process
+
+
+def take_trace_records():
+    """Return and clear the trace records of the separate process. Run this as an event to collect the trace."""
+    return PROCESS_TRACE.take()
+
+
+class TraceEvent(Event):
+    """Output event with the trace records that the separate process pushes to the main process."""
+
+    def __init__(self, records=None):
+        super().__init__(None, has_output=True)
+        self.results = records
+
+
+def to_us(seconds):
+    return round(seconds * 1e6, 3)
+
+
+class EventTracer(object):
+    """Trace records of the main process. Merges the records of the separate process and exports them."""
+
+    def __init__(self, max_records=100000):
+        self.max_records = max_records
+        self.sent = OrderedDict()  # Trace id: [put, (pickle start, pickle end), lane, received]
+        self.keys = {}  # Event key: trace id of events with output
+        self.remote_events = deque(maxlen=max_records)
+        self.remote_ticks = deque(maxlen=max_records)
+        self.remote_pid = None
+        self.offset = None  # Seconds to add to the separate process' clock to get this process' clock
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def trace_put(self, message, lane):
+        """Record a message that is put on the queue. Return the trace id for its header.
+
+        The queue pickles the message later. Pass the trace id to trace_pickle to record the pickling time.
+        """
+        put = time.perf_counter()
+        trace_id = next(self.ids)
+        key = getattr(message, 'event_key', None)
+        with self.lock:
+            self.sent[trace_id] = [put, None, lane, None]
+            if key is not None:
+                self.keys[key] = trace_id
+            while len(self.sent) > self.max_records:
+                self.sent.popitem(last=False)
+        return trace_id
+
+    def trace_pickle(self, trace_id, start, end):
+        """Record the perf_counter start and end time of pickling a message. Called in the feeder thread."""
+        with self.lock:
+            try:
+                self.sent[trace_id][1] = (start, end)
+            except KeyError:
+                pass
+
+    def trace_output(self, event):
+        """Record when the output of a traced event was received."""
+        key = getattr(event, 'event_key', None)
+        if key is None or not self.keys:
+            return
+        with self.lock:
+            trace_id = self.keys.pop(key, None)
+            try:
+                self.sent[trace_id][3] = time.perf_counter()
+            except KeyError:
+                pass
+
+    def add_records(self, records):
+        """Add the records of the separate process."""
+        if not records:
+            return
+        self.remote_pid = records.get('pid', self.remote_pid)
+        self.remote_events.extend(records.get('events', []))
+        self.remote_ticks.extend(records.get('ticks', []))
+
+    def set_offset(self, samples):
+        """Set the clock offset from (main send, remote time, main receive) samples. The fastest round trip wins."""
+        send, remote, receive = min(samples, key=lambda sample: sample[2] - sample[0])
+        self.offset = (send + receive) / 2 - remote
+        return self.offset
+
+    def clear(self):
+        with self.lock:
+            self.sent.clear()
+            self.keys.clear()
+        self.remote_events.clear()
+        self.remote_ticks.clear()
+
+    def to_chrome_trace(self, flow_scope=0, main_metadata=True):
+        """Return the trace as a Chrome trace dictionary {'traceEvents': [...]}. Timestamps are in microseconds.
+
+        Args:
+            flow_scope (int)[0]: Namespace of the flow ids. Traces of several loops that are merged into one file need
+                different scopes, because the trace ids of every loop start at 1.
+            main_metadata (bool)[True]: If True add the process and thread names of the main process.
+        """
+        main_pid = os.getpid()
+        remote_pid = self.remote_pid or 0
+        offset = self.offset or 0
+        flow_base = flow_scope * FLOW_SCOPE_SIZE
+        with self.lock:
+            sent = dict(self.sent)
+
+        trace = []
+        if main_metadata:
+            trace.extend([
+                {'ph': 'M', 'name': 'process_name', 'pid': main_pid, 'args': {'name': 'main'}},
+                {'ph': 'M', 'name': 'thread_name', 'pid': main_pid, 'tid': 1, 'args': {'name': 'send'}},
+                {'ph': 'M', 'name': 'thread_name', 'pid': main_pid, 'tid': 2, 'args': {'name': 'consumer queue'}},
+                {'ph': 'M', 'name': 'thread_name', 'pid': main_pid, 'tid': 3, 'args': {'name': 'queue feeder'}}])
+        trace.extend([
+            {'ph': 'M', 'name': 'process_name', 'pid': remote_pid, 'args': {'name': 'separate process'}},
+            {'ph': 'M', 'name': 'thread_name', 'pid': remote_pid, 'tid': 1, 'args': {'name': 'event queue'}},
+            {'ph': 'M', 'name': 'thread_name', 'pid': remote_pid, 'tid': 2, 'args': {'name': 'lanes'}},
+            {'ph': 'M', 'name': 'thread_name', 'pid': remote_pid, 'tid': 3, 'args': {'name': 'Qt thread'}}])
+
+        def span(name, cat, pid, tid, start, end, args):
+            trace.append({'ph': 'X', 'name': name, 'cat': cat, 'pid': pid, 'tid': tid, 'ts': to_us(start),
+                          'dur': to_us(max(end - start, 0)), 'args': args})
+
+        for trace_id, name, lane, dequeued, start, end, has_output in list(self.remote_events):
+            start += offset
+            end += offset
+            args = {'id': trace_id, 'lane': lane}
+            put, pickled, _, received = sent.get(trace_id, (None, None, None, None))
+            if pickled is not None:
+                span(name, 'pickle', main_pid, 3, pickled[0], pickled[1], args)
+            if put is not None:
+                trace.append({'ph': 's', 'name': name, 'cat': 'event', 'id': flow_base + trace_id, 'pid': main_pid,
+                              'tid': 1, 'ts': to_us(put)})
+                if dequeued is not None:
+                    span(name, 'queued', remote_pid, 1, put, dequeued + offset, args)
+            if dequeued is not None:
+                span(name, 'waiting', remote_pid, 2, dequeued + offset, start, args)
+            span(name, 'exec', remote_pid, 3, start, end, args)
+            if put is not None:
+                trace.append({'ph': 'f', 'bp': 'e', 'name': name, 'cat': 'event', 'id': flow_base + trace_id,
+                              'pid': remote_pid, 'tid': 3, 'ts': to_us(start)})
+            if has_output and received is not None:
+                span(name, 'output', main_pid, 2, end, received, args)
+
+        for start, end, count in list(self.remote_ticks):
+            span('tick', 'tick', remote_pid, 3, start + offset, end + offset, {'events': count})
+
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms',
+                'otherData': {'clock': 'perf_counter', 'offset': self.offset}}
+
+    def export(self, path=None, flow_scope=0, main_metadata=True):
+        """Return the Chrome trace dictionary and write it as JSON if a path is given. See to_chrome_trace."""
+        trace = self.to_chrome_trace(flow_scope, main_metadata)
+        if path is not None:
+            with open(path, 'w') as f:
+                json.dump(trace, f)
+        return trace
@@ -0,0 +1,563 @@
+"""
+Socket transport for the event queue and the consumer queue.
+
+By default the separate process is a local multiprocessing.Process and the events go through multiprocessing queues.
+With a transport the event loop connects to a remote runner (qt_multiprocessing.remote) over a Unix domain socket or a
+TCP socket instead, so the Qt widgets can run on another display or host.
+
+.. code-block:: python
+
+    # Display node: QT_MP_AUTHKEY=secret python -m qt_multiprocessing.remote tcp://127.0.0.1:8765
+    # Main process (ssh -L 8765:127.0.0.1:8765 display-node forwards the port)
+    with qt_multiprocessing.MpApplication(transport=SocketTransport('tcp://127.0.0.1:8765', authkey=b'secret')) as app:
+        ...
+
+Every connection starts with an HMAC challenge and response in both directions with a shared authkey (like
+multiprocessing.connection), so nothing is unpickled before both sides proved that they know the key. The authkey is
+given to the SocketTransport and the runner or read from the QT_MP_AUTHKEY environment variable. The messages are not
+encrypted. Bind the runner to 127.0.0.1 or a Unix socket and use an ssh tunnel to reach another host.
+
+Both channels share one full duplex connection for each event loop. Every open() makes a new connection. Connections
+are not reused when an event loop is stopped and started again. Every frame has a fixed header with the frame kind
+and the payload size followed by the pickled payload. A SocketConnection has a feeder thread that pickles and sends in
+order (like a multiprocessing.Queue) and a reader thread that receives the frames. Received messages are unpickled by
+get() on the thread that reads the queue, so widgets are created on the Qt thread. task_done() calls are sent back in
+batched ACK frames, so join(), the queue depth and the bounded queue work like a JoinableQueue.
+
+A socketpair is readable while messages are waiting, so the QSocketNotifier wakeups of the separate process and the
+output dispatcher work with socket queues. The modules of the main process must be importable by the remote runner.
+Shared memory arguments and frame streams only work when the runner is on the same host.
+
+Any object with an open(name, options, initialize_process=None, has_results=True) method that returns an object with
+event_queue, consumer_queue, is_alive(), join(timeout) and terminate() can be used as a transport.
+"""
+import os
+import hmac
+import time
+import socket
+import struct
+import pickle
+import threading
+from queue import Empty
+from collections import deque
+from multiprocessing import AuthenticationError
+
+from .utils import print_exception
+
+
+__all__ = ['FRAME_HEADER', 'MESSAGE', 'ACK', 'HELLO', 'CLOSE', 'AUTH', 'AUTHKEY_ENV', 'AuthenticationError',
+           'parse_address', 'create_listener', 'send_frame', 'recv_frame', 'get_authkey', 'deliver_challenge',
+           'answer_challenge', 'SocketConnection', 'SocketQueue', 'RemoteSession', 'SocketTransport', 'get_transport']
+
+
+FRAME_HEADER = struct.Struct('!BQ')  # Frame kind, payload bytes
+ACK_COUNT = struct.Struct('!Q')
+MESSAGE, ACK, HELLO, CLOSE, AUTH = range(5)
+SMALL_FRAME = 64 * 1024  # Payloads smaller than this are sent with the header in one call
+
+AUTHKEY_ENV = 'QT_MP_AUTHKEY'
+CHALLENGE_SIZE = 32
+MAX_AUTH_FRAME = 256  # Frames before the handshake passed are never larger than this
+WELCOME = b'#WELCOME#'
+FAILURE = b'#FAILURE#'
+
+
+def parse_address(address):
+    """Return (socket family, socket address) for 'tcp://host:port', 'unix:///path', (host, port) or a path."""
+    if isinstance(address, (tuple, list)):
+        return socket.AF_INET, (address[0], int(address[1]))
+
+    address = str(address)
+    if address.startswith('tcp://'):
+        host, sep, port = address[len('tcp://'):].rpartition(':')
+        if not sep or not port.isdigit():
+            raise ValueError('Invalid TCP address {}! Use tcp://host:port'.format(repr(address)))
+        return socket.AF_INET, (host.strip('[]') or '127.0.0.1', int(port))
+    if address.startswith('unix://'):
+        address = address[len('unix://'):]
+    if not hasattr(socket, 'AF_UNIX'):
+        raise ValueError('Unix domain sockets are not supported on this platform! Use tcp://host:port')
+    return socket.AF_UNIX, address
+
+
+def create_listener(address, backlog=8):
+    """Return a listening socket for the address. A stale Unix socket file is removed."""
+    family, addr = parse_address(address)
+    if family == socket.AF_INET and ':' in addr[0]:
+        family = socket.AF_INET6
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    if family == socket.AF_UNIX:
+        try:
+            os.unlink(addr)
+        except FileNotFoundError:
+            pass
+    else:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(addr)
+    sock.listen(backlog)
+    return sock
+
+
+def set_nodelay(sock):
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except (AttributeError, OSError):
+        pass  # Unix domain socket
+
+
+def send_frame(sock, kind, data=b''):
+    """Send a frame with a header and the payload bytes."""
+    header = FRAME_HEADER.pack(kind, len(data))
+    if len(data) < SMALL_FRAME:
+        sock.sendall(header + data)
+    else:
+        sock.sendall(header)
+        sock.sendall(data)
+
+
+def recv_exact(sock, nbytes):
+    """Receive exactly nbytes or raise EOFError if the connection is closed."""
+    buffer = bytearray(nbytes)
+    view = memoryview(buffer)
+    while view:
+        received = sock.recv_into(view)
+        if not received:
+            raise EOFError('The connection was closed!')
+        view = view[received:]
+    return buffer
+
+
+def recv_frame(sock, max_size=None):
+    """Receive a frame. Return (kind, payload bytes). Raise ValueError if the payload is larger than max_size."""
+    kind, nbytes = FRAME_HEADER.unpack(recv_exact(sock, FRAME_HEADER.size))
+    if max_size is not None and nbytes > max_size:
+        raise ValueError('The frame has {} bytes, but only {} bytes are allowed!'.format(nbytes, max_size))
+    return kind, recv_exact(sock, nbytes) if nbytes else b''
+
+
+def get_authkey(authkey=None):
+    """Return the authkey bytes. None reads the QT_MP_AUTHKEY environment variable."""
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_ENV)
+        if not authkey:
+            raise ValueError('A socket transport needs an authkey! Give an authkey or set the {} environment '
+                             'variable.'.format(AUTHKEY_ENV))
+    if isinstance(authkey, str):
+        authkey = authkey.encode('utf-8')
+    if not isinstance(authkey, bytes):
+        raise TypeError('The authkey must be bytes or str!')
+    return authkey
+
+
+def get_digest(authkey, message):
+    return hmac.new(authkey, bytes(message), 'sha256').digest()
+
+
+def deliver_challenge(sock, authkey):
+    """Send a random message and check that the other side answers with its HMAC. Raise AuthenticationError."""
+    message = os.urandom(CHALLENGE_SIZE)
+    send_frame(sock, AUTH, message)
+    kind, response = recv_frame(sock, MAX_AUTH_FRAME)
+    if kind == AUTH and hmac.compare_digest(bytes(response), get_digest(authkey, message)):
+        send_frame(sock, AUTH, WELCOME)
+    else:
+        send_frame(sock, AUTH, FAILURE)
+        raise AuthenticationError('The digest that was received is wrong!')
+
+
+def answer_challenge(sock, authkey):
+    """Answer the challenge of the other side with the HMAC of the message. Raise AuthenticationError."""
+    kind, message = recv_frame(sock, MAX_AUTH_FRAME)
+    if kind != AUTH:
+        raise AuthenticationError('Expected an authentication challenge!')
+    send_frame(sock, AUTH, get_digest(authkey, message))
+    kind, response = recv_frame(sock, MAX_AUTH_FRAME)
+    if kind != AUTH or bytes(response) != WELCOME:
+        raise AuthenticationError('The digest that was sent was rejected! Do both sides use the same authkey?')
+
+
+class SocketConnection(object):
+    """Length prefixed pickled messages in both directions of a connected stream socket."""
+
+    def __init__(self, sock, name='socket'):
+        """Create the connection and start the feeder and reader threads.
+
+        Args:
+            sock (socket.socket): Connected stream socket.
+            name (str)['socket']: Name of the threads.
+        """
+        self.sock = sock
+        self.sock.setblocking(True)
+        set_nodelay(self.sock)
+        self.alive = threading.Event()  # Cleared when the other side closes the connection
+        self.alive.set()
+        self.closing = False
+        self.sent_bytes = 0
+        self.received_bytes = 0
+
+        # Outgoing frames and the task_done counts that were not sent yet
+        self.outbox = deque()
+        self.acks = 0
+        self.out_cond = threading.Condition()
+
+        # Sent messages that the other side did not mark as done
+        self.unfinished = 0
+        self.unfinished_cond = threading.Condition()
+
+        # Received pickled messages. The wake socket has one byte while the inbox is not empty.
+        self.inbox = deque()
+        self.received_unfinished = 0
+        self.in_cond = threading.Condition()
+        self.wake_reader, self.wake_writer = socket.socketpair()
+        self.wake_reader.setblocking(False)
+        self.wake_writer.setblocking(False)
+
+        self.feeder = threading.Thread(target=self.run_feeder, name='SocketFeeder-' + name, daemon=True)
+        self.reader = threading.Thread(target=self.run_reader, name='SocketReader-' + name, daemon=True)
+        self.feeder.start()
+        self.reader.start()
+
+    def fileno(self):
+        """Return the file descriptor that is readable while received messages are waiting."""
+        return self.wake_reader.fileno()
+
+    # ========== Sending ==========
+    def send(self, obj, kind=MESSAGE):
+        """Queue an object to be pickled and sent by the feeder thread."""
+        with self.out_cond:
+            if self.closing:
+                raise ValueError('The connection is closed!')
+            if kind == MESSAGE:
+                with self.unfinished_cond:
+                    self.unfinished += 1
+            self.outbox.append((kind, obj))
+            self.out_cond.notify()
+
+    def task_done(self):
+        """Mark a received message as done. The count is sent to the other side."""
+        with self.in_cond:
+            if self.received_unfinished <= 0:
+                raise ValueError('task_done() called too many times')
+            self.received_unfinished -= 1
+            self.in_cond.notify_all()
+        with self.out_cond:
+            self.acks += 1
+            self.out_cond.notify()
+
+    def run_feeder(self):
+        """Pickle and send the outgoing frames in order. Send CLOSE when the connection is closed."""
+        while True:
+            with self.out_cond:
+                while not self.outbox and not self.acks and not self.closing:
+                    self.out_cond.wait()
+                frames = [self.outbox.popleft() for _ in range(len(self.outbox))]
+                acks, self.acks = self.acks, 0
+                closing = self.closing
+
+            try:
+                if acks:
+                    send_frame(self.sock, ACK, ACK_COUNT.pack(acks))
+                for kind, obj in frames:
+                    try:
+                        data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+                    except Exception as err:
+                        print_exception(err, 'Could not pickle the message!')
+                        if kind == MESSAGE:
+                            self.mark_sent_done(1)
+                        continue
+                    send_frame(self.sock, kind, data)
+                    self.sent_bytes += FRAME_HEADER.size + len(data)
+
+                if closing and not self.outbox and not self.acks:
+                    send_frame(self.sock, CLOSE)
+                    self.sock.shutdown(socket.SHUT_WR)
+                    return
+            except OSError:
+                self.alive.clear()  # The other side is gone
+                self.mark_sent_done(None)
+                return
+
+    def mark_sent_done(self, count):
+        """Subtract a count from the sent messages that are not done. None clears the count."""
+        with self.unfinished_cond:
+            if count is None:
+                self.unfinished = 0
+            else:
+                self.unfinished = max(self.unfinished - count, 0)
+            self.unfinished_cond.notify_all()
+
+    # ========== Receiving ==========
+    def run_reader(self):
+        """Receive frames until the other side sends CLOSE or the connection is lost."""
+        try:
+            while True:
+                kind, data = recv_frame(self.sock)
+                self.received_bytes += FRAME_HEADER.size + len(data)
+                if kind == MESSAGE:
+                    with self.in_cond:
+                        if not self.inbox:
+                            self.wake()
+                        self.inbox.append(data)
+                        self.received_unfinished += 1
+                        self.in_cond.notify_all()
+                elif kind == ACK:
+                    self.mark_sent_done(ACK_COUNT.unpack(data)[0])
+                elif kind == CLOSE:
+                    break
+        except (EOFError, OSError):
+            pass
+        finally:
+            self.alive.clear()
+            self.mark_sent_done(None)
+            with self.in_cond:
+                if not self.inbox:
+                    self.wake()  # Wake the notifier, so the reader sees that the connection closed
+                self.in_cond.notify_all()
+
+    def wake(self):
+        try:
+            self.wake_writer.send(b'\0')
+        except OSError:
+            pass
+
+    def clear_wake(self):
+        try:
+            self.wake_reader.recv(4096)
+        except OSError:
+            pass
+
+    def get(self, block=True, timeout=None):
+        """Return the next received message. Raise Empty if no message is received in time."""
+        deadline = None
+        if block and timeout is not None:
+            deadline = time.monotonic() + timeout
+
+        while True:
+            with self.in_cond:
+                while block and not self.inbox and self.alive.is_set():
+                    if deadline is None:
+                        self.in_cond.wait()
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self.in_cond.wait(remaining)
+                if not self.inbox:
+                    if not self.alive.is_set():
+                        self.clear_wake()
+                    raise Empty
+                data = self.inbox.popleft()
+                if not self.inbox and self.alive.is_set():
+                    self.clear_wake()
+
+            try:
+                return pickle.loads(data)
+            except Exception as err:
+                print_exception(err, 'Could not unpickle the message!')
+                self.task_done()
+
+    def qsize(self):
+        return len(self.inbox)
+
+    # ========== Closing ==========
+    def join_sent(self, timeout=None):
+        """Wait until the other side marked every sent message as done or the connection closed."""
+        with self.unfinished_cond:
+            return self.unfinished_cond.wait_for(lambda: self.unfinished <= 0, timeout)
+
+    def join_received(self, timeout=None):
+        """Wait until every received message was marked as done or the connection closed."""
+        with self.in_cond:
+            return self.in_cond.wait_for(lambda: self.received_unfinished <= 0 or
+                                         (not self.alive.is_set() and not self.inbox), timeout)
+
+    def close(self, timeout=5):
+        """Send the queued frames and CLOSE, wait for the other side to close and close the socket."""
+        with self.out_cond:
+            self.closing = True
+            self.out_cond.notify()
+        self.feeder.join(timeout)
+        self.reader.join(timeout)
+        self.terminate()
+
+    def terminate(self):
+        """Close the socket without sending the queued frames."""
+        self.closing = True
+        self.alive.clear()
+        for sock in (self.sock, self.wake_writer, self.wake_reader):
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+
+class SocketQueue(object):
+    """JoinableQueue interface for one direction of a SocketConnection.
+
+    The sending side uses put and join. The receiving side uses get, task_done and fileno.
+    """
+
+    def __init__(self, connection, incoming=False):
+        """Create the queue.
+
+        Args:
+            connection (SocketConnection): Connection that sends and receives the messages.
+            incoming (bool)[False]: If True this process reads the queue. Otherwise this process puts on the queue.
+        """
+        self.connection = connection
+        self.incoming = incoming
+
+    def put(self, obj, block=True, timeout=None):
+        self.connection.send(obj)
+
+    def put_nowait(self, obj):
+        self.put(obj, False)
+
+    def get(self, block=True, timeout=None):
+        return self.connection.get(block, timeout)
+
+    def get_nowait(self):
+        return self.get(False)
+
+    def task_done(self):
+        if self.incoming:
+            self.connection.task_done()
+
+    def qsize(self):
+        """Return the received messages that are waiting or the sent messages that are not done."""
+        if self.incoming:
+            return self.connection.qsize()
+        return self.connection.unfinished
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def depth(self):
+        """Return the messages that are not done (Received and not marked done or sent and not acknowledged)."""
+        if self.incoming:
+            return self.connection.received_unfinished
+        return self.connection.unfinished
+
+    def wait_for_room(self, max_depth, timeout=None):
+        """Wait until fewer than max_depth sent messages are not done. Return False if the timeout ran out."""
+        connection = self.connection
+        with connection.unfinished_cond:
+            return connection.unfinished_cond.wait_for(lambda: connection.unfinished < max_depth, timeout)
+
+    def join(self, timeout=None):
+        if self.incoming:
+            return self.connection.join_received(timeout)
+        return self.connection.join_sent(timeout)
+
+    def fileno(self):
+        if not self.incoming:
+            raise ValueError('Only the receiving side of a socket queue can be watched!')
+        return self.connection.fileno()
+
+    def close(self):
+        pass
+
+    def join_thread(self):
+        pass
+
+    def cancel_join_thread(self):
+        pass
+
+
+class RemoteSession(object):
+    """Event loop in a remote runner. Used as the event_process of the event loop."""
+
+    def __init__(self, connection, name='main', close_timeout=5):
+        self.connection = connection
+        self.name = name
+        self.close_timeout = close_timeout
+        self.event_queue = SocketQueue(connection)
+        self.consumer_queue = SocketQueue(connection, incoming=True)
+        self.pid = None
+
+    def is_alive(self):
+        return self.connection.alive.is_set() and not self.connection.closing
+
+    def join(self, timeout=None):
+        """Close the session. The remote event loop quits when it receives CLOSE."""
+        self.connection.close(self.close_timeout if timeout is None else timeout)
+
+    def terminate(self):
+        self.connection.terminate()
+
+    def stats(self):
+        return {'sent_bytes': self.connection.sent_bytes, 'received_bytes': self.connection.received_bytes}
+
+
+class SocketTransport(object):
+    """Connect event loops to a remote runner with a Unix domain socket or a TCP socket."""
+
+    def __init__(self, address, authkey=None, connect_timeout=10, close_timeout=5):
+        """Create the transport.
+
+        Args:
+            address (str/tuple): 'tcp://host:port', 'unix:///path/to/socket', (host, port) or a socket path.
+            authkey (bytes/str)[None]: Key that the runner was started with. None uses QT_MP_AUTHKEY.
+            connect_timeout (float)[10]: Seconds to retry connecting while the runner starts. Also the time limit of
+                the authentication.
+            close_timeout (float)[5]: Seconds to wait for the remote event loop to close.
+        """
+        self.address = address
+        self.authkey = get_authkey(authkey)
+        self.family, self.socket_address = parse_address(address)
+        self.connect_timeout = connect_timeout
+        self.close_timeout = close_timeout
+
+    def connect(self):
+        """Return a connected socket. Retry until the connect_timeout runs out."""
+        deadline = time.monotonic() + (self.connect_timeout or 0)
+        while True:
+            try:
+                if self.family != socket.AF_UNIX:
+                    return socket.create_connection(self.socket_address)
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    sock.connect(self.socket_address)
+                except OSError:
+                    sock.close()
+                    raise
+                return sock
+            except (ConnectionRefusedError, FileNotFoundError):
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
+
+    def open(self, name, options, initialize_process=None, has_results=True):
+        """Start an event loop in the remote runner and return the RemoteSession.
+
+        Args:
+            name (str): Event loop name.
+            options (dict): Process options of the event loop (AppEventLoop.get_process_options).
+            initialize_process (function)[None]: Function that creates the initial widgets in the remote process.
+            has_results (bool)[True]: If False the remote process does not send output events.
+        """
+        sock = self.connect()
+        try:
+            sock.settimeout(self.connect_timeout)
+            answer_challenge(sock, self.authkey)
+            deliver_challenge(sock, self.authkey)
+        except BaseException:
+            sock.close()
+            raise
+
+        connection = SocketConnection(sock, name=name)
+        connection.send({'name': name, 'options': dict(options), 'initialize_process': initialize_process,
+                         'has_results': has_results}, kind=HELLO)
+        return RemoteSession(connection, name=name, close_timeout=self.close_timeout)
+
+    def __repr__(self):
+        return '<{} {}>'.format(self.__class__.__name__, self.address)
+
+
+def get_transport(transport):
+    """Return None for multiprocessing queues, a SocketTransport for an address or the given transport object."""
+    if transport is None or hasattr(transport, 'open'):
+        return transport
+    if isinstance(transport, (str, tuple, list)):
+        return SocketTransport(transport)
+    raise ValueError('Invalid transport {}! Use an address or an object with an open method.'.format(repr(transport)))
@@ -0,0 +1,17 @@
+import sys
+import traceback
+
+
+__all__ = []
+
+
+def print_exception(exc, msg=None):
+    """Print the exception and its traceback with a message in front of it.
+
+    Note:
+        mp_event_loop.print_exception fails with a message on Python >= 3.10, because it joins the message and the
+        exception into a string before printing the traceback.
+    """
+    if msg:
+        print(msg, file=sys.stderr)
+    traceback.print_exception(type(exc), exc, exc.__traceback__)
@@ -0,0 +1,148 @@
+"""
+Pools of pre-created widgets in the separate process.
+
+Creating a widget (construct, polish, show) on the GUI thread of the separate process is the most expensive event when
+panels are opened in bursts. A WidgetProxy with a POOL_SIZE keeps that many hidden widgets of its PROXY_CLASS in the
+separate process. The pools are refilled one widget at a time when the separate process is idle, and a new proxy takes
+a pooled widget and resets it with the proxy's mp_reset_widget hook instead of constructing one.
+
+.. code-block:: python
+
+    class LabelProxy(qt_multiprocessing.WidgetProxy):
+        PROXY_CLASS = QtWidgets.QLabel
+        POOL_SIZE = 20
+
+        def mp_reset_widget(self, widget, text='', *args, **kwargs):
+            widget.setText(text)
+            return widget
+
+    LabelProxy.mp_prefill()  # Fill the pool before the first proxy is created
+"""
+import time
+import threading
+
+
+__all__ = ['WidgetPool', 'get_widget_pool', 'fill_widget_pool', 'refill_widget_pools', 'clear_widget_pools']
+
+
+WIDGET_POOLS = {}  # PROXY_CLASS: WidgetPool of this (separate) process
+POOL_LOCK = threading.Lock()
+
+
+class WidgetPool(object):
+    """Hidden widgets of one class that are created ahead of time."""
+
+    def __init__(self, widget_class, size=0):
+        """Create the pool.
+
+        Args:
+            widget_class (type): Class that is created without arguments to fill the pool.
+            size (int)[0]: Number of widgets to keep in the pool.
+        """
+        self.widget_class = widget_class
+        self.size = int(size)
+        self.widgets = []
+        self.created = 0  # Widgets created to fill the pool
+        self.taken = 0  # Widgets handed to new proxies
+        self.misses = 0  # New proxies that had to construct a widget
+
+    def missing(self):
+        """Return the number of widgets needed to fill the pool."""
+        return max(self.size - len(self.widgets), 0)
+
+    def create(self):
+        """Create a hidden widget and add it to the pool."""
+        widget = self.widget_class()
+        try:
+            widget.ensurePolished()
+        except AttributeError:
+            pass
+        self.widgets.append(widget)
+        self.created += 1
+        return widget
+
+    def fill(self, count=None):
+        """Create widgets until the pool is full or count widgets were created. Return the number created."""
+        count = self.missing() if count is None else min(count, self.missing())
+        for _ in range(count):
+            self.create()
+        return count
+
+    def take(self):
+        """Remove and return a pooled widget or None if the pool is empty."""
+        try:
+            widget = self.widgets.pop()
+        except IndexError:
+            self.misses += 1
+            return None
+        self.taken += 1
+        return widget
+
+    def give_back(self, widget):
+        """Hide a widget and keep it for the next proxy. Return False if the pool is full."""
+        if len(self.widgets) >= self.size:
+            return False
+        try:
+            widget.hide()
+        except (AttributeError, RuntimeError):
+            return False
+        self.widgets.append(widget)
+        return True
+
+    def clear(self):
+        for widget in self.widgets:
+            try:
+                widget.deleteLater()
+            except (AttributeError, RuntimeError):
+                pass
+        self.widgets = []
+
+    def stats(self):
+        return {'size': self.size, 'available': len(self.widgets), 'created': self.created, 'taken': self.taken,
+                'misses': self.misses}
+
+
+def get_widget_pool(widget_class, size=None):
+    """Return the pool of a widget class in this process. Create the pool if it does not exist.
+
+    Args:
+        widget_class (type): PROXY_CLASS of the pool.
+        size (int)[None]: Set the number of widgets that the pool keeps.
+    """
+    with POOL_LOCK:
+        try:
+            pool = WIDGET_POOLS[widget_class]
+        except KeyError:
+            pool = WIDGET_POOLS[widget_class] = WidgetPool(widget_class)
+        if size is not None:
+            pool.size = int(size)
+    return pool
+
+
+def fill_widget_pool(widget_class, size):
+    """Set the size of a pool and fill it right away. This runs as an event in the separate process."""
+    return get_widget_pool(widget_class, size).fill()
+
+
+def refill_widget_pools(time_budget=0.004):
+    """Create pooled widgets until every pool is full or the time budget runs out.
+
+    Returns:
+        missing (int): Number of widgets that are still needed to fill the pools.
+    """
+    deadline = time.perf_counter() + time_budget
+    missing = 0
+    for pool in list(WIDGET_POOLS.values()):
+        while pool.missing() and time.perf_counter() < deadline:
+            pool.create()
+        missing += pool.missing()
+    return missing
+
+
+def clear_widget_pools():
+    """Delete the pooled widgets of this process."""
+    with POOL_LOCK:
+        pools = list(WIDGET_POOLS.values())
+        WIDGET_POOLS.clear()
+    for pool in pools:
+        pool.clear()
@@ -0,0 +1,163 @@
+"""
+Run events that do not touch widgets on worker threads of the separate process.
+
+Every event runs on the GUI thread of the separate process, so a slow calculation (parsing, formatting, computing plot
+data) freezes every widget of the process until it returns. Events that are marked GUI free are given to a thread pool
+instead. The GUI thread keeps running the other events and applies the results of the finished events on its next tick,
+so the results can be set on widgets.
+
+An event is GUI free if its target is decorated with gui_free or if it was sent with add_event(..., gui_free=True).
+An apply callable runs on the GUI thread of the separate process with the results.
+
+.. code-block:: python
+
+    @qt_multiprocessing.gui_free
+    def make_plot_data(values):
+        return [v * v for v in values]
+
+    app.add_mp_event(make_plot_data, values, apply=(plot_proxy, 'setData'))
+
+Note:
+    Worker threads must not create or change widgets. Only the apply callable may touch widgets.
+"""
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from mp_event_loop import Event, CacheEvent, Proxy
+
+
+__all__ = ['gui_free', 'is_gui_free', 'WorkerEvent', 'WorkerPool']
+
+
+def gui_free(func):
+    """Decorator that marks a function as safe to run on a worker thread of the separate process."""
+    func.__gui_free__ = True
+    return func
+
+
+def is_gui_free(event):
+    """Return True if the event may run on a worker thread."""
+    if getattr(event, 'gui_free', False):
+        return True
+    return getattr(getattr(event, 'target', None), '__gui_free__', False) is True
+
+
+def get_apply_function(apply, cache_id=None):
+    """Return the callable for an apply value.
+
+    Args:
+        apply (callable/tuple): Callable or (object, method name). The object may be a proxy or a variable name.
+        cache_id (str)[None]: Id of the cache that has the variable name.
+    """
+    if isinstance(apply, (list, tuple)):
+        obj, method_name = apply
+        if isinstance(obj, str):
+            cache = CacheEvent.CACHE.get(cache_id, CacheEvent.CACHE)
+            obj = cache.get(obj, None)
+        if isinstance(obj, Proxy):
+            obj = obj.__object__
+        return getattr(obj, method_name)
+    return apply
+
+
+class WorkerEvent(Event):
+    """Event that runs its target on a worker thread and applies the results on the GUI thread."""
+
+    def __init__(self, target, *args, has_output=True, event_key=None, gui_free=True, apply=None, cache_id=None,
+                 **kwargs):
+        """Create the event.
+
+        Args:
+            target (function/callable): Function to run. It must not touch widgets if gui_free is True.
+            *args (tuple): Arguments to pass into the target function.
+            has_output (bool) [True]: If True put the executed event on the consumer/output queue.
+            event_key (str)[None]: Key to identify the event or output result.
+            gui_free (bool)[True]: If True run the target on a worker thread of the separate process.
+            apply (callable/tuple)[None]: Called with the results on the GUI thread of the separate process. A
+                callable or (proxy/variable name, method name). It is not called if the target raised an error.
+            cache_id (str)[None]: Id of the cache that has the apply variable name.
+            **kwargs (dict): Keyword arguments to pass into the target function.
+        """
+        super().__init__(target, *args, has_output=has_output, event_key=event_key, **kwargs)
+        self.gui_free = gui_free
+        self.apply = apply
+        self.cache_id = cache_id
+
+    def apply_results(self):
+        """Call the apply callable with the results. This runs on the GUI thread."""
+        if self.apply is None or self.error is not None:
+            return
+        try:
+            get_apply_function(self.apply, self.cache_id)(self.results)
+        except Exception as err:
+            self.error = err
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['gui_free'] = self.gui_free
+        state['apply'] = self.apply
+        state['cache_id'] = self.cache_id
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.gui_free = state.get('gui_free', True)
+        self.apply = state.get('apply', None)
+        self.cache_id = state.get('cache_id', None)
+
+
+class WorkerPool(object):
+    """Thread pool that runs GUI free events. Finished events are collected on the GUI thread."""
+
+    def __init__(self, max_workers=2):
+        """Create the pool. The threads are started when events are submitted.
+
+        Args:
+            max_workers (int)[2]: Number of worker threads.
+        """
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='QtMpWorker')
+        self.finished = deque()  # (event, elapsed, data) of the events that finished running
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+
+    def submit(self, event, data=None):
+        """Run the event on a worker thread.
+
+        Args:
+            event (Event): Event to run with exec_().
+            data (object)[None]: Value that is returned with the finished event.
+        """
+        with self.lock:
+            self.pending += 1
+            self.submitted += 1
+        self.executor.submit(self.run, event, data)
+
+    def run(self, event, data=None):
+        start = time.perf_counter()
+        try:
+            event.exec_()
+        finally:
+            self.finished.append((event, time.perf_counter() - start, data))
+
+    def take_finished(self):
+        """Return the (event, elapsed, data) of the events that finished since the last call."""
+        finished = []
+        while True:
+            try:
+                finished.append(self.finished.popleft())
+            except IndexError:
+                break
+        if finished:
+            with self.lock:
+                self.pending -= len(finished)
+        return finished
+
+    def stats(self):
+        return {'workers': self.max_workers, 'pending': self.pending, 'submitted': self.submitted}
+
+    def close(self, wait=False):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Run the Qt processes without a display and import the package from this checkout
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
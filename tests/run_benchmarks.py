@@ -0,0 +1,371 @@
+"""
+Headless benchmarks for qt_multiprocessing throughput and latency.
+
+Run without a display and save the results as JSON. Compare the results of two versions with --compare. The
+qt_multiprocessing package of this checkout is benchmarked. Benchmarks of options that an older version does not have
+are skipped, so the same script measures both versions.
+
+.. code-block:: bash
+
+    python tests/run_benchmarks.py --output new.json
+    python tests/run_benchmarks.py --output new.json --compare old.json
+"""
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import sys
+import json
+import time
+import uuid
+import inspect
+import platform
+import argparse
+import threading
+import statistics
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Benchmark this checkout
+
+import qtpy
+from qtpy import QtWidgets
+
+import mp_event_loop
+import qt_multiprocessing
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class BenchLabel(QtWidgets.QLabel):
+    def payload_size(self, data):
+        return len(data)
+
+
+class BenchLabelProxy(qt_multiprocessing.WidgetProxy):
+    PROXY_CLASS = BenchLabel
+    GETTERS = ['text']
+    PUSH_GETTERS = True  # Ignored by versions without pushed getters
+
+
+class CompactBenchLabelProxy(BenchLabelProxy):
+    METHODS = ['setText']  # Ignored by versions without compact calls
+
+
+# Newer versions take the options as **options and list them in qt_multiprocessing.LOOP_OPTIONS
+LOOP_OPTIONS = set(inspect.signature(qt_multiprocessing.AppEventLoop.__init__).parameters) | \
+    set(getattr(qt_multiprocessing, 'LOOP_OPTIONS', ()))
+
+
+def supports(*options):
+    """Return if the AppEventLoop of this version takes all of the given keyword arguments."""
+    return set(options) <= LOOP_OPTIONS
+
+
+class ResultWaiter(object):
+    """Wait for the output of an event with an event_key. Used by versions without futures."""
+
+    def __init__(self, loop):
+        self.results = {}
+        self.done = {}
+        self.lock = threading.Lock()
+        loop.insert_output_handler(0, self)
+
+    def __call__(self, event):
+        with self.lock:
+            done = self.done.get(event.event_key, None)
+        if done is not None:
+            self.results[event.event_key] = event.results
+            done.set()
+        return False  # Let the proxy output handler sync the proxy
+
+    def wait(self, add_event, timeout=30):
+        """Call add_event(event_key) and return the results of the event."""
+        key = uuid.uuid4().hex
+        done = threading.Event()
+        with self.lock:
+            self.done[key] = done
+        add_event(key)
+        if not done.wait(timeout):
+            raise TimeoutError('No results for the event after {} seconds!'.format(timeout))
+        with self.lock:
+            del self.done[key]
+        return self.results.pop(key)
+
+
+def get_waiter(loop):
+    try:
+        return loop.bench_waiter
+    except AttributeError:
+        loop.bench_waiter = ResultWaiter(loop)
+        return loop.bench_waiter
+
+
+def event_result(loop, target, *args, timeout=30):
+    """Run a function in the separate process and return its result."""
+    if hasattr(loop, 'add_event_future'):
+        return loop.add_event_future(target, *args).result(timeout)
+    return get_waiter(loop).wait(
+        lambda key: loop.add_event(target, *args, has_output=True, event_key=key), timeout)
+
+
+def var_event_result(loop, var_name, target, *args, timeout=30):
+    """Run a method of a saved variable in the separate process and return its result."""
+    if hasattr(loop, 'add_var_event_future'):
+        return loop.add_var_event_future(var_name, target, *args).result(timeout)
+    return get_waiter(loop).wait(
+        lambda key: loop.add_var_event(var_name, target, *args, has_output=True, event_key=key), timeout)
+
+
+def proxy_result(proxy, method_name, timeout=30):
+    """Call a proxy method in the separate process and return its result."""
+    if hasattr(type(proxy), 'mp_future'):  # Proxies answer every attribute
+        return proxy.mp_future(method_name).result(timeout)
+    loop = proxy.__loop__
+    return get_waiter(loop).wait(
+        lambda key: loop.add_event(mp_event_loop.ProxyEvent(proxy, method_name, has_output=True, event_key=key)),
+        timeout)
+
+
+def create_bench_widgets():
+    return {'label': BenchLabel('Benchmark')}
+
+
+def get_process_cpu_time(pid):
+    """Return the user + system CPU seconds of a process or None if it cannot be measured."""
+    if psutil is not None:
+        times = psutil.Process(pid).cpu_times()
+        return times.user + times.system
+    try:
+        with open('/proc/{}/stat'.format(pid)) as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(int(round(percent / 100 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def result(value, unit, higher_is_better=True, **extra):
+    extra.update({'value': value, 'unit': unit, 'higher_is_better': higher_is_better})
+    return extra
+
+
+# ========== Benchmarks ==========
+def bench_var_event_throughput(count=20000, **options):
+    """Events per second for add_var_event without output."""
+    with qt_multiprocessing.AppEventLoop(initialize_process=create_bench_widgets, **options) as loop:
+        var_event_result(loop, 'label', 'text')  # Wait for startup
+
+        start = time.perf_counter()
+        for i in range(count):
+            loop.add_var_event('label', 'setText', str(i), has_output=False)
+        loop.wait()
+        elapsed = time.perf_counter() - start
+    return result(count / elapsed, 'events/s', count=count)
+
+
+def bench_proxy_call_throughput(count=20000, proxy_class=BenchLabelProxy, **options):
+    """Proxy calls per second."""
+    with qt_multiprocessing.AppEventLoop(**options) as loop:
+        lbl = proxy_class('Benchmark', loop=loop)
+        proxy_result(lbl, 'text')
+
+        start = time.perf_counter()
+        for i in range(count):
+            lbl.setText(str(i))
+        loop.wait()
+        elapsed = time.perf_counter() - start
+    return result(count / elapsed, 'calls/s', count=count)
+
+
+def bench_round_trip_latency(count=2000, **options):
+    """Latency of a proxy call that returns a value."""
+    with qt_multiprocessing.AppEventLoop(**options) as loop:
+        lbl = BenchLabelProxy('Benchmark', loop=loop)
+        proxy_result(lbl, 'text')
+
+        latencies = []
+        for _ in range(count):
+            start = time.perf_counter()
+            proxy_result(lbl, 'text', timeout=10)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return {'p50': result(percentile(latencies, 50), 'ms', False),
+            'p99': result(percentile(latencies, 99), 'ms', False),
+            'mean': result(statistics.mean(latencies), 'ms', False)}
+
+
+def bench_proxy_creation(count=200, **options):
+    """WidgetProxy objects created per second in the separate process."""
+    with qt_multiprocessing.AppEventLoop(**options) as loop:
+        proxy_result(BenchLabelProxy('Warmup', loop=loop), 'text')
+
+        start = time.perf_counter()
+        lbls = [BenchLabelProxy(str(i), loop=loop) for i in range(count)]
+        proxy_result(lbls[-1], 'text', timeout=60)
+        elapsed = time.perf_counter() - start
+    return result(count / elapsed, 'proxies/s', count=count)
+
+
+def bench_large_payload(nbytes=8 * 1024 * 1024, count=50, **options):
+    """Megabytes per second of a bytes argument."""
+    data = bytes(nbytes)
+    with qt_multiprocessing.AppEventLoop(initialize_process=create_bench_widgets, **options) as loop:
+        var_event_result(loop, 'label', 'text')
+
+        start = time.perf_counter()
+        if hasattr(loop, 'add_var_event_future'):
+            futures = [loop.add_var_event_future('label', 'payload_size', data) for _ in range(count)]
+            assert all(fut.result(60) == nbytes for fut in futures)
+        else:
+            assert all(var_event_result(loop, 'label', 'payload_size', data, timeout=60) == nbytes
+                       for _ in range(count))
+        elapsed = time.perf_counter() - start
+    return result(nbytes * count / elapsed / 1e6, 'MB/s', nbytes=nbytes, count=count)
+
+
+def bench_idle_cpu(duration=2.0, **options):
+    """CPU percent of an idle separate process."""
+    with qt_multiprocessing.AppEventLoop(**options) as loop:
+        event_result(loop, os.getpid)
+        pid = loop.event_process.pid
+        time.sleep(0.5)
+
+        start_cpu = get_process_cpu_time(pid)
+        time.sleep(duration)
+        end_cpu = get_process_cpu_time(pid)
+    if start_cpu is None or end_cpu is None:
+        return result(None, '%', False)
+    return result((end_cpu - start_cpu) / duration * 100, '%', False)
+
+
+def bench_startup_shutdown(app, count=5):
+    """Seconds from starting the MpApplication event loop to the first result and seconds to close it."""
+    loop = app.__loop__
+    startups, shutdowns = [], []
+    for _ in range(count):
+        start = time.perf_counter()
+        loop.start()
+        event_result(loop, os.getpid)
+        startups.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        loop.close()
+        shutdowns.append(time.perf_counter() - start)
+    return {'startup': result(statistics.median(startups), 's', False),
+            'shutdown': result(statistics.median(shutdowns), 's', False)}
+
+
+def flatten(results, prefix=''):
+    """Return {name: result} where nested benchmark results are joined with a '.'."""
+    flat = {}
+    for key, value in results.items():
+        name = prefix + key
+        if 'value' in value:
+            flat[name] = value
+        else:
+            flat.update(flatten(value, name + '.'))
+    return flat
+
+
+def run_benchmarks(quick=False):
+    """Run all of the benchmarks and return a dictionary of machine readable results."""
+    scale = 0.1 if quick else 1
+    drain = {'max_events': None, 'time_budget': 0.008}
+
+    has_drain = supports(*drain)
+    events = int(20000 * scale)
+    latency_count = int(2000 * scale)
+    payload_count = int(50 * scale) or 1
+    idle = 1.0 if quick else 2.0
+
+    # (name, available in this version, benchmark)
+    benchmarks = [
+        ('var_event_throughput', True, lambda: bench_var_event_throughput(events)),
+        ('var_event_throughput_drain', has_drain, lambda: bench_var_event_throughput(events, **drain)),
+        ('proxy_call_throughput', True,
+         lambda: bench_proxy_call_throughput(events, **(drain if has_drain else {}))),
+        ('compact_call_throughput', hasattr(qt_multiprocessing, 'compact') and has_drain,
+         lambda: bench_proxy_call_throughput(events, CompactBenchLabelProxy, **drain)),
+        ('round_trip_latency', True, lambda: bench_round_trip_latency(latency_count)),
+        ('round_trip_latency_notifier', supports('wakeup'),
+         lambda: bench_round_trip_latency(latency_count, wakeup='notifier')),
+        ('proxy_creation', True, lambda: bench_proxy_creation(int(200 * scale) or 1)),
+        ('large_payload_pickle', True, lambda: bench_large_payload(count=payload_count)),
+        ('large_payload_shared_memory', supports('shared_memory_threshold'),
+         lambda: bench_large_payload(count=payload_count, shared_memory_threshold=1024 * 1024)),
+        ('idle_cpu_timer', True, lambda: bench_idle_cpu(idle)),
+        ('idle_cpu_notifier', supports('wakeup'), lambda: bench_idle_cpu(idle, wakeup='notifier')),
+        ]
+
+    app = qt_multiprocessing.MpApplication()
+    results = {}
+    skipped = []
+    for name, available, bench in benchmarks:
+        if available:
+            results[name] = bench()
+        else:
+            skipped.append(name)  # This version does not have the feature
+    results['mp_application'] = bench_startup_shutdown(app, 2 if quick else 5)
+
+    return {'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'qt_api': qtpy.API_NAME,
+            'qt_version': qtpy.QT_VERSION,
+            'skipped': skipped,
+            'results': flatten(results)}
+
+
+def compare(new, old, threshold=0.1):
+    """Print the new results next to the old results and return the names of the regressions."""
+    regressions = []
+    print('{:40s} {:>14s} {:>14s} {:>9s}'.format('benchmark', 'old', 'new', 'change'))
+    for name, new_result in new['results'].items():
+        old_result = old.get('results', {}).get(name, None)
+        new_value = new_result['value']
+        if old_result is None or old_result['value'] in (None, 0) or new_value is None:
+            print('{:40s} {:>14s} {:>14s}'.format(name, '-', str(new_value)))
+            continue
+
+        old_value = old_result['value']
+        change = (new_value - old_value) / abs(old_value)
+        worse = -change if new_result['higher_is_better'] else change
+        flag = ''
+        if worse > threshold:
+            flag = ' REGRESSION'
+            regressions.append(name)
+        print('{:40s} {:>14.4g} {:>14.4g} {:>+8.1%}{}'.format(name, old_value, new_value, change, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless qt_multiprocessing benchmarks.')
+    parser.add_argument('--output', '-o', default=None, help='JSON file to save the results to.')
+    parser.add_argument('--compare', '-c', default=None, help='JSON results of a previous run to compare with.')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative change that counts as a regression (default 0.1).')
+    parser.add_argument('--quick', action='store_true', help='Run fewer iterations.')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(quick=args.quick)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        if compare(results, old, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
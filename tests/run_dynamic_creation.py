@@ -21,6 +21,11 @@ class MyPIDLabel(QtWidgets.QLabel):
 class LabelProxy(qt_multiprocessing.WidgetProxy):
     PROXY_CLASS = MyPIDLabel
     GETTERS = ['text']
+    POOL_SIZE = 10  # Labels are created while the separate process is idle
+
+    def mp_reset_widget(self, widget, text='', parent=None):
+        widget.setText(text)
+        return widget
 
 
 if __name__ == '__main__':
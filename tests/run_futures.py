@@ -0,0 +1,48 @@
+"""Get return values from the separate process with futures."""
+import os
+import qt_multiprocessing
+from qtpy import QtWidgets
+
+
+class MyPIDLabel(QtWidgets.QLabel):
+    def print_pid(self):
+        text = self.text()
+        print(text, 'PID:', os.getpid())
+        return text
+
+
+class MyPIDLabelProxy(qt_multiprocessing.WidgetProxy):
+    PROXY_CLASS = MyPIDLabel
+
+
+if __name__ == '__main__':
+    with qt_multiprocessing.MpApplication() as app:
+        print("Main PID:", os.getpid())
+
+        lbls = [MyPIDLabelProxy("Hello " + str(i)) for i in range(3)]
+        for i, lbl in enumerate(lbls):
+            lbl.move(130 * i, 200)
+
+        widg = QtWidgets.QDialog()
+        lay = QtWidgets.QFormLayout()
+        widg.setLayout(lay)
+
+        # Form
+        inp = QtWidgets.QLineEdit()
+        btn = QtWidgets.QPushButton('Set Text')
+        lay.addRow(inp, btn)
+
+        def set_text():
+            for lbl in lbls:
+                lbl.setText(inp.text())
+
+            # Send all of the calls then wait once
+            futures = [lbl.mp_future('print_pid') for lbl in lbls]
+            print('Label texts in the other process', [fut.result(timeout=2) for fut in futures])
+
+            # Callbacks run when the result is returned
+            app.add_mp_event_future(os.getpid).add_done_callback(lambda fut: print('Other PID:', fut.result()))
+
+        btn.clicked.connect(set_text)
+
+        widg.show()
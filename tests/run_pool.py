@@ -0,0 +1,57 @@
+"""Place label proxies in multiple separate Qt processes."""
+import os
+import qt_multiprocessing
+from qtpy import QtWidgets
+
+
+class MyPIDLabel(QtWidgets.QLabel):
+    def __init__(self, text='', parent=None):
+        text = str(text) + ' PID:' + str(os.getpid())
+        super().__init__(text, parent=parent)
+
+    def setText(self, text):
+        text = str(text) + ' PID:' + str(os.getpid())
+        super().setText(text)
+
+
+class LabelProxy(qt_multiprocessing.WidgetProxy):
+    PROXY_CLASS = MyPIDLabel
+    GETTERS = ['text']
+
+
+if __name__ == '__main__':
+    with qt_multiprocessing.MpApplication(processes=3, placement='least_loaded') as app:
+        lbls = []
+
+        print("Main PID:", os.getpid())
+
+        widg = QtWidgets.QDialog()
+        lay = QtWidgets.QFormLayout()
+        widg.setLayout(lay)
+
+        # Form
+        inp = QtWidgets.QLineEdit()
+        btn = QtWidgets.QPushButton('Create Label')
+        grp_btn = QtWidgets.QPushButton('Create Grouped Label')
+        lay.addRow(inp, btn)
+        lay.addRow(grp_btn)
+
+        def create_label(affinity=None):
+            # Each label is placed in the least loaded process. Grouped labels always share one process.
+            lbl = LabelProxy(inp.text(), affinity=affinity)
+            lbl.move(130 * len(lbls), 200)
+            lbls.append(lbl)
+
+        btn.clicked.connect(lambda: create_label())
+        grp_btn.clicked.connect(lambda: create_label('group'))
+
+        # ===== Button to set all label texts =====
+        set_text_btn = QtWidgets.QPushButton('Set Label Text')
+
+        def set_labels():
+            [lbl.setText(inp.text()) for lbl in lbls]
+
+        set_text_btn.clicked.connect(set_labels)
+        lay.addRow(set_text_btn)
+
+        widg.show()
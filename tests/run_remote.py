@@ -0,0 +1,60 @@
+"""Run the widgets in a remote runner that is connected with a socket transport (Everything runs on localhost).
+
+The runner has to import the proxy classes, so they are imported from this module instead of __main__.
+"""
+import os
+import sys
+import subprocess
+import qt_multiprocessing
+from qtpy import QtWidgets
+
+
+ADDRESS = 'tcp://127.0.0.1:8765'  # or 'unix:///tmp/qt_mp.sock'
+
+
+class MyPIDLabel(QtWidgets.QLabel):
+    def print_pid(self):
+        text = self.text()
+        print(text, 'PID:', os.getpid())
+        return text
+
+
+class MyPIDLabelProxy(qt_multiprocessing.WidgetProxy):
+    PROXY_CLASS = MyPIDLabel
+
+
+if __name__ == '__main__':
+    from run_remote import MyPIDLabelProxy
+
+    # Normally the runner is started on the display node with the same QT_MP_AUTHKEY:
+    # python -m qt_multiprocessing.remote tcp://127.0.0.1:8765
+    os.environ.setdefault('QT_MP_AUTHKEY', os.urandom(16).hex())  # Shared with the runner process
+    runner = subprocess.Popen([sys.executable, '-m', 'qt_multiprocessing.remote', ADDRESS, '--once',
+                               '--path', os.path.dirname(os.path.abspath(__file__))])
+
+    with qt_multiprocessing.MpApplication(transport=ADDRESS) as app:
+        print("Main PID:", os.getpid())
+
+        lbls = [MyPIDLabelProxy("Hello " + str(i)) for i in range(3)]
+        for i, lbl in enumerate(lbls):
+            lbl.move(130 * i, 200)
+
+        widg = QtWidgets.QDialog()
+        lay = QtWidgets.QFormLayout()
+        widg.setLayout(lay)
+
+        inp = QtWidgets.QLineEdit()
+        btn = QtWidgets.QPushButton('Set Text')
+        lay.addRow(inp, btn)
+
+        def set_text():
+            for lbl in lbls:
+                lbl.setText(inp.text())
+            futures = [lbl.mp_future('print_pid') for lbl in lbls]
+            print('Label texts in the remote process', [fut.result(timeout=2) for fut in futures])
+
+        btn.clicked.connect(set_text)
+
+        widg.show()
+
+    runner.wait()
@@ -0,0 +1,128 @@
+import time
+from queue import Full
+
+import pytest
+
+import mp_event_loop
+
+import qt_multiprocessing
+
+
+MAX_QUEUE_SIZE = 3
+RECORD = []  # Record of the separate process
+
+
+class ListProxy(mp_event_loop.Proxy):
+    PROXY_CLASS = list
+
+
+def record(name):
+    RECORD.append(name)
+
+
+def get_record():
+    return list(RECORD)
+
+
+def get_items(proxy):
+    return list(proxy.__object__)
+
+
+def fill_queue(loop):
+    """Block the separate process for a second and fill the queue up to max_queue_size."""
+    loop.add_event(time.sleep, 1, has_output=False)
+    loop.add_event(record, 'a', has_output=False)
+    loop.add_event(record, 'b', has_output=False)
+    assert loop.queue_depth() == MAX_QUEUE_SIZE
+    assert loop.is_queue_full()
+
+
+def wait_for_drain(loop, timeout=10):
+    """Wait until the drain thread sent every held event without calling flush or wait."""
+    deadline = time.time() + timeout
+    while loop.stats()['main']['held'] and time.time() < deadline:
+        time.sleep(0.05)
+    return loop.stats()['main']['held']
+
+
+def test_drop_newest():
+    with qt_multiprocessing.AppEventLoop(max_queue_size=MAX_QUEUE_SIZE, overflow='drop_newest') as loop:
+        fill_queue(loop)
+        for i in range(10):
+            loop.add_event(record, i, has_output=False)
+        fut = loop.add_event_future(record, 'dropped')
+        assert loop.overflow_count == 11
+        assert loop.dropped_count == 11
+        with pytest.raises(Full):
+            fut.result(1)
+
+        loop.wait()
+        assert loop.add_event_future(get_record).result(10) == ['a', 'b']
+        assert loop.stats()['main']['dropped'] == 11
+
+
+def test_raise():
+    with qt_multiprocessing.AppEventLoop(max_queue_size=MAX_QUEUE_SIZE, overflow='raise') as loop:
+        fill_queue(loop)
+        for i in range(5):
+            with pytest.raises(Full):
+                loop.add_event(record, i, has_output=False)
+        assert loop.overflow_count == 5
+        assert loop.dropped_count == 5
+
+        loop.wait()
+        assert loop.add_event_future(get_record).result(10) == ['a', 'b']
+
+
+def test_block_timeout():
+    with qt_multiprocessing.AppEventLoop(max_queue_size=MAX_QUEUE_SIZE, overflow='block', block_timeout=0.05) as loop:
+        fill_queue(loop)
+        start = time.time()
+        with pytest.raises(Full):
+            loop.add_event(record, 'timeout', has_output=False)
+        assert time.time() - start < 0.9
+        assert loop.dropped_count == 1
+
+        # Without a timeout the producer waits until the separate process finished a message
+        loop.block_timeout = None
+        for i in range(5):
+            loop.add_event(record, i, has_output=False)
+        assert loop.dropped_count == 1
+        assert loop.add_event_future(get_record).result(10) == ['a', 'b', 0, 1, 2, 3, 4]
+
+
+def test_drop_oldest_drain_thread():
+    with qt_multiprocessing.AppEventLoop(max_queue_size=MAX_QUEUE_SIZE, overflow='drop_oldest') as loop:
+        fill_queue(loop)
+        for i in range(10):
+            loop.add_event(record, i, has_output=False)
+        assert loop.overflow_count == 10
+        assert loop.dropped_count == 10 - MAX_QUEUE_SIZE
+        assert loop.stats()['main']['held'] == MAX_QUEUE_SIZE
+
+        # The drain thread sends the newest held events when the separate process catches up
+        assert wait_for_drain(loop) == 0
+        assert loop.dropped_count == 10 - MAX_QUEUE_SIZE
+        assert loop.add_event_future(get_record).result(10) == ['a', 'b', 7, 8, 9]
+
+
+def test_coalesce_drain_thread():
+    with qt_multiprocessing.AppEventLoop(max_queue_size=MAX_QUEUE_SIZE, overflow='coalesce') as loop:
+        first, second = ListProxy(loop=loop), ListProxy(loop=loop)
+        first.clear()
+        second.clear()
+        loop.wait()
+        overflow_count, dropped_count = loop.overflow_count, loop.dropped_count  # Creating the proxies may overflow
+
+        fill_queue(loop)
+        for i in range(10):
+            first.append(i)
+            second.append(i)
+        assert loop.overflow_count - overflow_count == 20
+        assert loop.dropped_count - dropped_count == 18  # Each call replaced the held call of the same method
+        assert loop.stats()['main']['held'] == 2
+
+        assert wait_for_drain(loop) == 0
+        assert loop.add_event_future(get_items, first).result(10) == [9]
+        assert loop.add_event_future(get_items, second).result(10) == [9]
+        assert loop.add_event_future(get_record).result(10) == ['a', 'b']
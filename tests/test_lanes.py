@@ -0,0 +1,69 @@
+import time
+
+import mp_event_loop
+from mp_event_loop import ProxyEvent
+
+import qt_multiprocessing
+from qt_multiprocessing.lanes import LaneScheduler, get_event_keys
+
+
+RECORD = []  # Record of the separate process
+
+
+class Recorder(object):
+    def __init__(self):
+        RECORD.append('created')
+
+
+class RecorderProxy(mp_event_loop.Proxy):
+    PROXY_CLASS = Recorder
+
+
+class ListProxy(mp_event_loop.Proxy):
+    PROXY_CLASS = list
+
+
+def record(name):
+    RECORD.append(name)
+
+
+def get_record():
+    return list(RECORD)
+
+
+def get_items(proxy):
+    return list(proxy.__object__)
+
+
+def test_lanes_keep_order_of_common_keys():
+    lanes = LaneScheduler((8, 4, 1))
+    lanes.put('bulk', 2, keys=('a',))
+    lanes.put('bulk other', 2)
+    lanes.put('interactive', 0, keys=('a',))
+    lanes.put('interactive other', 0, keys=('b',))
+    assert [lanes.get() for _ in range(len(lanes))] == ['bulk', 'interactive', 'interactive other', 'bulk other']
+
+
+def test_proxy_calls_keep_order_across_lanes():
+    with qt_multiprocessing.AppEventLoop(output_dispatch='thread') as loop:
+        proxy = ListProxy(loop=loop)
+        for _ in range(20):
+            loop.add_event(time.sleep, 0.005, has_output=False, priority='bulk')
+        with loop.priority('bulk'):
+            proxy.append(1)
+        with loop.priority('interactive'):
+            proxy.append(2)
+
+        keys = get_event_keys(ProxyEvent(proxy, 'append', 3))
+        assert keys and keys == get_event_keys(ProxyEvent(proxy, 'clear'))
+        with loop.priority('bulk'):
+            assert loop.add_event_future(get_items, proxy).result(10) == [1, 2]
+
+
+def test_events_are_unpickled_when_they_run():
+    """Proxy objects are created in the order that the events run, not when the messages are read ahead."""
+    with qt_multiprocessing.AppEventLoop(output_dispatch='thread') as loop:
+        loop.add_event(record, 'before', has_output=False)
+        RecorderProxy(loop=loop)
+        loop.add_event(record, 'after', has_output=False)
+        assert loop.add_event_future(get_record).result(10) == ['before', 'created', 'after']
@@ -0,0 +1,34 @@
+import pytest
+
+import qt_multiprocessing
+from qt_multiprocessing.options import LOOP_OPTIONS, PROCESS_OPTIONS, get_loop_options
+
+
+def test_defaults():
+    options = get_loop_options()
+    assert set(options) == set(LOOP_OPTIONS)
+    assert options['output_dispatch'] == 'thread'
+    assert options['preload'] == ()
+
+
+def test_invalid_options():
+    with pytest.raises(TypeError):
+        get_loop_options(max_event=1)
+    with pytest.raises(ValueError):
+        get_loop_options(wakeup='sleep')
+    with pytest.raises(ValueError):
+        get_loop_options(overflow='drop')
+    with pytest.raises(ValueError):
+        get_loop_options(output_dispatch='gui')
+    with pytest.raises(ValueError):
+        get_loop_options(lane_weights=(1, 1))
+    with pytest.raises(TypeError):
+        qt_multiprocessing.AppEventLoop(max_event=1)
+
+
+def test_process_options():
+    loop = qt_multiprocessing.AppEventLoop(max_events=None, preload=['json'], overflow='drop-oldest')
+    assert loop.overflow == 'drop_oldest'
+    options = loop.get_process_options()
+    assert set(options) == set(PROCESS_OPTIONS) | {'has_results'}
+    assert options['max_events'] is None and options['preload'] == ('json',)
@@ -0,0 +1,121 @@
+import pickle
+import random
+import threading
+
+import pytest
+
+import qt_multiprocessing
+from qt_multiprocessing.payload_cache import PAYLOAD_STORE, PayloadCache
+
+
+PAYLOADS = [bytes([i]) * 256 for i in range(5)]
+BIG_PAYLOADS = [bytes([i]) * 4096 for i in range(4)]
+
+
+def make_vars(name, data):
+    return {name: data}
+
+
+@pytest.fixture
+def store():
+    """Use the payload store of this process as the store of the separate process."""
+    PAYLOAD_STORE.clear()
+    yield PAYLOAD_STORE
+    PAYLOAD_STORE.clear()
+
+
+def send(cache, obj):
+    """Pickle a payload like the feeder thread and unpickle it like the separate process. Return the object and if the
+    payload was sent with its bytes.
+    """
+    data = pickle.dumps(cache.share(obj), pickle.HIGHEST_PROTOCOL)
+    return pickle.loads(data), len(data) > len(obj)
+
+
+def get_sent(cache):
+    return list(cache.sent[threading.current_thread()])
+
+
+def test_eviction_resends_payload(store):
+    cache = PayloadCache(threshold=16, max_payloads=2)
+    a, b, c = PAYLOADS[:3]
+    assert send(cache, a) == (a, True)
+    assert send(cache, b) == (b, True)
+    assert send(cache, a) == (a, False)
+    assert send(cache, c) == (c, True)  # Evicts b on both sides
+    assert get_sent(cache) == list(store) and len(store) == 2
+    assert send(cache, b) == (b, True)
+    assert send(cache, c) == (c, False)
+    assert send(cache, a) == (a, True)
+    assert get_sent(cache) == list(store)
+
+
+def test_lru_order_matches_store(store):
+    cache = PayloadCache(threshold=16, max_payloads=3)
+    rng = random.Random(0)
+    for _ in range(200):
+        obj = rng.choice(PAYLOADS)
+        assert send(cache, obj)[0] == obj
+        assert get_sent(cache) == list(store)
+
+    stats = cache.stats()
+    assert stats['sent'] + stats['referenced'] == 200
+    assert stats['sent'] > len(PAYLOADS)  # Evicted payloads were sent again
+
+
+def test_threads_keep_their_own_lru(store):
+    cache = PayloadCache(threshold=16, max_payloads=2)
+    payload = cache.share(PAYLOADS[0])
+    assert not cache.is_sent(payload)
+    assert cache.is_sent(payload)
+
+    # Another pickling thread (another queue) did not send the payload yet
+    results = []
+    thread = threading.Thread(target=lambda: results.extend([cache.is_sent(payload), cache.is_sent(payload)]))
+    thread.start()
+    thread.join()
+    assert results == [False, True]
+    assert get_sent(cache) == [payload.digest]
+
+
+def test_producer_threads_after_eviction():
+    rng = random.Random(0)
+    choices = [[rng.randrange(len(BIG_PAYLOADS)) for _ in range(20)] for _ in range(4)]
+    with qt_multiprocessing.AppEventLoop(payload_threshold=1024, max_payloads=3) as loop:
+        # Register the target before the threads use it. CacheEvents decide to register it when they are created.
+        loop.save_variables(make_vars, 'first', BIG_PAYLOADS[0])
+
+        def produce(index):
+            for i, choice in enumerate(choices[index]):
+                loop.save_variables(make_vars, 'var{}_{}'.format(index, i), BIG_PAYLOADS[choice])
+
+        threads = [threading.Thread(target=produce, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for index in range(4):
+            for i, choice in enumerate(choices[index]):
+                expected = BIG_PAYLOADS[choice]
+                assert loop.add_var_event_future('var{}_{}'.format(index, i), '__eq__', expected).result(10) is True
+
+        stats = loop.stats()['main']['payloads']
+        assert stats['referenced'] > 0
+        assert stats['sent'] > len(BIG_PAYLOADS)  # Evicted payloads were sent again
+        assert stats['sent'] + stats['referenced'] == 81
+
+
+def test_restart_sends_payloads_again():
+    loop = qt_multiprocessing.AppEventLoop(payload_threshold=1024)
+    with loop:
+        loop.save_variables(make_vars, 'data', BIG_PAYLOADS[0])
+        loop.save_variables(make_vars, 'data', BIG_PAYLOADS[0])
+        assert loop.add_var_event_future('data', '__eq__', BIG_PAYLOADS[0]).result(10) is True
+    assert loop.payloads.stats() == {'sent': 1, 'referenced': 1, 'saved_bytes': loop.payloads.saved_bytes}
+
+    # The new separate process does not have the payloads
+    with loop:
+        loop.save_variables(make_vars, 'data', BIG_PAYLOADS[0])
+        assert loop.add_var_event_future('data', '__eq__', BIG_PAYLOADS[0]).result(10) is True
+    assert loop.payloads.stats()['sent'] == 2
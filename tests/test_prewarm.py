@@ -0,0 +1,18 @@
+import qt_multiprocessing
+from qt_multiprocessing.prewarm import WARM_PROCESSES
+
+
+def test_application_adopts_prewarmed_process():
+    """The README warm start example: prewarm() first, then MpApplication with the same preload."""
+    warm = qt_multiprocessing.prewarm(preload=['json'])
+    assert len(warm) == 1
+
+    app = qt_multiprocessing.MpApplication(preload=['json'])
+    loop = app.__loop__
+    try:
+        loop.start()
+        assert loop.startup['warm']
+        assert warm[0] not in WARM_PROCESSES
+    finally:
+        loop.close()
+        qt_multiprocessing.close_warm_processes()
@@ -0,0 +1,30 @@
+import pickle
+import functools
+
+from qt_multiprocessing.compact import LazyMessage, load_message
+from qt_multiprocessing.tracing import EventTracer
+
+
+class CountPickles(object):
+    count = 0
+
+    def __reduce__(self):
+        CountPickles.count += 1
+        return CountPickles, ()
+
+
+def test_pickle_is_timed_where_the_queue_pickles():
+    CountPickles.count = 0
+    tracer = EventTracer()
+    trace_id = tracer.trace_put(CountPickles(), 1)
+    assert CountPickles.count == 0
+    assert tracer.sent[trace_id][1] is None
+
+    message = LazyMessage(CountPickles(), on_pickled=functools.partial(tracer.trace_pickle, trace_id))
+    data = pickle.dumps(message)
+    assert CountPickles.count == 1
+    start, end = tracer.sent[trace_id][1]
+    assert start <= end
+
+    assert isinstance(load_message(pickle.loads(data)), CountPickles)
+    assert CountPickles.count == 1
@@ -0,0 +1,164 @@
+import os
+import sys
+import hmac
+import pickle
+import socket
+import time
+import threading
+import subprocess
+from queue import Empty
+
+import pytest
+
+import qt_multiprocessing
+from qt_multiprocessing.remote import serve
+from qt_multiprocessing.transport import FRAME_HEADER, MESSAGE, HELLO, AUTH, AuthenticationError, send_frame, \
+    recv_frame, SocketConnection, SocketTransport
+
+
+AUTHKEY = b'secret'
+UNPICKLED = []  # Set if a message of a client was unpickled
+
+
+def mark_unpickled():
+    UNPICKLED.append(True)
+
+
+class Evil(object):
+    def __reduce__(self):
+        return mark_unpickled, ()
+
+
+def echo_target(alive, event_queue, consumer_queue, initialize_process=None, **options):
+    """Send the messages back until the main process closes the session."""
+    while alive.is_set():
+        try:
+            message = event_queue.get(timeout=0.1)
+        except Empty:
+            continue
+        consumer_queue.put(message)
+        event_queue.task_done()
+
+
+def wait_for_listener(address, timeout=10):
+    deadline = time.time() + timeout
+    while not os.path.exists(address) and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def connect(address):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(address)
+    return sock
+
+
+def wrong_key(address):
+    sock = connect(address)
+    kind, challenge = recv_frame(sock)
+    send_frame(sock, AUTH, hmac.new(b'wrong', bytes(challenge), 'sha256').digest())
+    send_frame(sock, HELLO, pickle.dumps(Evil()))
+    assert recv_frame(sock)[1] == b'#FAILURE#'
+    sock.close()
+
+
+def no_handshake(address):
+    sock = connect(address)
+    send_frame(sock, HELLO, pickle.dumps([Evil()] * 100))  # Larger than an authentication frame
+    sock.close()
+
+
+def truncated_frame(address):
+    sock = connect(address)
+    recv_frame(sock)
+    sock.sendall(FRAME_HEADER.pack(AUTH, 32) + b'1234')
+    sock.close()
+
+
+@pytest.fixture
+def address(tmp_path):
+    return str(tmp_path / 'qt_mp.sock')
+
+
+def start_runner(address, *args):
+    env = dict(os.environ, QT_MP_AUTHKEY=AUTHKEY.decode(), QT_QPA_PLATFORM='offscreen')
+    return subprocess.Popen([sys.executable, '-m', 'qt_multiprocessing.remote', 'unix://' + address, *args], env=env,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.mark.parametrize('client', [wrong_key, no_handshake, truncated_frame])
+def test_invalid_clients_are_rejected_before_unpickling(address, client):
+    del UNPICKLED[:]
+    server = threading.Thread(target=serve, args=(address, AUTHKEY), kwargs={'once': True, 'target': echo_target},
+                              daemon=True)
+    server.start()
+    wait_for_listener(address)
+    try:
+        client(address)
+
+        # The runner rejects a client with another key and keeps serving
+        with pytest.raises(AuthenticationError):
+            SocketTransport(address, authkey=b'wrong').open('test', {})
+
+        session = SocketTransport(address, authkey=AUTHKEY).open('test', {})
+        session.event_queue.put('ping')
+        assert session.consumer_queue.get(timeout=5) == 'ping'
+        session.consumer_queue.task_done()
+        session.join()
+    finally:
+        server.join(10)
+    assert not server.is_alive()
+    assert not os.path.exists(address)
+    assert UNPICKLED == []
+
+
+def test_truncated_frame():
+    sock, other = socket.socketpair()
+    other.sendall(FRAME_HEADER.pack(MESSAGE, 100) + b'0123456789')
+    other.close()
+    with pytest.raises(EOFError):
+        recv_frame(sock)
+    sock.close()
+
+
+def test_connection_with_truncated_frame():
+    sock, other = socket.socketpair()
+    connection = SocketConnection(sock, name='test')
+    send_frame(other, MESSAGE, pickle.dumps('ok'))
+    other.sendall(FRAME_HEADER.pack(MESSAGE, 100) + pickle.dumps('lost'))
+    other.close()
+
+    assert connection.get(timeout=5) == 'ok'
+    connection.task_done()
+    with pytest.raises(Empty):
+        connection.get(timeout=5)
+    assert not connection.alive.is_set()
+    assert connection.join_received(5)
+    connection.terminate()
+
+
+def test_once_exits_cleanly(address):
+    runner = start_runner(address, '--once')
+    try:
+        with qt_multiprocessing.AppEventLoop(transport=SocketTransport('unix://' + address, authkey=AUTHKEY)) as loop:
+            assert loop.add_event_future(os.getpid).result(10) == runner.pid
+        assert runner.wait(10) == 0
+    finally:
+        runner.kill()
+    assert not os.path.exists(address)
+
+
+def test_restart_opens_a_new_session(address):
+    runner = start_runner(address)
+    try:
+        loop = qt_multiprocessing.AppEventLoop(transport=SocketTransport('unix://' + address, authkey=AUTHKEY))
+        pids = []
+        for _ in range(2):
+            with loop:
+                pids.append(loop.add_event_future(os.getpid).result(10))
+
+        # Nothing is reused. Every start connects again and the runner starts a new process.
+        assert pids[0] != pids[1]
+        assert runner.poll() is None
+    finally:
+        runner.terminate()
+        runner.wait(10)